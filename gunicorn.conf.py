@@ -0,0 +1,57 @@
+"""
+Gunicorn settings, tuned through environment variables.
+
+GUNICORN_PROFILE picks the worker model:
+    sync     one request per process; simplest, needs a worker per concurrent request
+    gthread  GUNICORN_THREADS requests per process; the default, suits the I/O-bound API
+    uvicorn  asyncio workers serving `src.asgi` (requires `uvicorn`); use it for the transaction feed
+"""
+
+import multiprocessing
+import os
+from typing import Any
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile not in ('sync', 'gthread', 'uvicorn'):
+    raise RuntimeError(f'Unknown GUNICORN_PROFILE {profile!r}, expected sync, gthread or uvicorn.')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+backlog = env_int('GUNICORN_BACKLOG', 2048)
+
+if profile == 'uvicorn':
+    wsgi_app = 'src.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'src.wsgi:application'
+    worker_class = profile
+    threads = env_int('GUNICORN_THREADS', 4 if profile == 'gthread' else 1)
+
+# Import Django, DRF and the project once in the master; workers are forked with the modules already loaded, which
+# shortens worker boot and shares their memory copy-on-write.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Recycle workers to bound memory growth; the jitter keeps them from restarting all at once.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 10000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 1000)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    # Connections opened in the master while preloading must not be shared by the forked workers.
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
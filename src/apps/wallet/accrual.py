@@ -0,0 +1,103 @@
+"""
+Interest and fee accrual over every wallet.
+
+Wallets are processed in ranges of ids, each in one database transaction: the active wallets of the range are locked
+and their amounts computed in SQL as `ROUND(balance * rate, 8)`, the transactions are bulk-inserted and the balances
+are updated with a single UPDATE. A finished range is recorded as an `AccrualCheckpoint`, which reruns skip. Txids are
+derived from the accrual name and the wallet id, and wallets already posted to are skipped, so a range that committed
+before its checkpoint was written is never applied twice.
+"""
+
+import hashlib
+from contextlib import ExitStack
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Value
+from django.db.models.functions import Round
+
+from apps.wallet import fields
+from apps.wallet.models import AccrualCheckpoint, Transaction, Wallet
+
+
+class Range(NamedTuple):
+    database: str
+    start_id: int
+    # Exclusive.
+    end_id: int
+
+
+def accrual_txid(name: str, wallet_id: int) -> str:
+    return hashlib.sha256(f'accrual:{name}:{wallet_id}'.encode()).hexdigest()
+
+
+def amount(rate: Decimal) -> Round:
+    """The accrued amount of a wallet as an expression over its balance."""
+    rate_field = AccrualCheckpoint._meta.get_field('rate')
+    return Round(
+        F('balance') * Value(rate, output_field=rate_field),
+        fields.stored_places(),
+        output_field=Transaction._meta.get_field('amount'),
+    )
+
+
+def id_ranges(database: str, chunk_size: int) -> list[Range]:
+    """Consecutive ranges of `chunk_size` ids covering every wallet on `database`."""
+    bounds = Wallet.objects.using(database).aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        Range(database, start, start + chunk_size) for start in range(bounds['low'], bounds['high'] + 1, chunk_size)
+    ]
+
+
+def pending_ranges(name: str, database: str, chunk_size: int) -> list[Range]:
+    """The ranges of `chunk_size` wallet ids on `database` not yet covered by a checkpoint of `name`."""
+    ranges = id_ranges(database, chunk_size)
+    if not ranges:
+        return []
+    done = list(AccrualCheckpoint.objects.filter(name=name, database=database).values_list('start_id', 'end_id'))
+    return [r for r in ranges if not any(start <= r.start_id and r.end_id <= end for start, end in done)]
+
+
+def accrue(name: str, rate: Decimal, wallets: Range) -> int:
+    """Post `rate` times the balance to every active wallet in `wallets` not posted to yet, returning their number."""
+    db = wallets.database
+    with ExitStack() as reservations, transaction.atomic(using=db):
+        locked = list(
+            Wallet.objects.using(db)
+            .active()
+            .select_for_update()
+            .filter(pk__gte=wallets.start_id, pk__lt=wallets.end_id)
+            .annotate(accrual=amount(rate))
+            .exclude(accrual=0)
+            # A fee never takes the balance below what holds reserve; such wallets are left out.
+            .filter(balance__gte=F('held') - F('accrual'))
+            .order_by('pk')
+        )
+        txids = {wallet.pk: accrual_txid(name, wallet.pk) for wallet in locked}
+        done = Transaction.objects.using(db).existing_txids(list(txids.values()))
+
+        postings = []
+        for wallet in locked:
+            if txids[wallet.pk] in done:
+                continue
+            posting = Transaction(wallet=wallet, txid=txids[wallet.pk], amount=wallet.accrual)
+            reservations.enter_context(posting.reserve_id())
+            postings.append((wallet, [posting]))
+        if postings:
+            # The wallets are locked, so the UPDATE computes the same amounts as the SELECT did.
+            Wallet.objects.using(db).filter(pk__in=[wallet.pk for wallet, _ in postings]).update(
+                balance=F('balance') + amount(rate), version=F('version') + 1
+            )
+            for wallet, _ in postings:
+                wallet.balance += wallet.accrual
+                wallet.version += 1
+            Transaction.objects.store(postings)
+
+    # Written after the range committed, possibly on another database; a crash in between only repeats the range.
+    AccrualCheckpoint.objects.create(
+        name=name, rate=rate, database=db, start_id=wallets.start_id, end_id=wallets.end_id, accrued=len(postings)
+    )
+    return len(postings)
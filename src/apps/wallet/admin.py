@@ -1 +1,185 @@
-# Register your models here.
+"""
+Admin for wallets and transactions, built for tables of millions of rows.
+
+Changelists never run a full COUNT (see `EstimatedCountPaginator`), search only compares indexed columns for equality,
+filters and sortable columns are indexed, and wallets are picked by id rather than from a `<select>` of all of them.
+Nothing here writes balances directly: transactions are added through `Transaction.save`, which posts them, and are
+never changed or deleted; wallet edits update only the edited columns, and deletion is the soft deletion of the API.
+"""
+
+import csv
+from abc import ABCMeta, abstractmethod
+from collections.abc import Iterator
+from functools import partial
+from typing import Any
+
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.forms import MediaDefiningClass, ModelForm
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.serializers import ValidationError
+
+from apps.wallet import leaderboard, listcache
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.pagination import EstimatedCountPaginator
+
+
+# Wallet and transaction ids are 32-bit columns.
+MAX_ID = 2**31 - 1
+
+
+def as_id(term: str) -> int | None:
+    return int(term) if term.isdigit() and int(term) <= MAX_ID else None
+
+
+class AbstractAdminMetaclass(MediaDefiningClass, ABCMeta):
+    """`ModelAdmin` already has a metaclass, so abstract admins need one combining it with `ABCMeta`."""
+
+
+class LargeTableAdmin(admin.ModelAdmin, metaclass=AbstractAdminMetaclass):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    ordering = ['-pk']
+
+    @abstractmethod
+    def search_query(self, term: str) -> Q | None:
+        """The filter matching `term`, or None when it cannot match anything."""
+
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet, search_term: str) -> tuple[QuerySet, bool]:
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = self.search_query(term)
+        return (queryset.none() if query is None else queryset.filter(query)), False
+
+
+class DeletedListFilter(admin.SimpleListFilter):
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin) -> list[tuple[str, str]]:
+        return [('active', 'Active'), ('deleted', 'Deleted')]
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> QuerySet:
+        if self.value() == 'active':
+            return queryset.filter(deleted_at__isnull=True)
+        if self.value() == 'deleted':
+            return queryset.filter(deleted_at__isnull=False)
+        return queryset
+
+
+@admin.register(Wallet)
+class WalletAdmin(LargeTableAdmin):
+    list_display = ['id', 'label', 'currency', 'balance', 'held', 'deleted_at']
+    list_filter = [DeletedListFilter]
+    sortable_by = ['id', 'balance']
+    search_fields = ['id']
+    search_help_text = 'Wallet id'
+    actions = ['soft_delete']
+
+    def search_query(self, term: str) -> Q | None:
+        wallet_id = as_id(term)
+        return None if wallet_id is None else Q(pk=wallet_id)
+
+    def get_readonly_fields(self, request: HttpRequest, obj: Wallet | None = None) -> list[str]:
+        # Balances only change by posting, and new wallets start empty; the currency of existing transactions is fixed.
+        if obj is None:
+            return ['balance', 'held', 'version', 'deleted_at']
+        return ['currency', 'balance', 'held', 'version', 'deleted_at']
+
+    def has_change_permission(self, request: HttpRequest, obj: Wallet | None = None) -> bool:
+        if obj is not None and obj.deleted_at is not None:
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request: HttpRequest, obj: Wallet | None = None) -> bool:
+        # Deleting would collect every transaction of the wallet; `soft_delete` and `purge_wallets` do it in batches.
+        return False
+
+    def save_model(self, request: HttpRequest, obj: Wallet, form: ModelForm, change: bool) -> None:
+        if not change:
+            obj.balance = 0
+            super().save_model(request, obj, form, change)
+            return
+        # A full save would write back the balance loaded with the form, undoing postings made since.
+        changes = {name: getattr(obj, name) for name in form.changed_data}
+        if changes and not obj.apply_changes(changes):
+            self.message_user(request, 'The wallet was deleted meanwhile; nothing was changed.', messages.WARNING)
+
+    @admin.action(description='Delete selected wallets (purged later by purge_wallets)', permissions=['change'])
+    def soft_delete(self, request: HttpRequest, queryset: QuerySet) -> None:
+        db = queryset.db
+        wallet_ids = list(queryset.active().values_list('pk', flat=True))
+        with transaction.atomic(using=db):
+            Wallet.objects.using(db).active().filter(pk__in=wallet_ids).update(
+                deleted_at=timezone.now(), version=F('version') + 1
+            )
+            for wallet_id in wallet_ids:
+                transaction.on_commit(partial(leaderboard.discard, wallet_id), using=db)
+            transaction.on_commit(partial(listcache.invalidate, wallet_ids), using=db)
+        self.message_user(request, f'Deleted {len(wallet_ids)} wallet(s).')
+
+
+class TransactionForm(ModelForm):
+    def clean(self) -> dict[str, Any]:
+        cleaned_data = super().clean()
+        wallet, amount = cleaned_data.get('wallet'), cleaned_data.get('amount')
+        if wallet is not None and amount is not None:
+            # Saving checks again with the wallet locked; this only turns the common rejections into form errors.
+            try:
+                Transaction.objects.balance_after(wallet, [Transaction(amount=amount)])
+            except ValidationError as error:
+                raise DjangoValidationError(error.detail) from None
+        return cleaned_data
+
+
+class Echo:
+    """A file-like object handing back what is written, for streaming `csv.writer` rows."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+@admin.register(Transaction)
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ['id', 'txid', 'wallet_id', 'amount', 'created_at']
+    list_filter = [('created_at', admin.DateFieldListFilter)]
+    sortable_by = ['id', 'amount', 'created_at']
+    search_fields = ['txid']
+    search_help_text = 'Exact txid, transaction id or wallet id'
+    form = TransactionForm
+    raw_id_fields = ['wallet']
+    fields = ['wallet', 'txid', 'amount', 'created_at']
+    readonly_fields = ['created_at']
+    actions = ['export_csv']
+
+    def search_query(self, term: str) -> Q | None:
+        query = Q(txid=term)
+        object_id = as_id(term)
+        if object_id is not None:
+            query |= Q(pk=object_id) | Q(wallet_id=object_id)
+        return query
+
+    def has_change_permission(self, request: HttpRequest, obj: Transaction | None = None) -> bool:
+        # Posted transactions are immutable: changing or deleting one would leave the wallet balance wrong.
+        return False
+
+    def has_delete_permission(self, request: HttpRequest, obj: Transaction | None = None) -> bool:
+        return False
+
+    @admin.action(description='Export selected transactions as CSV', permissions=['view'])
+    def export_csv(self, request: HttpRequest, queryset: QuerySet) -> StreamingHttpResponse:
+        rows = queryset.order_by('pk').values_list('id', 'txid', 'wallet_id', 'amount', 'created_at')
+        response = StreamingHttpResponse(self.csv_lines(rows.iterator()), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
+        return response
+
+    def csv_lines(self, rows: Iterator[tuple[Any, ...]]) -> Iterator[str]:
+        writer = csv.writer(Echo())
+        yield writer.writerow(['id', 'txid', 'wallet_id', 'amount', 'created_at'])
+        for row in rows:
+            yield writer.writerow(row)
@@ -0,0 +1,71 @@
+"""
+Change feed of posted transactions, ordered by `Transaction.id`.
+
+Consumers wait on a change counter in the Django cache that postings bump after commit, so an idle consumer costs a
+cache read per `WALLET_FEED_POLL_SECONDS` and the database is only queried when something was posted (or every
+`WALLET_FEED_RECHECK_SECONDS` as a safety net for writes that bypass the posting path).
+
+Ids and `created_at` are both assigned before commit, so a transaction whose id is below the cursor can become
+visible after the consumer passed it. Rows younger than `WALLET_FEED_SETTLE_SECONDS` are held back to cover that,
+which is enough as long as postings commit within that long of their insert; a row committing later (e.g. at the
+start of a large transfer batch, or behind a stalled commit) is skipped by consumers already past it. Consumers that
+must see every posting read the outbox (`apps.wallet.outbox`) instead.
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.wallet import sharding
+from apps.wallet.models import Transaction
+
+
+SEQUENCE_KEY = 'wallet:feed:sequence'
+
+
+def notify() -> None:
+    """Wake up waiting consumers. Called after a posting commits."""
+    try:
+        cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 1, timeout=None)
+
+
+async def fetch(after: int, limit: int) -> list[Transaction]:
+    queryset = Transaction.objects.filter(pk__gt=after).order_by('pk')
+    if settings.WALLET_FEED_SETTLE_SECONDS:
+        # Ids are assigned before commit, so a row with a lower id may still become visible after a higher one.
+        # Holding back the newest rows for a moment keeps consumers from stepping over it, unless its commit comes
+        # later than the settle window after `created_at`.
+        settled = timezone.now() - timedelta(seconds=settings.WALLET_FEED_SETTLE_SECONDS)
+        queryset = queryset.filter(created_at__lte=settled)
+    pages = [[row async for row in queryset.using(db)[:limit]] for db in sharding.wallet_databases()]
+    return list(islice(heapq.merge(*pages, key=lambda row: row.pk), limit))
+
+
+async def wait(after: int, limit: int, timeout: float) -> list[Transaction]:
+    """Return up to `limit` transactions with an id above `after`, waiting at most `timeout` seconds for some."""
+    now = time.monotonic()
+    deadline = now + timeout
+    sequence = await cache.aget(SEQUENCE_KEY)
+    next_fetch = now
+    while True:
+        if now >= next_fetch:
+            rows = await fetch(after, limit)
+            if rows:
+                return rows
+            next_fetch = now + settings.WALLET_FEED_RECHECK_SECONDS
+        if now >= deadline:
+            return []
+        await asyncio.sleep(min(settings.WALLET_FEED_POLL_SECONDS, deadline - now))
+        now = time.monotonic()
+        current = await cache.aget(SEQUENCE_KEY)
+        if current != sequence:
+            sequence = current
+            next_fetch = min(next_fetch, now + settings.WALLET_FEED_SETTLE_SECONDS)
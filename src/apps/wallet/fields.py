@@ -0,0 +1,170 @@
+"""
+Amount columns stored as DECIMAL or, with `WALLET_SCALED_AMOUNTS`, as BIGINT counts of 1e-8 units.
+
+`AmountField` is a `DecimalField` to the rest of the code: models, serializers and filters read and write `Decimal`s,
+and values are scaled only on their way to and from the database. Integer columns make inserts, range filters and
+sums cheaper and indexes smaller, but limit every value to +/-92,233,720,368.54775807. Amounts combined with
+amount columns in SQL must be wrapped with `amount_value`, so they are scaled too.
+
+The storage of existing columns is changed by the migration introducing `AmountField` or, after changing the
+setting later, by `./manage.py convert_amounts`.
+"""
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.db import models, router
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import Value
+
+
+DECIMAL_PLACES = 8
+
+# The amount columns of each model.
+AMOUNT_FIELDS = {
+    'wallet': ['balance', 'held'],
+    'transaction': ['amount'],
+    'scheduledposting': ['amount'],
+    'hold': ['amount'],
+}
+
+
+# Storage forced by `storage()`, overriding `WALLET_SCALED_AMOUNTS` in the current context.
+forced_storage: ContextVar[bool | None] = ContextVar('forced_storage', default=None)
+
+
+def is_scaled() -> bool:
+    forced = forced_storage.get()
+    return settings.WALLET_SCALED_AMOUNTS if forced is None else forced
+
+
+@contextmanager
+def storage(scaled: bool) -> Iterator[None]:
+    """Make amount fields use scaled integer (or decimal) storage within the block, whatever the setting says."""
+    token = forced_storage.set(scaled)
+    try:
+        yield
+    finally:
+        forced_storage.reset(token)
+
+
+def to_units(value: Decimal) -> int:
+    """`value` in 1e-8 units, rounded half to even like DECIMAL columns round extra places."""
+    return int(value.scaleb(DECIMAL_PLACES).to_integral_value())
+
+
+def from_units(units: float | Decimal) -> Decimal:
+    if isinstance(units, float):
+        # Some backends compute ROUND() and averages of integers as floats.
+        units = int(units) if units.is_integer() else Decimal(repr(units))
+    return Decimal(units).scaleb(-DECIMAL_PLACES)
+
+
+def stored_places() -> int:
+    """Decimal places of amounts as stored, for rounding in SQL: none when they are scaled integers."""
+    return 0 if is_scaled() else DECIMAL_PLACES
+
+
+def amount_value(value: Decimal) -> Value:
+    """`value` as an SQL parameter for arithmetic with amount columns, e.g. `F('held') + amount_value(amount)`."""
+    return Value(value, output_field=AmountField(max_digits=30, decimal_places=DECIMAL_PLACES))
+
+
+class AmountField(models.DecimalField):
+    def get_internal_type(self) -> str:
+        return 'BigIntegerField' if is_scaled() else 'DecimalField'
+
+    def get_db_prep_value(self, value: Any, connection: BaseDatabaseWrapper, prepared: bool = False) -> Any:
+        if not is_scaled():
+            return super().get_db_prep_value(value, connection, prepared)
+        if hasattr(value, 'as_sql'):
+            return value
+        if not prepared:
+            value = self.get_prep_value(value)
+        return None if value is None else to_units(value)
+
+    def get_db_prep_save(self, value: Any, connection: BaseDatabaseWrapper) -> Any:
+        if not is_scaled():
+            return super().get_db_prep_save(value, connection)
+        return self.get_db_prep_value(value, connection)
+
+    def get_db_converters(self, connection: BaseDatabaseWrapper) -> list:
+        converters = super().get_db_converters(connection)
+        if is_scaled():
+            converters.append(self.from_scaled)
+        return converters
+
+    def from_scaled(self, value: Any, expression: Any, connection: BaseDatabaseWrapper) -> Decimal | None:
+        return None if value is None else from_units(value)
+
+
+def is_scaled_column(connection: BaseDatabaseWrapper, field: models.Field) -> bool:
+    """Whether the column of `field` is currently an integer column."""
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        description = introspection.get_table_description(cursor, field.model._meta.db_table)
+    column = next(column for column in description if column.name == field.column)
+    return introspection.get_field_type(column.type_code, column) != 'DecimalField'
+
+
+def convert_amounts(
+    model_classes: Iterable[type[models.Model]], schema_editor: BaseDatabaseSchemaEditor, scaled: bool
+) -> list[str]:
+    """
+    Rewrite the amount columns of `model_classes` on the schema editor's database as scaled integers or decimals.
+
+    The models' amount fields must be `AmountField`s. Columns already stored that way are left alone. Returns the
+    converted columns as `table.column`.
+    """
+    connection = schema_editor.connection
+    converted = []
+    # SQLite rebuilds the whole table on every change, declaring the other columns as the model says, so the models
+    # must describe the target storage and the columns to convert must be known before the first change.
+    with storage(scaled):
+        for model in model_classes:
+            if not router.allow_migrate_model(connection.alias, model):
+                continue
+            amount_fields = [model._meta.get_field(name) for name in AMOUNT_FIELDS.get(model._meta.model_name, [])]
+            for field in [field for field in amount_fields if is_scaled_column(connection, field) != scaled]:
+                convert_column(schema_editor, field, scaled)
+                converted.append(f'{model._meta.db_table}.{field.column}')
+    return converted
+
+
+def convert_column(schema_editor: BaseDatabaseSchemaEditor, field: models.Field, scaled: bool) -> None:
+    # Through a DECIMAL wide enough for the value in units, so neither the scaling nor the type change overflows.
+    decimal = storage_field(field, models.DecimalField(max_digits=field.max_digits, decimal_places=DECIMAL_PLACES))
+    wide = storage_field(field, models.DecimalField(max_digits=field.max_digits + 8, decimal_places=DECIMAL_PLACES))
+    integer = storage_field(field, models.BigIntegerField())
+    table = schema_editor.quote_name(field.model._meta.db_table)
+    column = schema_editor.quote_name(field.column)
+    if scaled:
+        schema_editor.alter_field(field.model, decimal, wide)
+        # ROUND leaves an exact integer where decimals are stored as floats (SQLite).
+        rescale(schema_editor, f'UPDATE {table} SET {column} = ROUND({column} * 100000000)')
+        schema_editor.alter_field(field.model, wide, integer)
+    else:
+        schema_editor.alter_field(field.model, integer, wide)
+        # Multiplying keeps all eight places on MySQL, whose division would round to four.
+        rescale(schema_editor, f'UPDATE {table} SET {column} = {column} * 0.00000001')
+        schema_editor.alter_field(field.model, wide, decimal)
+
+
+def rescale(schema_editor: BaseDatabaseSchemaEditor, sql: str) -> None:
+    schema_editor.execute(sql)
+    if schema_editor.connection.vendor == 'postgresql':
+        # PostgreSQL cannot alter a table with foreign key checks of the UPDATE still deferred; run them now.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE; SET CONSTRAINTS ALL DEFERRED')
+
+
+def storage_field(field: models.Field, storage: models.Field) -> models.Field:
+    """`storage` standing in for `field` with a fixed column type, whatever `WALLET_SCALED_AMOUNTS` says."""
+    storage.null = field.null
+    storage.set_attributes_from_name(field.name)
+    storage.model = field.model
+    return storage
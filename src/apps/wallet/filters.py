@@ -7,10 +7,11 @@ class WalletFilter(filters.FilterSet):
     min_balance = filters.NumberFilter(field_name='balance', lookup_expr='gte')
     max_balance = filters.NumberFilter(field_name='balance', lookup_expr='lte')
     label = filters.CharFilter(field_name='label', lookup_expr='icontains')
+    currency = filters.CharFilter(field_name='currency')
 
     class Meta:
         model = Wallet
-        fields = ['min_balance', 'max_balance', 'label']
+        fields = ['min_balance', 'max_balance', 'label', 'currency']
 
 
 class TransactionFilter(filters.FilterSet):
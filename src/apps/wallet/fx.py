@@ -0,0 +1,103 @@
+"""
+Exchange rates and valuations in a reporting currency.
+
+Rates come from the `ExchangeRate` table and are kept in process memory for `WALLET_FX_RATES_TTL` seconds, so
+valuations do not query them on every request. Balances are summed per currency in SQL on every wallet database, and
+only those few totals are converted.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from apps.wallet import sharding
+from apps.wallet.models import ExchangeRate, Wallet
+
+
+class CurrencyTotal(NamedTuple):
+    currency: str
+    wallets: int
+    balance: Decimal
+    # Units of the reporting currency per unit of `currency`; None without a rate, which leaves `value` unknown too.
+    rate: Decimal | None
+    value: Decimal | None
+
+
+class Valuation(NamedTuple):
+    currency: str
+    # Sum of the known values; currencies without a rate are listed but not included.
+    total: Decimal
+    currencies: list[CurrencyTotal]
+
+
+class RateTable:
+    """The `ExchangeRate` table, kept in process memory for `WALLET_FX_RATES_TTL` seconds."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.rates: dict[str, Decimal] = {}
+        self.expires_at = 0.0
+
+    def get(self) -> dict[str, Decimal]:
+        with self.lock:
+            if time.monotonic() >= self.expires_at:
+                self.rates = dict(ExchangeRate.objects.values_list('currency', 'rate'))
+                self.expires_at = time.monotonic() + settings.WALLET_FX_RATES_TTL
+            return self.rates
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.expires_at = 0.0
+
+
+_table = RateTable()
+
+
+def rates() -> dict[str, Decimal]:
+    """Every known rate by currency, reloaded from the database at most once per TTL."""
+    return _table.get()
+
+
+def invalidate() -> None:
+    """Make the next `rates()` call in this process reload the table."""
+    _table.invalidate()
+
+
+def conversion_rate(currency: str, reporting_currency: str) -> Decimal | None:
+    if currency == reporting_currency:
+        return Decimal(1)
+    table = rates()
+    if currency not in table or reporting_currency not in table:
+        return None
+    return table[currency] / table[reporting_currency]
+
+
+def valuation(reporting_currency: str) -> Valuation:
+    """The balances of all active wallets per currency, and their value in `reporting_currency`."""
+    wallets: dict[str, int] = defaultdict(int)
+    balances: dict[str, Decimal] = defaultdict(Decimal)
+    for db in sharding.wallet_databases():
+        rows = (
+            Wallet.objects.using(db)
+            .active()
+            .values('currency')
+            .annotate(wallets=Count('pk'), balance=Sum('balance'))
+            .values_list('currency', 'wallets', 'balance')
+            .order_by()
+        )
+        for currency, count, balance in rows:
+            wallets[currency] += count
+            balances[currency] += balance
+
+    totals = []
+    for currency in sorted(balances):
+        rate = conversion_rate(currency, reporting_currency)
+        value = None if rate is None else (balances[currency] * rate).quantize(Decimal('0.00000001'))
+        totals.append(CurrencyTotal(currency, wallets[currency], balances[currency], rate, value))
+    total = sum((entry.value for entry in totals if entry.value is not None), Decimal(0))
+    return Valuation(currency=reporting_currency, total=total, currencies=totals)
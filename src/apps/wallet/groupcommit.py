@@ -0,0 +1,130 @@
+"""
+Group commit: concurrent postings to one wallet coalesced into a single database transaction.
+
+The first posting to a wallet without an open batch leads one. It waits `WALLET_GROUP_COMMIT_WINDOW` seconds, or
+until `WALLET_GROUP_COMMIT_MAX_BATCH` postings joined, then locks the wallet once, checks every posting in arrival
+order against the running balance and stores the accepted ones with one balance update and one multi-row insert.
+Each caller blocks until the batch is committed and gets its own outcome: a posting that would overdraw the wallet or
+reuses a txid fails alone while the others commit. Batches live in one process, so this pays off with threaded
+workers (the gthread profile), where concurrent requests to a hot wallet share a process.
+"""
+
+import threading
+from concurrent.futures import Future
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from rest_framework.serializers import ValidationError
+
+from apps.wallet.models import Transaction, Wallet
+
+
+DUPLICATE_TXID = 'transaction with this txid already exists.'
+
+
+@dataclass
+class Batch:
+    db: str
+    wallet_id: int
+    postings: list[tuple[Transaction, Future]] = field(default_factory=list)
+    full: threading.Event = field(default_factory=threading.Event)
+
+
+_lock = threading.Lock()
+_open: dict[tuple[str, int], Batch] = {}
+
+
+def is_enabled() -> bool:
+    return settings.WALLET_GROUP_COMMIT_WINDOW is not None
+
+
+def submit(posting: Transaction, db: str) -> None:
+    """Post `posting` to its wallet on `db` as part of a batch, blocking until it is committed or rejected."""
+    if connections[db].in_atomic_block:
+        # Batching would commit the posting outside the caller's transaction.
+        posting.save()
+        return
+
+    outcome: Future[None] = Future()
+    key = (db, posting.wallet_id)
+    with _lock:
+        batch = _open.get(key)
+        leader = batch is None
+        if batch is None:
+            batch = _open[key] = Batch(db=db, wallet_id=posting.wallet_id)
+        batch.postings.append((posting, outcome))
+        if len(batch.postings) >= settings.WALLET_GROUP_COMMIT_MAX_BATCH:
+            # Later postings start a new batch; it waits for this one's wallet lock.
+            del _open[key]
+            batch.full.set()
+
+    if leader:
+        batch.full.wait(settings.WALLET_GROUP_COMMIT_WINDOW)
+        with _lock:
+            if _open.get(key) is batch:
+                del _open[key]
+        commit(batch)
+    outcome.result()
+
+
+def commit(batch: Batch) -> None:
+    """Apply `batch` and resolve the outcome of every posting in it."""
+    try:
+        rejected = apply(batch)
+    except IntegrityError:
+        # A txid was taken by a posting outside the batch after the check; fall back to posting one by one.
+        for posting, outcome in batch.postings:
+            try:
+                posting.save()
+            except IntegrityError:
+                outcome.set_exception(ValidationError(DUPLICATE_TXID))
+            except Exception as error:
+                outcome.set_exception(error)
+            else:
+                outcome.set_result(None)
+        return
+    except Exception as error:
+        for _, outcome in batch.postings:
+            outcome.set_exception(error)
+        return
+    for index, (_, outcome) in enumerate(batch.postings):
+        if index in rejected:
+            outcome.set_exception(rejected[index])
+        else:
+            outcome.set_result(None)
+
+
+def apply(batch: Batch) -> dict[int, ValidationError]:
+    """Post the acceptable postings of `batch` in one transaction, returning the errors of the others by index."""
+    rejected = {}
+    db = batch.db
+    with ExitStack() as reservations, transaction.atomic(using=db):
+        wallet = Wallet.objects.using(db).select_for_update().filter(pk=batch.wallet_id).first()
+        if wallet is None or wallet.deleted_at is not None:
+            error = ValidationError('Wallet does not exist.' if wallet is None else 'Wallet is deleted.')
+            return dict.fromkeys(range(len(batch.postings)), error)
+
+        taken = Transaction.objects.using(db).existing_txids([posting.txid for posting, _ in batch.postings])
+        accepted = []
+        balance = wallet.balance
+        for index, (posting, _) in enumerate(batch.postings):
+            if posting.txid in taken:
+                rejected[index] = ValidationError(DUPLICATE_TXID)
+                continue
+            if balance + Decimal(posting.amount) < wallet.held:
+                rejected[index] = ValidationError('Amount exceeds wallet balance.')
+                continue
+            try:
+                reservations.enter_context(posting.reserve_id())
+            except ValidationError as error:
+                rejected[index] = error
+                continue
+            taken.add(posting.txid)
+            balance += Decimal(posting.amount)
+            accepted.append(posting)
+        if accepted:
+            Transaction.objects.post(wallet, accepted)
+    return rejected
@@ -0,0 +1,121 @@
+"""
+Holds: funds reserved on a wallet now and captured as a transaction later, or released.
+
+Authorizing, capturing and voiding each hinge on one conditional UPDATE instead of locking the wallet first: the
+available balance is checked by the UPDATE reserving it, and a hold changes status only if it is still active, so of
+concurrent captures and voids exactly one wins. Active holds are summed in `Wallet.held`, which postings respect.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.serializers import ValidationError
+
+from apps.wallet import listcache, sharding
+from apps.wallet.fields import amount_value
+from apps.wallet.models import Hold, Transaction, Wallet
+
+
+def authorize(wallet_id: int, amount: Decimal, txid: str, ttl: timedelta) -> Hold:
+    """Reserve `amount` of the wallet's available balance until it is captured, voided or `ttl` has passed."""
+    db = sharding.shard_for_wallet(wallet_id)
+    try:
+        with transaction.atomic(using=db):
+            wallets = Wallet.objects.using(db).active().filter(pk=wallet_id)
+            reserved = wallets.filter(balance__gte=F('held') + amount_value(amount)).update(
+                held=F('held') + amount_value(amount), version=F('version') + 1
+            )
+            if not reserved:
+                if not wallets.exists():
+                    raise NotFound('Wallet does not exist.')
+                raise ValidationError('Amount exceeds available balance.')
+            transaction.on_commit(partial(listcache.invalidate, [wallet_id]), using=db)
+            return Hold.objects.using(db).create(
+                wallet_id=wallet_id, txid=txid, amount=amount, expires_at=timezone.now() + ttl
+            )
+    except IntegrityError:
+        raise ValidationError('hold with this txid already exists.') from None
+
+
+def capture(wallet_id: int, hold_id: int, amount: Decimal | None = None) -> Transaction:
+    """
+    Post the hold as a debit of `amount` (by default all of it) and release it.
+
+    Expired holds cannot be captured, even before `expire` has released them.
+    """
+    db = sharding.shard_for_wallet(wallet_id)
+    hold = get_hold(db, wallet_id, hold_id)
+    captured = hold.amount if amount is None else amount
+    if captured > hold.amount:
+        raise ValidationError('Amount exceeds the held amount.')
+    posting = Transaction(wallet_id=wallet_id, txid=hold.txid, amount=-captured)
+    try:
+        with posting.reserve_id(), transaction.atomic(using=db):
+            active = Hold.objects.using(db).filter(pk=hold.pk, status=Hold.ACTIVE, expires_at__gt=timezone.now())
+            if not active.update(status=Hold.CAPTURED):
+                raise ValidationError('Hold is not active.')
+            # The hold was part of `held`, so the balance stays at or above what the other holds reserve.
+            wallets = Wallet.objects.using(db).active().filter(pk=wallet_id)
+            if not wallets.update(
+                balance=F('balance') - amount_value(captured),
+                held=F('held') - amount_value(hold.amount),
+                version=F('version') + 1,
+            ):
+                raise ValidationError('Wallet is deleted.')
+            posting.wallet = wallets.get()
+            Transaction.objects.store([(posting.wallet, [posting])])
+    except IntegrityError:
+        raise ValidationError('transaction with this txid already exists.') from None
+    return posting
+
+
+def void(wallet_id: int, hold_id: int) -> Hold:
+    """Release an active hold without posting anything."""
+    db = sharding.shard_for_wallet(wallet_id)
+    hold = get_hold(db, wallet_id, hold_id)
+    with transaction.atomic(using=db):
+        if not Hold.objects.using(db).filter(pk=hold.pk, status=Hold.ACTIVE).update(status=Hold.VOIDED):
+            raise ValidationError('Hold is not active.')
+        Wallet.objects.using(db).filter(pk=wallet_id).update(
+            held=F('held') - amount_value(hold.amount), version=F('version') + 1
+        )
+        transaction.on_commit(partial(listcache.invalidate, [wallet_id]), using=db)
+    hold.status = Hold.VOIDED
+    return hold
+
+
+def expire(db: str, now: datetime, batch_size: int) -> int:
+    """Release up to `batch_size` active holds on `db` that expired by `now`, returning their number."""
+    with transaction.atomic(using=db):
+        holds = list(
+            Hold.objects.using(db)
+            .select_for_update(skip_locked=True)
+            .filter(status=Hold.ACTIVE, expires_at__lte=now)
+            .order_by('expires_at')[:batch_size]
+        )
+        if not holds:
+            return 0
+        Hold.objects.using(db).filter(pk__in=[hold.pk for hold in holds]).update(status=Hold.EXPIRED)
+        released: dict[int, Decimal] = defaultdict(Decimal)
+        for hold in holds:
+            released[hold.wallet_id] += hold.amount
+        # In id order, like transfers, so concurrent sweeps and postings cannot deadlock.
+        for wallet_id in sorted(released):
+            Wallet.objects.using(db).filter(pk=wallet_id).update(
+                held=F('held') - amount_value(released[wallet_id]), version=F('version') + 1
+            )
+        transaction.on_commit(partial(listcache.invalidate, list(released)), using=db)
+    return len(holds)
+
+
+def get_hold(db: str, wallet_id: int, hold_id: int) -> Hold:
+    hold = Hold.objects.using(db).filter(pk=hold_id, wallet_id=wallet_id).first()
+    if hold is None:
+        raise NotFound('Hold does not exist.')
+    return hold
@@ -0,0 +1,220 @@
+"""
+Top-N wallets by balance, kept in the Django cache.
+
+The board holds the exact top `len(entries)` wallets ordered by balance (descending) and id. Postings update it
+incrementally after commit; it is rebuilt with one indexed query per shard when it is missing or has shrunk below
+`WALLET_LEADERBOARD_SIZE`, so reads never touch the wallet table in the steady state.
+
+Updates are queued under increasing sequence numbers and applied in order by whichever process holds the lock, which
+applies everything queued before releasing it. An updater finding the lock taken leaves its change to the holder
+instead of waiting, so the posting path never blocks. Changes consumed while there is no board are dropped, and the
+last one dropped is recorded: a rebuild notes the last queued change before querying and only stores its snapshot if
+nothing queued after that was dropped, querying again otherwise, so a posting committed while it was querying is never
+lost.
+"""
+
+import bisect
+import heapq
+import time
+from collections.abc import Sequence
+from decimal import Decimal
+from itertools import islice
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.wallet import sharding
+from apps.wallet.models import Wallet
+
+
+BOARD_KEY = 'wallet:leaderboard'
+LOCK_KEY = 'wallet:leaderboard:lock'
+QUEUED_KEY = 'wallet:leaderboard:queued'
+APPLIED_KEY = 'wallet:leaderboard:applied'
+DROPPED_KEY = 'wallet:leaderboard:dropped'
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 5
+# Queued changes are applied within moments; this only bounds what a crashed updater leaves behind.
+PENDING_TTL = 60
+# Changes applied per round while holding the lock.
+DRAIN_BATCH = 1000
+
+
+class Entry(NamedTuple):
+    balance: Decimal
+    wallet_id: int
+    label: str
+
+    @property
+    def rank_key(self) -> tuple[Decimal, int]:
+        return -self.balance, self.wallet_id
+
+
+class Board(NamedTuple):
+    entries: list[Entry]
+    # The board holds every active wallet, so any wallet may be inserted into it.
+    complete: bool
+
+
+def capacity() -> int:
+    return settings.WALLET_LEADERBOARD_SIZE + settings.WALLET_LEADERBOARD_SLACK
+
+
+def top(limit: int) -> list[Entry]:
+    board = cache.get(BOARD_KEY)
+    if board is None:
+        board = rebuild()
+    return board.entries[:limit]
+
+
+def rebuild() -> Board:
+    for attempt in range(LOCK_ATTEMPTS):
+        # Changes queued up to here committed before the query starts, so the snapshot includes them.
+        queued = cache.get(QUEUED_KEY, 0)
+        board = query()
+        # On the read path, so waiting a little for the lock is fine.
+        if not _acquire_lock():
+            time.sleep(0.001 * (attempt + 1))
+            continue
+        try:
+            while _drain():
+                pass
+            # Another rebuild got there first; its board already has the changes applied since.
+            current = cache.get(BOARD_KEY)
+            if current is not None:
+                return current
+            if cache.get(DROPPED_KEY, 0) <= queued:
+                cache.set(BOARD_KEY, board, timeout=settings.WALLET_LEADERBOARD_TTL)
+                return board
+        finally:
+            cache.delete(LOCK_KEY)
+    # Serve the last snapshot without storing it; the next read rebuilds.
+    return board
+
+
+def query() -> Board:
+    size = capacity()
+    per_shard = [
+        Wallet.objects.using(db).active().order_by('-balance', 'pk').values_list('balance', 'pk', 'label')[:size]
+        for db in sharding.wallet_databases()
+    ]
+    rows = [[Entry(*row) for row in rows] for rows in per_shard]
+    entries = list(islice(heapq.merge(*rows, key=lambda entry: entry.rank_key), size))
+    return Board(entries=entries, complete=len(entries) < size)
+
+
+def record(wallet: Wallet) -> None:
+    """Apply the wallet's current balance and label (or its deletion) to the board."""
+    record_many([wallet])
+
+
+def record_many(wallets: Sequence[Wallet]) -> None:
+    _update(
+        {
+            wallet.pk: None if wallet.deleted_at is not None else Entry(wallet.balance, wallet.pk, wallet.label)
+            for wallet in wallets
+        }
+    )
+
+
+def discard(wallet_id: int) -> None:
+    _update({wallet_id: None})
+
+
+def pending_key(sequence: int) -> str:
+    return f'wallet:leaderboard:pending:{sequence}'
+
+
+def missing_key(key: str) -> str:
+    return f'{key}:missing'
+
+
+def _update(changes: dict[int, Entry | None]) -> None:
+    try:
+        sequence = cache.incr(QUEUED_KEY)
+    except ValueError:
+        # Both counters start together, so a missing applied counter later means it was evicted.
+        cache.add(APPLIED_KEY, 0, timeout=None)
+        cache.add(QUEUED_KEY, 0, timeout=None)
+        sequence = cache.incr(QUEUED_KEY)
+    cache.set(pending_key(sequence), changes, timeout=PENDING_TTL)
+    while _acquire_lock():
+        try:
+            _drain()
+        finally:
+            cache.delete(LOCK_KEY)
+        # An updater stores its change before trying the lock, so one that found it taken stored its change before
+        # this check, and the change is picked up here.
+        if cache.get(pending_key(cache.get(APPLIED_KEY, 0) + 1)) is None:
+            return
+
+
+def _drain() -> bool:
+    """Apply queued changes in order, with the lock held. Returns whether any were consumed."""
+    start = applied = cache.get(APPLIED_KEY)
+    queued = cache.get(QUEUED_KEY, 0)
+    if applied is None or queued < applied:
+        # A counter was evicted; which changes were consumed is unknown.
+        cache.delete(BOARD_KEY)
+        cache.set_many({APPLIED_KEY: queued, DROPPED_KEY: queued}, timeout=None)
+        return True
+    queued = min(queued, applied + DRAIN_BATCH)
+    if queued == applied:
+        return False
+    keys = [pending_key(sequence) for sequence in range(applied + 1, queued + 1)]
+    found = cache.get_many(keys)
+    changes: dict[int, Entry | None] = {}
+    lost = False
+    for key in keys:
+        entry = found.get(key)
+        if entry is None:
+            if not _is_lost(key):
+                # Numbered but not stored yet; its updater applies it once it is.
+                break
+            lost = True
+        else:
+            changes.update(entry)
+        applied += 1
+    if lost:
+        # The board may lack that change; let the next read rebuild it.
+        cache.delete(BOARD_KEY)
+    if lost or (changes and not _apply(changes)):
+        cache.set(DROPPED_KEY, applied, timeout=None)
+    cache.set(APPLIED_KEY, applied, timeout=None)
+    consumed = keys[: applied - start]
+    cache.delete_many([*consumed, *(missing_key(key) for key in consumed)])
+    return applied > start
+
+
+def _is_lost(key: str) -> bool:
+    """Whether the queued change under `key` was missing for longer than an updater can take to store it."""
+    marker = missing_key(key)
+    cache.add(marker, time.time(), timeout=PENDING_TTL)
+    return time.time() - cache.get(marker, time.time()) > LOCK_TIMEOUT
+
+
+def _apply(changes: dict[int, Entry | None]) -> bool:
+    """Apply `changes` to the board, returning False when there is no board left holding them."""
+    board = cache.get(BOARD_KEY)
+    if board is None:
+        return False
+    entries = [existing for existing in board.entries if existing.wallet_id not in changes]
+    # Wallets outside the board rank below its last entry, so a wallet can only be placed above that entry. The
+    # bound is taken before inserting, as the changed wallets may have been anywhere below it.
+    last = entries[-1].rank_key if entries else None
+    for entry in changes.values():
+        if entry is not None and (board.complete or (last is not None and entry.rank_key < last)):
+            bisect.insort(entries, entry, key=lambda existing: existing.rank_key)
+    complete = board.complete
+    if len(entries) > capacity():
+        entries, complete = entries[: capacity()], False
+    if not complete and len(entries) < settings.WALLET_LEADERBOARD_SIZE:
+        cache.delete(BOARD_KEY)
+        return False
+    cache.set(BOARD_KEY, Board(entries=entries, complete=complete), timeout=settings.WALLET_LEADERBOARD_TTL)
+    return True
+
+
+def _acquire_lock() -> bool:
+    return cache.add(LOCK_KEY, True, timeout=LOCK_TIMEOUT)
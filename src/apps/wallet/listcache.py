@@ -0,0 +1,70 @@
+"""
+Result cache for wallet and transaction listings, kept in the Django cache.
+
+Rendered responses are cached under the listing's URL with its query parameters sorted, the negotiated media type
+and a generation token. Listings of one wallet's transactions (`?wallet_id=`) use that wallet's generation; every
+other listing uses the global one. Changes to wallets and postings replace the tokens once they commit, which makes
+the entries cached before unreachable; nothing is deleted, entries simply expire after `WALLET_LIST_CACHE_TTL`
+seconds. A request reads the tokens before querying, and the listings it caches are queried on the primary (replicas
+may lag behind the tokens), so a response built from data older than a committed change is never cached under a
+token issued after it.
+"""
+
+import hashlib
+import uuid
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+GLOBAL_GENERATION_KEY = 'wallet:lists:generation'
+
+
+def is_enabled() -> bool:
+    return settings.WALLET_LIST_CACHE_TTL is not None
+
+
+def wallet_generation_key(wallet_id: int) -> str:
+    return f'{GLOBAL_GENERATION_KEY}:{wallet_id}'
+
+
+def generation(key: str) -> str:
+    token = cache.get(key)
+    if token is None:
+        # Never reuse a token that was evicted: entries cached under it may predate later changes.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        token = cache.get(key)
+    return token
+
+
+def invalidate(wallet_ids: Iterable[int]) -> None:
+    """Start new generations for every listing and for those of `wallet_ids`. Called after a change commits."""
+    token = uuid.uuid4().hex
+    keys = [GLOBAL_GENERATION_KEY, *(wallet_generation_key(wallet_id) for wallet_id in wallet_ids)]
+    cache.set_many(dict.fromkeys(keys, token), timeout=None)
+
+
+def response_key(request: Request, wallet_id: int | None) -> str:
+    """The cache key of the listing requested by `request`, in the current generation."""
+    token = generation(GLOBAL_GENERATION_KEY if wallet_id is None else wallet_generation_key(wallet_id))
+    query = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    # Absolute, because pagination links in the response are.
+    request_id = f'{request.build_absolute_uri(request.path)} {query} {request.accepted_media_type}'
+    return f'wallet:lists:response:{hashlib.sha256(request_id.encode()).hexdigest()}:{token}'
+
+
+def get(key: str) -> HttpResponse | None:
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def store(key: str, response: Response) -> None:
+    """Cache `response` once rendered; meant as its post-render callback."""
+    cache.set(key, (response.content, response['Content-Type']), timeout=settings.WALLET_LIST_CACHE_TTL)
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+
+from apps.wallet import accrual, sharding
+from apps.wallet.models import AccrualCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Post interest (positive rate) or a fee (negative rate) proportional to the balance of every active wallet.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('name', help='Unique name of the accrual, e.g. interest-2026-10; reruns resume it.')
+        parser.add_argument('rate', type=Decimal, help='Fraction of the balance to post, e.g. 0.0025 or -0.001.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Wallet ids per range and transaction.')
+        parser.add_argument(
+            '--workers', type=int, default=1, help='Threads accruing ranges concurrently (not with SQLite).'
+        )
+
+    def handle(self, *args: Any, name: str, rate: Decimal, chunk_size: int, workers: int, **options: Any) -> None:
+        if not Decimal(-1) <= rate <= Decimal(1):
+            raise CommandError('The rate must be between -1 and 1.')
+        if rate != round(rate, 8):
+            raise CommandError('The rate can have at most 8 decimal places.')
+        if AccrualCheckpoint.objects.filter(name=name).exclude(rate=rate).exists():
+            raise CommandError(f'Accrual {name} was started with a different rate.')
+
+        started = time.monotonic()
+        ranges = [r for db in sharding.wallet_databases() for r in accrual.pending_ranges(name, db, chunk_size)]
+        if workers == 1:
+            accrued = [accrual.accrue(name, rate, wallets) for wallets in ranges]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                accrued = list(pool.map(lambda wallets: self.accrue_in_thread(name, rate, wallets), ranges))
+        total = sum(accrued)
+        rate_per_second = total / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f'Accrued {total} wallet(s) in {len(ranges)} range(s) ({rate_per_second:.0f}/s)')
+
+    def accrue_in_thread(self, name: str, rate: Decimal, wallets: accrual.Range) -> int:
+        try:
+            return accrual.accrue(name, rate, wallets)
+        finally:
+            connections.close_all()
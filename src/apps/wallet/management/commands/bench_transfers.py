@@ -0,0 +1,76 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DatabaseError, connections, router
+from rest_framework.serializers import ValidationError
+
+from apps.wallet import transfers
+from apps.wallet.models import OutboxEvent, Wallet
+
+
+class Command(BaseCommand):
+    help = 'Measure transfer throughput between a few hot wallets under concurrent load. Creates and removes its data.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--wallets', type=int, default=10, help='Number of wallets transfers move between.')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument(
+            '--transfers', type=int, default=2000, dest='transfer_count', help='Total number of transfers.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1, help='Transfers posted per database transaction.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark wallets and transactions.')
+
+    def handle(
+        self, *args: Any, wallets: int, threads: int, transfer_count: int, batch_size: int, keep: bool, **options: Any
+    ) -> None:
+        run_id = uuid.uuid4().hex[:12]
+        created = [Wallet.objects.create(label=f'bench-{run_id}-{index}', balance=10**9) for index in range(wallets)]
+        wallet_ids = [wallet.pk for wallet in created]
+        per_thread = transfer_count // threads
+
+        def client(number: int) -> tuple[int, int, int]:
+            rng = random.Random(number)
+            posted = rejected = errors = 0
+            try:
+                for start in range(0, per_thread, batch_size):
+                    size = min(batch_size, per_thread - start)
+                    batch = [
+                        transfers.Transfer(
+                            *rng.sample(wallet_ids, 2), Decimal('0.01'), f'bench-{run_id}-{number}-{start + index}'
+                        )
+                        for index in range(size)
+                    ]
+                    try:
+                        transfers.execute(batch)
+                        posted += size
+                    except ValidationError:
+                        rejected += size
+                    except DatabaseError:
+                        # Deadlocks and lock wait timeouts end up here.
+                        errors += size
+            finally:
+                connections.close_all()
+            return posted, rejected, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(client, range(threads)))
+        elapsed = time.perf_counter() - started
+
+        posted, rejected, errors = (sum(column) for column in zip(*results))
+        self.stdout.write(
+            f'{threads} threads, {wallets} wallets, batch size {batch_size}: '
+            f'{posted} transfers in {elapsed:.2f}s ({posted / elapsed:.0f} transfers/s), '
+            f'{rejected} rejected, {errors} database errors'
+        )
+        if not keep:
+            for wallet in created:
+                # Outbox events only carry the wallet id, so deleting the wallet leaves them behind.
+                db = router.db_for_write(Wallet, instance=wallet)
+                OutboxEvent.objects.using(db).filter(wallet_id=wallet.pk).delete()
+                wallet.delete()
@@ -0,0 +1,109 @@
+import random
+import time
+from decimal import Decimal
+from typing import Any
+
+from django.apps.registry import Apps
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models import Sum
+
+from apps.wallet import fields
+from apps.wallet.fields import AmountField
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DECIMAL and scaled integer amount storage: bulk inserts, indexed range filters and SUM over a '
+        'scratch table created and dropped in the given database.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--rows', type=int, default=200_000, help='Rows inserted.')
+        parser.add_argument('--queries', type=int, default=200, help='Range filters run.')
+        parser.add_argument('--sums', type=int, default=20, help='Full-table sums run.')
+
+    def handle(self, *args: Any, database: str, rows: int, queries: int, sums: int, **options: Any) -> None:
+        generator = random.Random(0)
+        # Amounts of up to +/-1000 with all eight places used, like real postings.
+        amounts = [Decimal(generator.randint(-(10**11), 10**11)).scaleb(-8) for _ in range(rows)]
+        ranges = [sorted(generator.sample(amounts, 2)) for _ in range(queries)]
+        for storage, scaled in (('decimal', False), ('scaled', True)):
+            with fields.storage(scaled):
+                results = self.run(database, storage, amounts, ranges, sums)
+            self.stdout.write(
+                f'{storage}: insert {results["insert"]:.0f} rows/s, range filter {results["filter"]:.1f} ms, '
+                f'sum {results["sum"]:.1f} ms, total {results["total"]}, size {results["size"]}'
+            )
+
+    def run(
+        self, database: str, storage: str, amounts: list[Decimal], ranges: list[list[Decimal]], sums: int
+    ) -> dict[str, Any]:
+        model = scratch_model(storage)
+        rows = model.objects.using(database)
+        with connections[database].schema_editor() as schema_editor:
+            schema_editor.create_model(model)
+        try:
+            started = time.monotonic()
+            rows.bulk_create((model(amount=amount) for amount in amounts), batch_size=1000)
+            inserted = time.monotonic() - started
+
+            started = time.monotonic()
+            for low, high in ranges:
+                # Selective ranges use the index; the count keeps the result set out of the measurement.
+                rows.filter(amount__gte=low, amount__lte=low + (high - low) / 100).count()
+            filtered = time.monotonic() - started
+
+            started = time.monotonic()
+            for _ in range(sums):
+                total = rows.aggregate(total=Sum('amount'))['total']
+            summed = time.monotonic() - started
+            size = relation_size(database, model)
+        finally:
+            with connections[database].schema_editor() as schema_editor:
+                schema_editor.delete_model(model)
+        return {
+            'insert': len(amounts) / inserted,
+            'filter': filtered * 1000 / len(ranges),
+            'sum': summed * 1000 / sums,
+            'total': total,
+            'size': 'n/a' if size is None else f'{size / 2**20:.1f} MiB',
+        }
+
+
+def scratch_model(storage: str) -> type[models.Model]:
+    meta = type(
+        'Meta',
+        (),
+        {
+            'apps': Apps(),
+            'app_label': 'wallet',
+            'db_table': f'wallet_benchmark_{storage}',
+            'indexes': [models.Index(fields=['amount'], name=f'wallet_benchmark_{storage}_idx')],
+        },
+    )
+    return type(
+        f'Benchmark{storage.title()}',
+        (models.Model,),
+        {'__module__': __name__, 'Meta': meta, 'amount': AmountField(max_digits=18, decimal_places=8)},
+    )
+
+
+def relation_size(database: str, model: type[models.Model]) -> int | None:
+    """Bytes taken by the table and its indexes, where the backend reports it."""
+    connection = connections[database]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(table)}')
+            cursor.execute(
+                'SELECT data_length + index_length FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            return None
+        return cursor.fetchone()[0]
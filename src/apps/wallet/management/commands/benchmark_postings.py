@@ -0,0 +1,57 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections, router
+from django.test import override_settings
+
+from apps.wallet import groupcommit
+from apps.wallet.models import OutboxEvent, Transaction, Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure posting throughput on one hot wallet with and without group commit. Creates and removes a wallet '
+        'in the configured database; run it against a scratch database.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent posting threads.')
+        parser.add_argument('--postings', type=int, default=200, help='Postings per thread.')
+        parser.add_argument('--window', type=float, default=0.002, help='Group commit window in seconds.')
+        parser.add_argument('--max-batch', type=int, default=100, help='Largest group commit batch.')
+
+    def handle(self, *args: Any, threads: int, postings: int, window: float, max_batch: int, **options: Any) -> None:
+        for mode, group_window in (('individual', None), ('group commit', window)):
+            with override_settings(WALLET_GROUP_COMMIT_WINDOW=group_window, WALLET_GROUP_COMMIT_MAX_BATCH=max_batch):
+                rate = self.run(threads, postings)
+            self.stdout.write(f'{mode}: {threads * postings} postings by {threads} threads, {rate:.0f} postings/s')
+
+    def run(self, threads: int, postings: int) -> float:
+        wallet = Wallet.objects.create(label='benchmark', balance=Decimal(threads * postings))
+        db = router.db_for_write(Wallet, instance=wallet)
+        try:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for job in [pool.submit(self.post, wallet, db, postings) for _ in range(threads)]:
+                    job.result()
+            elapsed = time.monotonic() - started
+        finally:
+            OutboxEvent.objects.using(db).filter(wallet_id=wallet.pk).delete()
+            Transaction.objects.using(db).filter(wallet_id=wallet.pk).delete()
+            wallet.delete()
+        return threads * postings / elapsed
+
+    def post(self, wallet: Wallet, db: str, count: int) -> None:
+        try:
+            for _ in range(count):
+                posting = Transaction(wallet=wallet, txid=uuid.uuid4().hex, amount=Decimal('-1'))
+                if groupcommit.is_enabled():
+                    groupcommit.submit(posting, db)
+                else:
+                    posting.save()
+        finally:
+            connections.close_all()
@@ -0,0 +1,25 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.wallet import fields, sharding
+from apps.wallet.models import Hold, ScheduledPosting, Transaction, Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrite the balance and amount columns of every wallet database in the storage chosen by '
+        'WALLET_SCALED_AMOUNTS. Run it with the API stopped, right after changing the setting.'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        storage = 'scaled integers' if fields.is_scaled() else 'decimals'
+        for db in sharding.wallet_databases():
+            with connections[db].schema_editor() as schema_editor:
+                converted = fields.convert_amounts(
+                    [Wallet, Transaction, ScheduledPosting, Hold], schema_editor, scaled=fields.is_scaled()
+                )
+            if converted:
+                self.stdout.write(f'{db}: stored {", ".join(converted)} as {storage}.')
+        self.stdout.write(self.style.SUCCESS(f'Amounts are stored as {storage}.'))
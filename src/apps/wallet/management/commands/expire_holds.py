@@ -0,0 +1,34 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from apps.wallet import holds, sharding
+
+
+class Command(BaseCommand):
+    help = 'Release holds that expired before being captured or voided, in batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch-size', type=int, default=1000, help='Holds released per transaction.')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds to wait when nothing expired.')
+        parser.add_argument('--once', action='store_true', help='Exit once no expired hold is left.')
+
+    def handle(self, *args: Any, batch_size: int, interval: float, once: bool, **options: Any) -> None:
+        total = 0
+        while True:
+            released = sum(self.drain(db, batch_size) for db in sharding.wallet_databases())
+            total += released
+            if once:
+                break
+            if not released:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f'Released {total} expired hold(s).'))
+
+    def drain(self, db: str, batch_size: int) -> int:
+        released = 0
+        now = timezone.now()
+        while batch := holds.expire(db, now, batch_size):
+            released += batch
+        return released
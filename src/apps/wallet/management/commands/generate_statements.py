@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import django
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+from django.utils import timezone
+
+from apps.wallet import accrual, sharding, statements
+
+
+class Command(BaseCommand):
+    help = (
+        'Write a CSV statement (opening balance, transactions, closing balance) of every active wallet for a period, '
+        'one file per wallet. Reruns with the same output directory resume where the previous run stopped.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('start', type=date.fromisoformat, help='First day of the period, e.g. 2026-10-01.')
+        parser.add_argument('end', type=date.fromisoformat, help='Day after the period, e.g. 2026-11-01.')
+        parser.add_argument('output', type=Path, help='Directory receiving the statements of this period.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Wallet ids per range.')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating ranges concurrently.')
+
+    def handle(
+        self, *args: Any, start: date, end: date, output: Path, chunk_size: int, workers: int, **options: Any
+    ) -> None:
+        period_start, period_end = midnight(start), midnight(end)
+        if period_start >= period_end:
+            raise CommandError('The period must end after it starts.')
+        if period_end > timezone.now():
+            raise CommandError('The period has not ended yet.')
+        self.check_output(output, start, end)
+
+        started = time.monotonic()
+        ranges = statements.pending_ranges(
+            output, [r for db in sharding.wallet_databases() for r in accrual.id_ranges(db, chunk_size)]
+        )
+        generate = partial(statements.generate, start=period_start, end=period_end, output=output)
+        if workers == 1:
+            written = [generate(wallets) for wallets in ranges]
+        else:
+            # Forked workers must not share the parent's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                written = list(pool.map(generate, ranges))
+        total = sum(written)
+        rate = total / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f'Wrote {total} statement(s) in {len(ranges)} range(s) ({rate:.0f}/s)')
+
+    def check_output(self, output: Path, start: date, end: date) -> None:
+        """Tie `output` to the period, so a rerun resumes the same period rather than mixing two."""
+        period = f'{start.isoformat()} {end.isoformat()}\n'
+        marker = output / '.period'
+        if marker.exists():
+            if marker.read_text() != period:
+                raise CommandError(f'{output} holds the statements of another period ({marker.read_text().strip()}).')
+            return
+        output.mkdir(parents=True, exist_ok=True)
+        marker.write_text(period)
+
+
+def midnight(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
@@ -0,0 +1,39 @@
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections, router
+
+from apps.wallet import fx
+from apps.wallet.models import ExchangeRate, currency_validator
+
+
+class Command(BaseCommand):
+    help = 'Load exchange rates from a JSON file mapping currencies to the value of one unit in a common base currency.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='JSON file, e.g. {"USD": "1", "EUR": "1.08", "JPY": "0.0067"}.')
+
+    def handle(self, *args: Any, path: str, **options: Any) -> None:
+        try:
+            with open(path) as file:
+                data = json.load(file, parse_float=Decimal)
+            rates = [ExchangeRate(currency=currency, rate=Decimal(rate)) for currency, rate in data.items()]
+            for rate in rates:
+                currency_validator(rate.currency)
+                if rate.rate <= 0:
+                    raise CommandError(f'The rate of {rate.currency} must be positive.')
+        except (OSError, ValueError, TypeError, AttributeError, InvalidOperation, ValidationError) as error:
+            raise CommandError(f'Cannot load {path}: {error}') from error
+
+        db = router.db_for_write(ExchangeRate)
+        # MySQL upserts on any unique key (here the primary key) and rejects a conflict target.
+        unique_fields = ['currency'] if connections[db].features.supports_update_conflicts_with_target else None
+        ExchangeRate.objects.using(db).bulk_create(
+            rates, update_conflicts=True, unique_fields=unique_fields, update_fields=['rate', 'updated_at']
+        )
+        # Other processes pick the rates up when their cached copy expires.
+        fx.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(rates)} rate(s).'))
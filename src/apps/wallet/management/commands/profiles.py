@@ -0,0 +1,39 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.wallet import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'List the stored request profiles, or print the stacks of one in collapsed format for flamegraph tools '
+        '(e.g. `./manage.py profiles 12 | flamegraph.pl > profile.svg`).'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('report_id', nargs='?', type=int, help='Print the stacks of this profile.')
+        parser.add_argument('--sql', action='store_true', help='Print the SQL statements of the profile instead.')
+        parser.add_argument('--token', action='store_true', help=f'Print a value for the {profiling.HEADER} header.')
+
+    def handle(self, *args: Any, report_id: int | None, sql: bool, token: bool, **options: Any) -> None:
+        if token:
+            self.stdout.write(profiling.make_token())
+            return
+        if report_id is None:
+            for entry in profiling.reports():
+                self.stdout.write(
+                    f'{entry["id"]:>6} {entry["created_at"]} {entry["duration_ms"]:>10.1f} ms '
+                    f'{entry["query_count"]:>4} queries ({entry["query_ms"]:.1f} ms) {entry["status"]} '
+                    f'{entry["method"]} {entry["path"]} [{entry["reason"]}]'
+                )
+            return
+
+        entry = profiling.get(report_id)
+        if entry is None:
+            raise CommandError(f'Profile {report_id} is not in the buffer.')
+        if sql:
+            for query in sorted(entry['queries'], key=lambda query: query['duration_ms'], reverse=True):
+                self.stdout.write(f'{query["duration_ms"]:>10.3f} ms {query["database"]}: {query["sql"]}')
+            return
+        self.stdout.write(profiling.collapsed(entry), ending='')
@@ -0,0 +1,51 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.wallet import sharding
+from apps.wallet.models import Transaction, TxidLookup, Wallet
+
+
+class Command(BaseCommand):
+    help = 'Remove soft-deleted wallets, deleting their transactions in small batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch-size', type=int, default=1000, help='Transactions deleted per statement.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches.')
+        parser.add_argument('--wallet', type=int, action='append', dest='wallet_ids', help='Only purge these wallets.')
+
+    def handle(self, *args: Any, batch_size: int, sleep: float, wallet_ids: list[int] | None, **options: Any) -> None:
+        purged = 0
+        for db in sharding.wallet_databases():
+            wallets = Wallet.objects.using(db).filter(deleted_at__isnull=False)
+            if wallet_ids:
+                wallets = wallets.filter(pk__in=wallet_ids)
+            for wallet_id in wallets.values_list('pk', flat=True).order_by('pk'):
+                self.purge_wallet(db, wallet_id, batch_size, sleep)
+                purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} wallet(s).'))
+
+    def purge_wallet(self, db: str, wallet_id: int, batch_size: int, sleep: float) -> None:
+        transactions = Transaction.objects.using(db).filter(wallet_id=wallet_id)
+        total = transactions.count()
+        deleted = 0
+        started = time.monotonic()
+        while True:
+            # Every batch is its own short transaction, so locks are held only for `batch_size` rows at a time.
+            batch = list(transactions.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted += Transaction.objects.using(db).filter(pk__in=batch).delete()[0]
+            if sharding.is_enabled():
+                # Sharded transactions take their id from their txid's registration. Released only once the
+                # transactions are gone, so a txid is never reusable while its transaction still exists.
+                TxidLookup.objects.filter(pk__in=batch).delete()
+            rate = deleted / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'Wallet {wallet_id}: deleted {deleted}/{total} transactions ({rate:.0f}/s)')
+            if sleep:
+                time.sleep(sleep)
+        # No transactions are left, so the cascade has nothing to collect. The `post_delete` receivers drop the wallet
+        # from the leaderboard and the cached lists.
+        Wallet.objects.using(db).filter(pk=wallet_id).delete()
+        self.stdout.write(f'Wallet {wallet_id}: removed')
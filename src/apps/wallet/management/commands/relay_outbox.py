@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.wallet import outbox, sharding
+
+
+class Command(BaseCommand):
+    help = 'Publish outbox events to WALLET_OUTBOX_SINK in batches, deleting them once delivered.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.WALLET_OUTBOX_BATCH_SIZE, help='Events sent per batch.'
+        )
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once the outbox is drained.')
+
+    def handle(self, *args: Any, batch_size: int, interval: float, once: bool, **options: Any) -> None:
+        sink = outbox.get_sink()
+        total = 0
+        while True:
+            try:
+                relayed = sum(self.drain(db, sink, batch_size) for db in sharding.wallet_databases())
+            except Exception as error:
+                if once:
+                    raise CommandError(f'Relaying failed, events were kept: {error}') from error
+                # The failed batch was rolled back and is retried with the next pass.
+                self.stderr.write(f'Relaying failed, retrying in {interval}s: {error}')
+                relayed = 0
+            total += relayed
+            if once:
+                break
+            if not relayed:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f'Relayed {total} event(s).'))
+
+    def drain(self, db: str, sink: outbox.Sink, batch_size: int) -> int:
+        relayed = 0
+        lag = timedelta(0)
+        started = time.monotonic()
+        while True:
+            batch = outbox.relay(db, sink, batch_size)
+            if not batch.count:
+                break
+            relayed += batch.count
+            lag = max(lag, batch.lag)
+        if relayed:
+            rate = relayed / max(time.monotonic() - started, 1e-6)
+            backlog = outbox.backlog(db)
+            oldest = f'{backlog.oldest.total_seconds():.1f}s' if backlog.oldest is not None else '-'
+            self.stdout.write(
+                f'{db}: relayed {relayed} event(s) ({rate:.0f}/s), max lag {lag.total_seconds():.1f}s, '
+                f'backlog {backlog.count} (oldest {oldest})'
+            )
+        return relayed
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+from django.utils import timezone
+
+from apps.wallet import scheduler, sharding
+
+
+class Command(BaseCommand):
+    help = 'Post the runs of scheduled postings that are due, in per-wallet batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch-size', type=int, default=1000, help='Schedules locked and applied per batch.')
+        parser.add_argument('--max-runs', type=int, default=100, help='Runs of one schedule caught up per batch.')
+        parser.add_argument('--workers', type=int, default=1, help='Threads applying batches concurrently.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due.')
+
+    def handle(
+        self, *args: Any, batch_size: int, max_runs: int, workers: int, interval: float, once: bool, **options: Any
+    ) -> None:
+        while True:
+            started = time.monotonic()
+            if workers == 1:
+                results = [self.drain(db, batch_size, max_runs) for db in sharding.wallet_databases()]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    jobs = [
+                        pool.submit(self.drain_in_thread, db, batch_size, max_runs)
+                        for db in sharding.wallet_databases()
+                        for _ in range(workers)
+                    ]
+                    results = [job.result() for job in jobs]
+            schedules = sum(result.schedules for result in results)
+            deferred = sum(len(result.deferred) for result in results)
+            if schedules:
+                posted = sum(result.posted for result in results)
+                rejected = sum(result.rejected for result in results)
+                rate = posted / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Applied {schedules} schedule(s): posted {posted} run(s) ({rate:.0f}/s), rejected {rejected}, '
+                    f'deferred {deferred} for lack of funds'
+                )
+            if once:
+                break
+            # Deferred schedules only become payable with other postings, so they do not keep the loop busy.
+            if schedules == deferred:
+                time.sleep(interval)
+
+    def drain(self, db: str, batch_size: int, max_runs: int) -> scheduler.Result:
+        """
+        Apply batches until nothing is due on `db`; workers draining the same database skip each other's rows.
+
+        Schedules deferred for lack of funds are not retried before the next pass.
+        """
+        total = scheduler.Result(schedules=0, posted=0, rejected=0, deferred=())
+        while True:
+            result = scheduler.run_due(db, timezone.now(), batch_size, max_runs, skip=total.deferred)
+            if not result.schedules:
+                return total
+            total = scheduler.Result(*(a + b for a, b in zip(total, result, strict=True)))
+
+    def drain_in_thread(self, db: str, batch_size: int, max_runs: int) -> scheduler.Result:
+        try:
+            return self.drain(db, batch_size, max_runs)
+        finally:
+            connections.close_all()
@@ -0,0 +1,137 @@
+import random
+import sys
+from collections.abc import Callable
+from typing import Any
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+
+from apps.wallet import profiling
+from apps.wallet.routers import use_primary
+
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def get_client_id(request: HttpRequest) -> str:
+    """Identify the calling client: the authenticated user if any, otherwise the remote address."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for replica routing.
+
+    Unsafe requests always run against the primary. After a successful write the client is pinned to the primary for
+    `settings.REPLICA_PIN_SECONDS`, so its follow-up reads do not observe replica lag. The pin lives in the Django cache
+    and is therefore shared between workers when a shared cache backend is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        pin_key = self.pin_key(request)
+        is_write = request.method not in SAFE_METHODS
+        if not is_write and not cache.get(pin_key):
+            return self.get_response(request)
+
+        with use_primary():
+            response = self.get_response(request)
+        if is_write and response.status_code < 400:
+            cache.set(pin_key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        pin_key = self.pin_key(request)
+        is_write = request.method not in SAFE_METHODS
+        if not is_write and not await cache.aget(pin_key):
+            return await self.get_response(request)
+
+        # The pin is a context variable, so the database work the view hands to threads sees it too.
+        with use_primary():
+            response = await self.get_response(request)
+        if is_write and response.status_code < 400:
+            await cache.aset(pin_key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def pin_key(request: HttpRequest) -> str:
+        return f'wallet:replica-pin:{get_client_id(request)}'
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests asking for it with a signed `X-Wallet-Profile` header and a sampled share of the others.
+
+    Requested profiles are always stored; sampled ones only when slower than `settings.WALLET_PROFILE_SLOW_SECONDS`.
+    See `apps.wallet.profiling`. Put it first, so the time spent in the other middleware is included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        requested = self.is_requested(request)
+        if not requested and random.random() >= settings.WALLET_PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        return self.profile(request, self.get_response, requested)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        requested = self.is_requested(request)
+        if not requested and random.random() >= settings.WALLET_PROFILE_SAMPLE_RATE:
+            return await self.get_response(request)
+        # Stacks are sampled from one thread, so a profiled request runs the rest of the chain on one, the way Django
+        # runs sync-only middleware; sync views then run on that thread as well.
+        return await sync_to_async(self.profile)(request, async_to_sync(self.get_response), requested)
+
+    @staticmethod
+    def is_requested(request: HttpRequest) -> bool:
+        token = request.headers.get(profiling.HEADER)
+        return token is not None and profiling.is_valid_token(token)
+
+    def profile(
+        self, request: HttpRequest, get_response: Callable[[HttpRequest], HttpResponse], requested: bool
+    ) -> HttpResponse:
+        with profiling.profile(sys._getframe()) as result:
+            response = get_response(request)
+        if requested or result.duration >= settings.WALLET_PROFILE_SLOW_SECONDS:
+            report_id = profiling.store(
+                profiling.report(
+                    result,
+                    method=request.method,
+                    path=request.get_full_path(),
+                    status=response.status_code,
+                    reason='requested' if requested else 'sampled',
+                )
+            )
+            if requested:
+                response[profiling.HEADER] = str(report_id)
+        return response
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0006_alter_transaction_amount_alter_transaction_txid_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TxidLookup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('txid', models.CharField(max_length=64, unique=True)),
+                ('wallet_id', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WalletSequence',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
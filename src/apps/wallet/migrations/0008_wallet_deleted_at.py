@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0007_txidlookup_walletsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='deleted_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='Soft deletion time; the wallet and its transactions await `purge_wallets`',
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='wallet',
+            index=models.Index(fields=['deleted_at'], name='wallet_wall_deleted_814ce1_idx'),
+        ),
+    ]
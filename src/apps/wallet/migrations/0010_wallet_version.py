@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0009_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Incremented by every change to the wallet'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0010_wallet_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledPosting',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    'amount',
+                    models.DecimalField(
+                        decimal_places=8, help_text='Amount posted on every run, negative for fees', max_digits=18
+                    ),
+                ),
+                ('interval', models.DurationField(blank=True, null=True)),
+                ('next_run_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                (
+                    'wallet',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='wallet.wallet'
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_run_at'], name='wallet_sche_next_ru_052759_idx')],
+            },
+        ),
+    ]
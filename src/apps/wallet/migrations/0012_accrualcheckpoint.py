@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0011_scheduledposting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccrualCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=12)),
+                ('database', models.CharField(max_length=64)),
+                ('start_id', models.IntegerField()),
+                ('end_id', models.IntegerField()),
+                ('accrued', models.IntegerField(help_text='Wallets posted to in the range')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'database'], name='wallet_accr_name_ca79f2_idx')],
+            },
+        ),
+    ]
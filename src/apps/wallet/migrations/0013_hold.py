@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0012_accrualcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='held',
+            field=models.DecimalField(
+                decimal_places=8, default=0, help_text='Total of the active holds, part of the balance', max_digits=30
+            ),
+        ),
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                (
+                    'txid',
+                    models.CharField(help_text='Txid of the transaction posted on capture', max_length=64, unique=True),
+                ),
+                ('amount', models.DecimalField(decimal_places=8, help_text='Amount reserved, positive', max_digits=18)),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('active', 'Active'),
+                            ('captured', 'Captured'),
+                            ('voided', 'Voided'),
+                            ('expired', 'Expired'),
+                        ],
+                        default='active',
+                        max_length=16,
+                    ),
+                ),
+                (
+                    'expires_at',
+                    models.DateTimeField(help_text='Released by `./manage.py expire_holds` if still active by then'),
+                ),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                (
+                    'wallet',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='wallet.wallet'
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='wallet_hold_status_a10058_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0013_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                (
+                    'currency',
+                    models.CharField(
+                        max_length=3,
+                        primary_key=True,
+                        serialize=False,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                '^[A-Z]{3}$', 'Enter an ISO 4217 currency code, e.g. USD.'
+                            )
+                        ],
+                    ),
+                ),
+                ('rate', models.DecimalField(decimal_places=12, max_digits=24)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='currency',
+            field=models.CharField(
+                default='USD',
+                help_text='ISO 4217 code of the balance and of all transactions of the wallet; cannot be changed',
+                max_length=3,
+                validators=[
+                    django.core.validators.RegexValidator('^[A-Z]{3}$', 'Enter an ISO 4217 currency code, e.g. USD.')
+                ],
+            ),
+        ),
+    ]
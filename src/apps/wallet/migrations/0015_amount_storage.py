@@ -0,0 +1,72 @@
+# Generated by Django 5.0.7 on 2026-10-19 15:16
+
+from django.db import migrations
+
+from apps.wallet import fields
+
+
+def store_as_configured(apps, schema_editor):
+    # The columns are DECIMAL so far; with WALLET_SCALED_AMOUNTS their values are rewritten in 1e-8 units.
+    models = [apps.get_model('wallet', name) for name in fields.AMOUNT_FIELDS]
+    fields.convert_amounts(models, schema_editor, scaled=fields.is_scaled())
+
+
+def store_as_decimal(apps, schema_editor):
+    models = [apps.get_model('wallet', name) for name in fields.AMOUNT_FIELDS]
+    fields.convert_amounts(models, schema_editor, scaled=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0014_currency'),
+    ]
+
+    operations = [
+        # The columns keep their type until the conversion, which needs the models with `AmountField`s.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='hold',
+                    name='amount',
+                    field=fields.AmountField(decimal_places=8, help_text='Amount reserved, positive', max_digits=18),
+                ),
+                migrations.AlterField(
+                    model_name='scheduledposting',
+                    name='amount',
+                    field=fields.AmountField(
+                        decimal_places=8, help_text='Amount posted on every run, negative for fees', max_digits=18
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name='transaction',
+                    name='amount',
+                    field=fields.AmountField(
+                        decimal_places=8, help_text='Transaction amount, can be negative', max_digits=18
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name='wallet',
+                    name='balance',
+                    field=fields.AmountField(
+                        decimal_places=8,
+                        help_text=(
+                            'Wallet balance, cannot be negative. '
+                            'Can accommodate up to a 10^12 transactions of maximum amount'
+                        ),
+                        max_digits=30,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name='wallet',
+                    name='held',
+                    field=fields.AmountField(
+                        decimal_places=8,
+                        default=0,
+                        help_text='Total of the active holds, part of the balance',
+                        max_digits=30,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(store_as_configured, store_as_decimal),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('wallet', '0015_amount_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='created_at',
+            field=models.DateTimeField(
+                auto_now_add=True, help_text='Creation time; NULL for wallets created before it was recorded', null=True
+            ),
+        ),
+    ]
@@ -1,48 +1,231 @@
+import hashlib
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime
 from decimal import Decimal
 from typing import Any
 
-from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import RegexValidator
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_save
 from rest_framework.serializers import ValidationError
 
+from apps.wallet import sharding
+from apps.wallet.fields import AmountField
+from apps.wallet.signals import transactions_posted
+
+
+# Txids looked up per query.
+TXID_CHUNK_SIZE = 500
+
+currency_validator = RegexValidator(r'^[A-Z]{3}$', 'Enter an ISO 4217 currency code, e.g. USD.')
+
+
+class WalletQuerySet(QuerySet):
+    def active(self) -> 'WalletQuerySet':
+        return self.filter(deleted_at__isnull=True)
+
 
 class Wallet(models.Model):
     id = models.AutoField(primary_key=True)
     label = models.CharField(max_length=128, blank=False, null=False)
-    balance = models.DecimalField(
+    currency = models.CharField(
+        max_length=3,
+        default='USD',
+        validators=[currency_validator],
+        help_text='ISO 4217 code of the balance and of all transactions of the wallet; cannot be changed',
+    )
+    balance = AmountField(
         max_digits=30,
         decimal_places=8,
         blank=False,
         null=False,
         help_text='Wallet balance, cannot be negative. Can accommodate up to a 10^12 transactions of maximum amount',
     )
+    deleted_at = models.DateTimeField(
+        blank=True, null=True, help_text='Soft deletion time; the wallet and its transactions await `purge_wallets`'
+    )
+    held = AmountField(
+        max_digits=30, decimal_places=8, default=0, help_text='Total of the active holds, part of the balance'
+    )
+    version = models.PositiveBigIntegerField(default=0, help_text='Incremented by every change to the wallet')
+    created_at = models.DateTimeField(
+        auto_now_add=True, null=True, help_text='Creation time; NULL for wallets created before it was recorded'
+    )
+
+    objects = WalletQuerySet.as_manager()
+
+    @property
+    def available(self) -> Decimal:
+        """The part of the balance not reserved by holds, which postings and new holds may spend."""
+        return self.balance - self.held
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if sharding.is_enabled():
+            if self.pk is None:
+                self.pk = WalletSequence.objects.create().pk
+                kwargs['force_insert'] = True
+            kwargs['using'] = sharding.shard_for_wallet(self.pk)
+        super().save(*args, **kwargs)
+
+    def apply_changes(self, changes: dict[str, Any], expected_version: int | None = None) -> bool:
+        """
+        Store `changes` and increment the version with a single UPDATE of just those columns.
+
+        With `expected_version` the update only happens if the stored version still matches (compare-and-swap), and
+        False is returned when it does not. Nothing is locked beyond the statement itself.
+        """
+        db = router.db_for_write(Wallet, instance=self)
+        wallets = Wallet.objects.using(db).active().filter(pk=self.pk)
+        if expected_version is not None:
+            wallets = wallets.filter(version=expected_version)
+        if not wallets.update(**changes, version=F('version') + 1):
+            return False
+        for name, value in changes.items():
+            setattr(self, name, value)
+        # Postings may have moved the balance and bumped the version since this instance was read, and receivers
+        # (the leaderboard) record the balance they are sent.
+        self.balance, self.held, version = (
+            Wallet.objects.using(db).filter(pk=self.pk).values_list('balance', 'held', 'version').get()
+        )
+        self.version = expected_version + 1 if expected_version is not None else version
+        # Sent as `save(update_fields=...)` would, so receivers see label changes.
+        post_save.send(
+            sender=Wallet, instance=self, created=False, update_fields=frozenset(changes), raw=False, using=db
+        )
+        return True
 
     class Meta:
         indexes = [
             models.Index(fields=['balance']),
+            models.Index(fields=['deleted_at']),
         ]
 
 
+class TransactionQuerySet(QuerySet):
+    def post(self, wallet: Wallet, transactions: Sequence['Transaction']) -> None:
+        """
+        Apply `transactions` to `wallet` in order and store them with a single balance update.
+
+        The wallet must be locked (`select_for_update`) inside an atomic block on its database. Every transaction is
+        checked against the running balance, so one overdrawing the wallet fails the whole call.
+        """
+        self.post_many([(wallet, transactions)])
+
+    def post_many(self, postings: Sequence[tuple[Wallet, Sequence['Transaction']]]) -> None:
+        """
+        Like `post` for several wallets on the same database, with one statement per table for all of them.
+
+        Either every wallet's transactions are stored or, if any of them is rejected, none are.
+        """
+        for wallet, transactions in postings:
+            wallet.balance = self.balance_after(wallet, transactions)
+            for posting in transactions:
+                posting.wallet = wallet
+            # The wallet is locked, so incrementing in Python is safe.
+            wallet.version += 1
+
+        wallets = [wallet for wallet, _ in postings]
+        db = wallets[0]._state.db
+        if len(wallets) == 1:
+            Wallet.objects.using(db).filter(pk=wallets[0].pk).update(
+                balance=wallets[0].balance, version=wallets[0].version
+            )
+        else:
+            Wallet.objects.using(db).bulk_update(wallets, ['balance', 'version'])
+
+        self.store(postings)
+
+    def store(self, postings: Sequence[tuple[Wallet, Sequence['Transaction']]]) -> None:
+        """
+        Insert the transactions of `postings`, whose wallet balances are already stored, and send `transactions_posted`.
+
+        For callers updating the balances themselves, e.g. set-based; everyone else goes through `post_many`.
+        """
+        db = postings[0][0]._state.db
+        rows = [posting for _, transactions in postings for posting in transactions]
+        if len(rows) == 1:
+            # `save_base` stores the row without going through `Transaction.save` again.
+            rows[0].save_base(using=db, force_insert=True)
+        else:
+            self.using(db).bulk_create(rows)
+            if any(posting.pk is None for posting in rows):
+                # Backends without RETURNING for bulk inserts (MySQL) leave the ids unset.
+                ids = {}
+                txids = [posting.txid for posting in rows]
+                for start in range(0, len(txids), TXID_CHUNK_SIZE):
+                    chunk = txids[start : start + TXID_CHUNK_SIZE]
+                    ids.update(self.using(db).filter(txid__in=chunk).values_list('txid', 'pk'))
+                for posting in rows:
+                    posting.pk = ids[posting.txid]
+        transactions_posted.send(sender=self.model, postings=postings)
+
+    def existing_txids(self, txids: Sequence[str]) -> set[str]:
+        """The subset of `txids` already posted, looked up globally when sharded."""
+        queryset = TxidLookup.objects.all() if sharding.is_enabled() else self
+        existing = set()
+        for start in range(0, len(txids), TXID_CHUNK_SIZE):
+            chunk = txids[start : start + TXID_CHUNK_SIZE]
+            existing.update(queryset.filter(txid__in=chunk).values_list('txid', flat=True))
+        return existing
+
+    def balance_after(self, wallet: Wallet, transactions: Sequence['Transaction']) -> Decimal:
+        """The balance of `wallet` after `transactions`, raising `ValidationError` if they cannot be posted to it."""
+        if wallet.deleted_at is not None:
+            raise ValidationError('Wallet is deleted.')
+        balance = wallet.balance
+        for posting in transactions:
+            balance += Decimal(posting.amount)
+            # Funds reserved by holds cannot be spent by postings.
+            if balance < wallet.held:
+                raise ValidationError('Amount exceeds wallet balance.')
+        return balance
+
+
 class Transaction(models.Model):
     id = models.AutoField(primary_key=True)
     wallet = models.ForeignKey(Wallet, related_name='transactions', on_delete=models.CASCADE)
     txid = models.CharField(
         max_length=64, unique=True, blank=False, null=False, help_text='Unique transaction ID (usually sha256 hash)'
     )
-    amount = models.DecimalField(
+    amount = AmountField(
         max_digits=18, decimal_places=8, blank=False, null=False, help_text='Transaction amount, can be negative'
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     def save(self, *args: Any, **kwargs: Any) -> None:
-        with transaction.atomic():
-            # Refresh the wallet from the database to ensure we have the latest balance.
-            self.wallet.refresh_from_db()
-            new_balance = self.wallet.balance + Decimal(self.amount)
-            if new_balance < 0:
-                raise ValidationError('Amount exceeds wallet balance.')
-            self.wallet.balance = new_balance
-            self.wallet.save()
+        if not self._state.adding:
             super().save(*args, **kwargs)
+            return
+
+        # The wallet may have been loaded from a replica; the balance must always come from the primary.
+        db = router.db_for_write(Wallet, instance=self.wallet)
+        with self.reserve_id(), transaction.atomic(using=db):
+            wallet = Wallet.objects.using(db).select_for_update().get(pk=self.wallet_id)
+            Transaction.objects.post(wallet, [self])
+
+    @contextmanager
+    def reserve_id(self) -> Iterator[None]:
+        """
+        Reserve the txid and a global transaction id in `TxidLookup` while posting a sharded transaction.
+
+        The reservation is released if the posting fails. Does nothing when sharding is disabled.
+        """
+        if not sharding.is_enabled() or self.pk is not None:
+            yield
+            return
+        lookup = TxidLookup.register(txid=self.txid, wallet_id=self.wallet_id)
+        self.pk = lookup.pk
+        try:
+            yield
+        except BaseException:
+            lookup.delete()
+            self.pk = None
+            raise
 
     class Meta:
         indexes = [
@@ -50,3 +233,144 @@ class Transaction(models.Model):
             models.Index(fields=['wallet']),
             models.Index(fields=['created_at']),
         ]
+
+
+class ScheduledPosting(models.Model):
+    """
+    A posting to apply to a wallet at `next_run_at`, then every `interval` (once when `interval` is null).
+
+    Applied by `./manage.py run_schedules`. `next_run_at` is cleared once a one-off posting has run.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    wallet = models.ForeignKey(Wallet, related_name='schedules', on_delete=models.CASCADE)
+    amount = AmountField(max_digits=18, decimal_places=8, help_text='Amount posted on every run, negative for fees')
+    interval = models.DurationField(blank=True, null=True)
+    next_run_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def txid(self, run_at: datetime) -> str:
+        """The txid of the run due at `run_at`; repeating a run always produces the same txid."""
+        return hashlib.sha256(f'schedule:{self.wallet_id}:{self.pk}:{run_at.isoformat()}'.encode()).hexdigest()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_run_at']),
+        ]
+
+
+class Hold(models.Model):
+    """
+    Funds of a wallet reserved until they are captured as a transaction, voided or expire.
+
+    The amounts of active holds are summed in `Wallet.held`. See `apps.wallet.holds`.
+    """
+
+    ACTIVE = 'active'
+    CAPTURED = 'captured'
+    VOIDED = 'voided'
+    EXPIRED = 'expired'
+    STATUSES = [(ACTIVE, 'Active'), (CAPTURED, 'Captured'), (VOIDED, 'Voided'), (EXPIRED, 'Expired')]
+
+    id = models.AutoField(primary_key=True)
+    wallet = models.ForeignKey(Wallet, related_name='holds', on_delete=models.CASCADE)
+    txid = models.CharField(max_length=64, unique=True, help_text='Txid of the transaction posted on capture')
+    amount = AmountField(max_digits=18, decimal_places=8, help_text='Amount reserved, positive')
+    status = models.CharField(max_length=16, choices=STATUSES, default=ACTIVE)
+    expires_at = models.DateTimeField(help_text='Released by `./manage.py expire_holds` if still active by then')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+
+class AccrualCheckpoint(models.Model):
+    """
+    A range of wallet ids (`start_id` inclusive, `end_id` exclusive) on one database that `./manage.py accrue` has
+    finished for the accrual `name`. Lives in `default`; reruns of the accrual skip the ranges recorded here.
+    """
+
+    name = models.CharField(max_length=64)
+    rate = models.DecimalField(max_digits=12, decimal_places=8)
+    database = models.CharField(max_length=64)
+    start_id = models.IntegerField()
+    end_id = models.IntegerField()
+    accrued = models.IntegerField(help_text='Wallets posted to in the range')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'database']),
+        ]
+
+
+class ExchangeRate(models.Model):
+    """
+    The value of one unit of `currency` in a common base currency (any, as long as all rates use the same one).
+
+    Lives in `default`. Loaded with `./manage.py load_rates` and read through the cache in `apps.wallet.fx`.
+    """
+
+    currency = models.CharField(max_length=3, primary_key=True, validators=[currency_validator])
+    rate = models.DecimalField(max_digits=24, decimal_places=12)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class OutboxEvent(models.Model):
+    """
+    An event waiting to be published by `./manage.py relay_outbox`.
+
+    Events are written in the same atomic block as the change they describe, on the same database, so an event
+    exists if and only if that change committed. The relay deletes them once the sink has accepted them.
+    """
+
+    TRANSACTION_POSTED = 'transaction.posted'
+
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=64)
+    wallet_id = models.IntegerField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def transaction_posted(cls, posting: Transaction) -> 'OutboxEvent':
+        return cls(
+            topic=cls.TRANSACTION_POSTED,
+            wallet_id=posting.wallet_id,
+            payload={
+                'id': posting.pk,
+                'wallet': posting.wallet_id,
+                'txid': posting.txid,
+                'amount': posting.amount,
+                'created_at': posting.created_at,
+            },
+        )
+
+
+class WalletSequence(models.Model):
+    """Allocates wallet ids when wallets are sharded, so ids stay unique across shards. Lives in `default`."""
+
+    id = models.AutoField(primary_key=True)
+
+
+class TxidLookup(models.Model):
+    """
+    Global txid registry for sharded transactions. Lives in `default`.
+
+    Its primary key is used as the transaction id, which keeps transaction ids unique across shards and lets a
+    transaction be found by id without asking every shard.
+    """
+
+    id = models.AutoField(primary_key=True)
+    txid = models.CharField(max_length=64, unique=True)
+    wallet_id = models.IntegerField()
+
+    @classmethod
+    def register(cls, txid: str, wallet_id: int) -> 'TxidLookup':
+        try:
+            with transaction.atomic(using=router.db_for_write(cls)):
+                return cls.objects.create(txid=txid, wallet_id=wallet_id)
+        except IntegrityError:
+            raise ValidationError('transaction with this txid already exists.') from None
@@ -0,0 +1,89 @@
+"""
+Publishing of `OutboxEvent`s to an external sink.
+
+Delivery is at-least-once: a batch is deleted only after the sink accepted it, in the same transaction that locked
+it, so a crash between the two re-sends the batch. Consumers should deduplicate, e.g. by the transaction `txid`.
+"""
+
+import json
+import os
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.wallet.models import OutboxEvent
+
+
+class Sink(ABC):
+    @abstractmethod
+    def send(self, events: Sequence[OutboxEvent]) -> None:
+        """Deliver `events` in order, raising if any of them may not have been delivered."""
+
+
+class FileSink(Sink):
+    """Appends events as JSON lines to `settings.WALLET_OUTBOX_FILE`."""
+
+    def send(self, events: Sequence[OutboxEvent]) -> None:
+        lines = ''.join(json.dumps(message(event), cls=DjangoJSONEncoder) + '\n' for event in events)
+        with open(settings.WALLET_OUTBOX_FILE, 'a') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class HttpSink(Sink):
+    """POSTs each batch as `{"events": [...]}` to `settings.WALLET_OUTBOX_URL`; any non-2xx response fails it."""
+
+    def send(self, events: Sequence[OutboxEvent]) -> None:
+        body = json.dumps({'events': [message(event) for event in events]}, cls=DjangoJSONEncoder).encode()
+        request = urllib.request.Request(
+            settings.WALLET_OUTBOX_URL, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=settings.WALLET_OUTBOX_HTTP_TIMEOUT):
+            pass
+
+
+class Relayed(NamedTuple):
+    count: int
+    # Age of the oldest relayed event when it was deleted, i.e. the worst end-to-end delay of the batch.
+    lag: timedelta | None
+
+
+class Backlog(NamedTuple):
+    count: int
+    oldest: timedelta | None
+
+
+def get_sink() -> Sink:
+    return import_string(settings.WALLET_OUTBOX_SINK)()
+
+
+def message(event: OutboxEvent) -> dict[str, Any]:
+    return {'topic': event.topic, 'created_at': event.created_at, 'payload': event.payload}
+
+
+def relay(db: str, sink: Sink, batch_size: int) -> Relayed:
+    """Send the oldest `batch_size` events of `db` to `sink` and delete them."""
+    with transaction.atomic(using=db):
+        # Concurrent relays skip each other's batches instead of waiting for them (ignored by SQLite), so batches may
+        # reach the sink out of order; only a single relay keeps the order across them.
+        events = list(OutboxEvent.objects.using(db).select_for_update(skip_locked=True).order_by('pk')[:batch_size])
+        if not events:
+            return Relayed(count=0, lag=None)
+        sink.send(events)
+        OutboxEvent.objects.using(db).filter(pk__in=[event.pk for event in events]).delete()
+    return Relayed(count=len(events), lag=timezone.now() - events[0].created_at)
+
+
+def backlog(db: str) -> Backlog:
+    events = OutboxEvent.objects.using(db)
+    oldest = events.order_by('pk').values_list('created_at', flat=True).first()
+    return Backlog(count=events.count(), oldest=timezone.now() - oldest if oldest else None)
@@ -1,5 +1,26 @@
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_json_api.pagination import JsonApiPageNumberPagination
 
+from apps.wallet import sharding
+
 
 class WalletPagination(JsonApiPageNumberPagination):
     page_query_param = 'page'
@@ -11,3 +32,130 @@ class TransactionPagination(JsonApiPageNumberPagination):
     page_query_param = 'page'
     page_size_query_param = 'page_size'
     max_page_size = 1000
+
+
+class ShardedKeysetPagination(BasePagination):
+    """
+    Keyset pagination over every wallet shard.
+
+    Each shard returns at most one page past the cursor in the requested order (one ordering field, then `pk`), and
+    the shard pages are merged, so no shard is ever asked for a COUNT or an OFFSET.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> list[Any]:
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = queryset.query.order_by[0] if queryset.query.order_by else 'pk'
+        self.descending = ordering.startswith('-')
+        self.field_name = ordering.lstrip('-')
+        self.field = (
+            queryset.model._meta.pk if self.field_name == 'pk' else queryset.model._meta.get_field(self.field_name)
+        )
+
+        queryset = queryset.order_by(ordering, '-pk' if self.descending else 'pk')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}': value}) | Q(**{self.field_name: value, f'pk__{lookup}': pk})
+            )
+
+        databases = view.get_list_databases() if view is not None else sharding.wallet_databases()
+        pages = [list(queryset.using(db)[: page_size + 1]) for db in databases]
+        merged = list(islice(heapq.merge(*pages, key=self.sort_key, reverse=self.descending), page_size + 1))
+        self.has_next = len(merged) > page_size
+        self.page = merged[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response(
+            {
+                'results': data,
+                'meta': {'pagination': {'page_size': len(self.page)}},
+                'links': {
+                    'next': self.get_next_link(),
+                    'prev': None,
+                },
+            }
+        )
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        value, pk = self.sort_key(self.page[-1])
+        value = value.isoformat() if isinstance(value, datetime) else str(value)
+        cursor = urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request: Request) -> tuple[Any, int] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            value, pk = json.loads(urlsafe_b64decode(encoded.encode()))
+            return self.field.to_python(value), int(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound('Invalid cursor.') from None
+
+    def sort_key(self, obj: Any) -> tuple[Any, int]:
+        return getattr(obj, self.field.attname), obj.pk
+
+
+class WalletKeysetPagination(ShardedKeysetPagination):
+    max_page_size = 100
+
+
+class TransactionKeysetPagination(ShardedKeysetPagination):
+    max_page_size = 1000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never counts a whole large table.
+
+    Unfiltered tables report the row estimate kept by the database: `TABLE_ROWS` of `information_schema.TABLES` on
+    MySQL (refreshed every `information_schema_stats_expiry` seconds) and the planner's `pg_class.reltuples` on
+    PostgreSQL. Anything else is counted up to `WALLET_ADMIN_COUNT_LIMIT` rows, and a larger result is reported as
+    that many, so pages past the limit are reached by filtering rather than by page number.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        limit = settings.WALLET_ADMIN_COUNT_LIMIT
+        estimate = self.estimate()
+        if estimate is not None and estimate > limit:
+            return estimate
+        return self.object_list[:limit].count()
+
+    def estimate(self) -> int | None:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if queryset.query.where:
+            return None
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'mysql':
+            sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+            params = [table]
+        elif connection.vendor == 'postgresql':
+            sql = 'SELECT reltuples FROM pg_class WHERE oid = %s::regclass'
+            params = [connection.ops.quote_name(table)]
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        # NULL on MySQL and negative on PostgreSQL until the table's statistics are first gathered.
+        return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
@@ -0,0 +1,175 @@
+"""
+On-demand profiling of API requests, driven by `apps.wallet.middleware.ProfilingMiddleware`.
+
+A profiled request is sampled by a background thread that records the stack of the request's thread every
+`WALLET_PROFILE_INTERVAL` seconds, while every SQL statement it issues is timed. Requests carrying a valid signed
+`X-Wallet-Profile` header are always profiled and reported; a `WALLET_PROFILE_SAMPLE_RATE` share of the others is
+profiled and reported only when slower than `WALLET_PROFILE_SLOW_SECONDS`.
+
+Reports go to a ring buffer of `WALLET_PROFILE_BUFFER_SIZE` slots in the Django cache, so every worker's reports are
+visible to `/api/v1/profiles/` and `./manage.py profiles` when the cache is shared. Stacks are kept collapsed
+(`outer;inner count`), the input format of flamegraph tools.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from types import FrameType
+from typing import Any
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+
+HEADER = 'X-Wallet-Profile'
+SIGNING_SALT = 'apps.wallet.profiling'
+SEQUENCE_KEY = 'wallet:profiles:sequence'
+# Statements kept per report; the count and total time cover all of them.
+MAX_QUERIES = 200
+
+
+def make_token() -> str:
+    """A value for the `X-Wallet-Profile` header, valid for `WALLET_PROFILE_TOKEN_MAX_AGE` seconds."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign('profile')
+
+
+def is_valid_token(token: str) -> bool:
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=settings.WALLET_PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def frame_name(frame: FrameType) -> str:
+    return f'{frame.f_globals.get("__name__", "?")}.{frame.f_code.co_qualname}'
+
+
+class StackSampler:
+    """Counts the collapsed stacks of one thread, below `root`, sampled from a background thread."""
+
+    def __init__(self, thread_id: int, root: FrameType, interval: float) -> None:
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='wallet-profile-sampler', daemon=True)
+
+    def __enter__(self) -> 'StackSampler':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame is not self.root:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+
+class QueryRecorder:
+    """An `execute_wrapper` timing every statement run on the connections it is installed on."""
+
+    def __init__(self) -> None:
+        self.queries: list[dict[str, Any]] = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append(
+                    {
+                        'database': context['connection'].alias,
+                        'sql': sql,
+                        'duration_ms': round(elapsed * 1000, 3),
+                    }
+                )
+
+
+class Profile:
+    def __init__(self, root: FrameType) -> None:
+        self.sampler = StackSampler(threading.get_ident(), root, settings.WALLET_PROFILE_INTERVAL)
+        self.recorder = QueryRecorder()
+        self.duration = 0.0
+
+
+@contextmanager
+def profile(root: FrameType) -> Iterator[Profile]:
+    """Profile the current thread below `root` (usually the caller's frame) for the duration of the block."""
+    result = Profile(root)
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(result.recorder))
+        stack.enter_context(result.sampler)
+        try:
+            yield result
+        finally:
+            result.duration = time.perf_counter() - started
+
+
+def report(result: Profile, **request: Any) -> dict[str, Any]:
+    """The stored form of `result`, with the details of the request (method, path, status, ...) added."""
+    return {
+        **request,
+        'created_at': timezone.now().isoformat(),
+        'duration_ms': round(result.duration * 1000, 3),
+        'samples': sum(result.sampler.stacks.values()),
+        'stacks': dict(result.sampler.stacks.most_common()),
+        'query_count': result.recorder.count,
+        'query_ms': round(result.recorder.total * 1000, 3),
+        'queries': result.recorder.queries,
+    }
+
+
+def slot_key(report_id: int) -> str:
+    return f'wallet:profiles:{report_id % settings.WALLET_PROFILE_BUFFER_SIZE}'
+
+
+def store(entry: dict[str, Any]) -> int:
+    """Add `entry` to the ring buffer, overwriting the oldest report once it is full, and return its id."""
+    try:
+        report_id = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        report_id = cache.incr(SEQUENCE_KEY)
+    cache.set(slot_key(report_id), {**entry, 'id': report_id}, timeout=None)
+    return report_id
+
+
+def reports() -> list[dict[str, Any]]:
+    """The reports in the buffer, newest first."""
+    keys = [slot_key(slot) for slot in range(settings.WALLET_PROFILE_BUFFER_SIZE)]
+    return sorted(cache.get_many(keys).values(), key=lambda entry: entry['id'], reverse=True)
+
+
+def get(report_id: int) -> dict[str, Any] | None:
+    entry = cache.get(slot_key(report_id))
+    # The slot may hold a newer report by now.
+    return entry if entry is not None and entry['id'] == report_id else None
+
+
+def collapsed(entry: dict[str, Any]) -> str:
+    """The stacks of `entry` in collapsed format, one `frame;frame;... count` line per stack."""
+    return ''.join(f'{stack} {count}\n' for stack, count in entry['stacks'].items())
@@ -0,0 +1,60 @@
+from collections.abc import Sequence
+from functools import partial
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.wallet import feed, leaderboard, listcache
+from apps.wallet.models import OutboxEvent, Transaction, Wallet
+from apps.wallet.signals import transactions_posted
+
+
+@receiver(post_save, sender=Wallet)
+def record_wallet_in_leaderboard(sender: type[Wallet], instance: Wallet, **kwargs: Any) -> None:
+    transaction.on_commit(partial(leaderboard.record, instance), using=instance._state.db)
+
+
+@receiver(post_delete, sender=Wallet)
+def discard_wallet_from_leaderboard(sender: type[Wallet], instance: Wallet, **kwargs: Any) -> None:
+    transaction.on_commit(partial(leaderboard.discard, instance.pk), using=instance._state.db)
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def invalidate_wallet_lists(sender: type[Wallet], instance: Wallet, **kwargs: Any) -> None:
+    transaction.on_commit(partial(listcache.invalidate, [instance.pk]), using=instance._state.db)
+
+
+@receiver(transactions_posted)
+def record_posted_wallets_in_leaderboard(
+    sender: type[Transaction], postings: Sequence[tuple[Wallet, Sequence[Transaction]]], **kwargs: Any
+) -> None:
+    wallets = [wallet for wallet, _ in postings]
+    transaction.on_commit(partial(leaderboard.record_many, wallets), using=wallets[0]._state.db)
+
+
+@receiver(transactions_posted)
+def notify_feed(
+    sender: type[Transaction], postings: Sequence[tuple[Wallet, Sequence[Transaction]]], **kwargs: Any
+) -> None:
+    transaction.on_commit(feed.notify, using=postings[0][0]._state.db)
+
+
+@receiver(transactions_posted)
+def invalidate_posted_wallet_lists(
+    sender: type[Transaction], postings: Sequence[tuple[Wallet, Sequence[Transaction]]], **kwargs: Any
+) -> None:
+    wallet_ids = [wallet.pk for wallet, _ in postings]
+    transaction.on_commit(partial(listcache.invalidate, wallet_ids), using=postings[0][0]._state.db)
+
+
+@receiver(transactions_posted)
+def write_outbox_events(
+    sender: type[Transaction], postings: Sequence[tuple[Wallet, Sequence[Transaction]]], **kwargs: Any
+) -> None:
+    # Still inside the posting's atomic block, so the events commit or roll back together with the postings.
+    OutboxEvent.objects.using(postings[0][0]._state.db).bulk_create(
+        [OutboxEvent.transaction_posted(posting) for _, transactions in postings for posting in transactions]
+    )
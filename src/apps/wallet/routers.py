@@ -0,0 +1,98 @@
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model
+
+from apps.wallet import sharding
+
+
+_pinned_to_primary: ContextVar[bool] = ContextVar('pinned_to_primary', default=False)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Send every read issued inside the block to the primary database."""
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+def is_pinned_to_primary() -> bool:
+    return _pinned_to_primary.get()
+
+
+class WalletShardRouter:
+    """
+    Places wallets and their transactions on `settings.WALLET_SHARDS` by wallet id.
+
+    Only instance-bound operations can be routed here; queries without an instance must pick the shard explicitly
+    with `.using(sharding.shard_for_wallet(wallet_id))` or fan out over `sharding.wallet_databases()`. Everything else
+    is left to the next router.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        instance = hints.get('instance')
+        if not sharding.is_enabled() or not sharding.is_sharded_model(model._meta.label_lower) or instance is None:
+            return None
+        return instance._state.db or self._shard_for_instance(instance)
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str | None:
+        instance = hints.get('instance')
+        if not sharding.is_enabled() or not sharding.is_sharded_model(model._meta.label_lower) or instance is None:
+            return None
+        return self._shard_for_instance(instance)
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        if not sharding.is_enabled():
+            return None
+        if sharding.is_sharded_model(obj1._meta.label_lower) and sharding.is_sharded_model(obj2._meta.label_lower):
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints: Any) -> bool | None:
+        if not sharding.is_enabled() or model_name is None:
+            return None
+        if sharding.is_sharded_model(f'{app_label}.{model_name}'):
+            return db in settings.WALLET_SHARDS
+        return db == DEFAULT_DB_ALIAS
+
+    def _shard_for_instance(self, instance: Model) -> str | None:
+        attname = sharding.SHARDED_MODELS.get(instance._meta.label_lower)
+        wallet_id = getattr(instance, attname) if attname else None
+        return sharding.shard_for_wallet(wallet_id) if wallet_id is not None else None
+
+
+class PrimaryReplicaRouter:
+    """
+    Routes writes to the primary (`default`) and safe reads to one of `settings.DATABASE_REPLICAS`.
+
+    Reads stay on the primary while the current context is pinned (see `use_primary`) or while an atomic block is
+    open on the primary, so a read inside a write transaction never sees replica lag.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str:
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned_to_primary() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints: Any) -> bool | None:
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
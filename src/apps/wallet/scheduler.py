@@ -0,0 +1,101 @@
+"""
+Applies due `ScheduledPosting`s through the posting path.
+
+Each batch locks due schedules (skipping those locked by other workers), posts their due runs with a single `post_many`
+call for all wallets and moves `next_run_at` forward, all in one database transaction. Txids are derived from the
+schedule and the run time, and runs whose txid already exists are skipped, so a run is posted exactly once even if a
+batch is retried.
+
+A wallet's runs are checked in run time order against its running balance, so credits due before a debit pay for it.
+A run that would overdraw the wallet is deferred: its schedule stays due at that run, later runs of the schedule wait
+behind it, and the run is retried by the next pass.
+"""
+
+from collections import defaultdict
+from contextlib import ExitStack
+from datetime import datetime
+from typing import NamedTuple
+
+from django.db import transaction
+
+from apps.wallet.models import ScheduledPosting, Transaction, Wallet
+
+
+class Result(NamedTuple):
+    schedules: int
+    posted: int
+    # Runs not posted because the wallet is deleted; they are not retried.
+    rejected: int
+    # Schedules left due because their next run would overdraw the wallet.
+    deferred: tuple[int, ...]
+
+
+def due_runs(schedule: ScheduledPosting, now: datetime, limit: int) -> tuple[list[datetime], datetime | None]:
+    """The schedule's runs due by `now` (at most `limit`) and the time of the run after them."""
+    runs = []
+    run_at = schedule.next_run_at
+    while run_at is not None and run_at <= now and len(runs) < limit:
+        runs.append(run_at)
+        run_at = run_at + schedule.interval if schedule.interval else None
+    return runs, run_at
+
+
+def run_due(db: str, now: datetime, batch_size: int, max_runs: int, skip: tuple[int, ...] = ()) -> Result:
+    """
+    Apply up to `batch_size` due schedules stored on `db`, each for at most `max_runs` runs.
+
+    Schedules in `skip` (those deferred earlier in the same pass) are left alone.
+    """
+    with ExitStack() as reservations, transaction.atomic(using=db):
+        schedules = list(
+            ScheduledPosting.objects.using(db)
+            .select_for_update(skip_locked=True)
+            .filter(next_run_at__lte=now)
+            .exclude(pk__in=skip)
+            .order_by('next_run_at')[:batch_size]
+        )
+        if not schedules:
+            return Result(schedules=0, posted=0, rejected=0, deferred=())
+
+        by_wallet: dict[int, list[tuple[datetime, ScheduledPosting, Transaction]]] = defaultdict(list)
+        for schedule in schedules:
+            runs, schedule.next_run_at = due_runs(schedule, now, max_runs)
+            for run_at in runs:
+                posting = Transaction(wallet_id=schedule.wallet_id, txid=schedule.txid(run_at), amount=schedule.amount)
+                by_wallet[schedule.wallet_id].append((run_at, schedule, posting))
+        txids = [posting.txid for runs in by_wallet.values() for _, _, posting in runs]
+        done = Transaction.objects.using(db).existing_txids(txids)
+
+        accepted = []
+        rejected = 0
+        deferred: dict[int, ScheduledPosting] = {}
+        # Locked in id order, like transfers, so concurrent workers and postings cannot deadlock.
+        wallets = Wallet.objects.using(db).select_for_update().filter(pk__in=by_wallet).order_by('pk')
+        for wallet in wallets:
+            postings = []
+            balance = wallet.balance
+            for run_at, schedule, posting in sorted(by_wallet[wallet.pk], key=lambda run: (run[0], run[1].pk)):
+                if schedule.pk in deferred or posting.txid in done:
+                    continue
+                if wallet.deleted_at is not None:
+                    rejected += 1
+                    continue
+                # As `balance_after` checks it: funds reserved by holds cannot be spent.
+                if balance + posting.amount < wallet.held:
+                    schedule.next_run_at = run_at
+                    deferred[schedule.pk] = schedule
+                    continue
+                balance += posting.amount
+                postings.append(posting)
+            if postings:
+                accepted.append((wallet, postings))
+
+        posted = 0
+        for _, postings in accepted:
+            for posting in postings:
+                reservations.enter_context(posting.reserve_id())
+            posted += len(postings)
+        if accepted:
+            Transaction.objects.post_many(accepted)
+        ScheduledPosting.objects.using(db).bulk_update(schedules, ['next_run_at'])
+    return Result(schedules=len(schedules), posted=posted, rejected=rejected, deferred=tuple(deferred))
@@ -1,27 +1,201 @@
+from collections.abc import Sequence
+from datetime import timedelta
+from decimal import Decimal
 from typing import Any
 
-from rest_framework import serializers
+from django.conf import settings
+from django.db import router
+from rest_framework import exceptions, serializers, status
+from rest_framework_json_api.relations import ResourceRelatedField
+from rest_framework_json_api.renderers import JSONRenderer as JsonApiRenderer
 
-from apps.wallet.models import Transaction, Wallet
+from apps.wallet import groupcommit, holds, sharding, transfers
+from apps.wallet.models import Hold, Transaction, TxidLookup, Wallet
+
+
+class WalletRelatedField(serializers.PrimaryKeyRelatedField):
+    """Looks the wallet up on its own shard when wallets are sharded."""
+
+    def to_internal_value(self, data: Any) -> Wallet:
+        if not sharding.is_enabled():
+            return super().to_internal_value(data)
+        try:
+            wallet_id = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().using(sharding.shard_for_wallet(wallet_id)).get(pk=wallet_id)
+        except Wallet.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class TxidUniqueValidator:
+    """
+    Checks txid uniqueness in the global `TxidLookup` when transactions are sharded.
+
+    With `suffixes`, checks the txids built by appending each suffix instead of the value itself.
+    """
+
+    message = 'transaction with this txid already exists.'
+
+    def __init__(self, suffixes: Sequence[str] = ('',)) -> None:
+        self.suffixes = suffixes
+
+    def __call__(self, value: str) -> None:
+        queryset = TxidLookup.objects if sharding.is_enabled() else Transaction.objects
+        if queryset.filter(txid__in=[f'{value}{suffix}' for suffix in self.suffixes]).exists():
+            raise serializers.ValidationError(self.message, code='unique')
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The wallet was changed by another request.'
+    default_code = 'precondition_failed'
 
 
 class WalletSerializer(serializers.ModelSerializer):
+    available = serializers.DecimalField(max_digits=30, decimal_places=8, read_only=True)
+
     class Meta:
         model = Wallet
-        fields = '__all__'
-        read_only_fields = ['balance']
+        fields = ['id', 'label', 'currency', 'balance', 'held', 'available']
+        read_only_fields = ['balance', 'held']
+
+    @property
+    def included_serializers(self) -> dict[str, type[serializers.Serializer]]:
+        # Read by the JSON:API renderer for `?include=transactions`.
+        return {'transactions': TransactionSerializer}
+
+    def get_fields(self) -> dict[str, serializers.Field]:
+        fields = super().get_fields()
+        if self.context.get('include_transactions'):
+            # The latest transactions, prefetched by the view: a relationship with the transactions under `included`
+            # for JSON:API clients, nested in the wallet for everyone else.
+            if isinstance(self.context['request'].accepted_renderer, JsonApiRenderer):
+                fields['transactions'] = ResourceRelatedField(
+                    source='recent_transactions', model=Transaction, many=True, read_only=True
+                )
+            else:
+                fields['transactions'] = TransactionSerializer(source='recent_transactions', many=True, read_only=True)
+        return fields
+
+    def validate_currency(self, value: str) -> str:
+        if self.instance is not None and value != self.instance.currency:
+            raise serializers.ValidationError('The currency of a wallet cannot be changed.')
+        return value
 
     def create(self, validated_data: dict[str, Any]) -> Wallet:
         validated_data['balance'] = 0
         return super().create(validated_data)
 
+    def update(self, instance: Wallet, validated_data: dict[str, Any]) -> Wallet:
+        # Only changed fields are written, so an update never overwrites the balance maintained by postings.
+        expected_version = validated_data.pop('expected_version', None)
+        changes = {name: value for name, value in validated_data.items() if getattr(instance, name) != value}
+        if changes and not instance.apply_changes(changes, expected_version):
+            raise PreconditionFailed
+        return instance
+
+
+class WalletBalanceSerializer(WalletSerializer):
+    """A wallet's total balance only, for listings not backed by the wallet rows (the leaderboard)."""
+
+    class Meta(WalletSerializer.Meta):
+        fields = ['id', 'label', 'balance']
+
+
+class CurrencyTotalSerializer(serializers.Serializer):
+    currency = serializers.CharField()
+    wallets = serializers.IntegerField()
+    balance = serializers.DecimalField(max_digits=None, decimal_places=8)
+    rate = serializers.DecimalField(max_digits=None, decimal_places=12, allow_null=True)
+    value = serializers.DecimalField(max_digits=None, decimal_places=8, allow_null=True)
+
+
+class ValuationSerializer(serializers.Serializer):
+    currency = serializers.CharField()
+    total = serializers.DecimalField(max_digits=None, decimal_places=8)
+    currencies = CurrencyTotalSerializer(many=True)
+
 
 class TransactionSerializer(serializers.ModelSerializer):
+    serializer_related_field = WalletRelatedField
+
     class Meta:
         model = Transaction
         fields = '__all__'
+        extra_kwargs = {
+            'txid': {'validators': [TxidUniqueValidator()]},
+            'wallet': {'queryset': Wallet.objects.active()},
+        }
 
     def create(self, validated_data: dict[str, Any]) -> Transaction:
         if validated_data['amount'] == 0:
             raise serializers.ValidationError('Amount cannot be negative')
-        return super().create(validated_data)
+        if not groupcommit.is_enabled():
+            return super().create(validated_data)
+        posting = Transaction(**validated_data)
+        groupcommit.submit(posting, router.db_for_write(Wallet, instance=posting.wallet))
+        return posting
+
+
+class TransferListSerializer(serializers.ListSerializer):
+    def create(self, validated_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        pairs = transfers.execute([transfers.Transfer(**attrs) for attrs in validated_data])
+        return [{**attrs, 'debit': debit, 'credit': credit} for attrs, (debit, credit) in zip(validated_data, pairs)]
+
+
+class TransferSerializer(serializers.Serializer):
+    source_wallet = serializers.IntegerField(min_value=1)
+    destination_wallet = serializers.IntegerField(min_value=1)
+    amount = serializers.DecimalField(max_digits=18, decimal_places=8, min_value=Decimal('0.00000001'))
+    txid = serializers.CharField(
+        max_length=64 - len(transfers.CREDIT_SUFFIX),
+        validators=[TxidUniqueValidator(suffixes=(transfers.DEBIT_SUFFIX, transfers.CREDIT_SUFFIX))],
+    )
+    debit = TransactionSerializer(read_only=True)
+    credit = TransactionSerializer(read_only=True)
+
+    class Meta:
+        list_serializer_class = TransferListSerializer
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if attrs['source_wallet'] == attrs['destination_wallet']:
+            raise serializers.ValidationError('Source and destination wallets must differ.')
+        return attrs
+
+    def create(self, validated_data: dict[str, Any]) -> dict[str, Any]:
+        [(debit, credit)] = transfers.execute([transfers.Transfer(**validated_data)])
+        return {**validated_data, 'debit': debit, 'credit': credit}
+
+
+class HoldSerializer(serializers.ModelSerializer):
+    amount = serializers.DecimalField(max_digits=18, decimal_places=8, min_value=Decimal('0.00000001'))
+    ttl = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.WALLET_HOLD_MAX_TTL,
+        required=False,
+        write_only=True,
+        help_text='Seconds until the hold expires',
+    )
+
+    class Meta:
+        model = Hold
+        fields = ['id', 'wallet', 'txid', 'amount', 'status', 'expires_at', 'created_at', 'ttl']
+        read_only_fields = ['wallet', 'status', 'expires_at']
+        # Uniqueness among holds is enforced on insert, on the wallet's shard.
+        extra_kwargs = {'txid': {'validators': [TxidUniqueValidator()]}}
+
+    def create(self, validated_data: dict[str, Any]) -> Hold:
+        ttl = timedelta(seconds=validated_data.get('ttl', settings.WALLET_HOLD_TTL))
+        return holds.authorize(validated_data['wallet_id'], validated_data['amount'], validated_data['txid'], ttl)
+
+
+class CaptureSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(
+        max_digits=18,
+        decimal_places=8,
+        min_value=Decimal('0.00000001'),
+        required=False,
+        help_text='Amount to capture, all of the hold by default; the rest is released',
+    )
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Models stored on the wallet shards by `label_lower`, mapped to the attribute holding the wallet id that places them.
+SHARDED_MODELS = {
+    'wallet.wallet': 'pk',
+    'wallet.transaction': 'wallet_id',
+    'wallet.outboxevent': 'wallet_id',
+    'wallet.scheduledposting': 'wallet_id',
+    'wallet.hold': 'wallet_id',
+}
+
+
+def is_enabled() -> bool:
+    return bool(settings.WALLET_SHARDS)
+
+
+def wallet_databases() -> list[str]:
+    """Every database holding wallets: the shards, or `default` when sharding is disabled."""
+    return list(settings.WALLET_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def shard_for_wallet(wallet_id: int) -> str:
+    shards = settings.WALLET_SHARDS
+    if not shards:
+        return DEFAULT_DB_ALIAS
+    return shards[int(wallet_id) % len(shards)]
+
+
+def is_sharded_model(label_lower: str) -> bool:
+    return label_lower in SHARDED_MODELS
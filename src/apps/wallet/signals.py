@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent by `TransactionQuerySet.post_many` inside the posting's atomic block, after the wallet balances and the
+# transactions are stored. Arguments: `postings`, a sequence of `(wallet, transactions)` pairs with every wallet locked
+# and on the same database. Receivers wanting committed data use `on_commit`.
+transactions_posted = Signal()
@@ -0,0 +1,128 @@
+"""
+Periodic wallet statements, written as one CSV file per wallet by `./manage.py generate_statements`.
+
+Wallets are processed in ranges of ids. For a range, one query reads every active wallet that existed before the end
+of the period with its current balance and the sums of its transactions since the start and since the end of the
+period, so the opening and closing balances come from a single snapshot: opening = balance - sum since start,
+closing = balance - sum since end. The transactions of the period are then streamed once for the whole range, ordered
+by `(wallet_id, created_at)`, and each wallet's file is written with a running balance as its rows go by. A finished
+range is recorded by an empty marker file in the output directory, which reruns skip.
+"""
+
+import csv
+from collections.abc import Iterable
+from datetime import datetime
+from decimal import Decimal
+from itertools import groupby
+from pathlib import Path
+
+from django.db.models import OuterRef, QuerySet, Subquery, Sum
+
+from apps.wallet.accrual import Range
+from apps.wallet.models import Transaction, Wallet
+
+
+PROGRESS_DIRECTORY = '.progress'
+HEADER = ['entry', 'created_at', 'txid', 'amount', 'balance']
+
+
+def statement_path(output: Path, wallet_id: int) -> Path:
+    # A thousand files per directory at most.
+    return output / f'{wallet_id // 1000:06d}' / f'{wallet_id}.csv'
+
+
+def marker_path(output: Path, wallets: Range) -> Path:
+    return output / PROGRESS_DIRECTORY / f'{wallets.database}-{wallets.start_id}-{wallets.end_id}'
+
+
+def pending_ranges(output: Path, ranges: list[Range]) -> list[Range]:
+    """The `ranges` not yet covered by finished ones recorded in `output`, whatever their size."""
+    done = []
+    for marker in (output / PROGRESS_DIRECTORY).glob('*'):
+        database, start_id, end_id = marker.name.rsplit('-', 2)
+        done.append(Range(database, int(start_id), int(end_id)))
+    return [
+        r
+        for r in ranges
+        if not any(d.database == r.database and d.start_id <= r.start_id and r.end_id <= d.end_id for d in done)
+    ]
+
+
+def sum_since(moment: datetime) -> Subquery:
+    """The sum of a wallet's transactions created at or after `moment`, NULL without any."""
+    transactions = (
+        Transaction.objects.filter(wallet=OuterRef('pk'), created_at__gte=moment)
+        .order_by()
+        .values('wallet')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    return Subquery(transactions, output_field=Wallet._meta.get_field('balance'))
+
+
+def wallets_with_sums(wallets: Range, start: datetime, end: datetime) -> QuerySet:
+    return (
+        Wallet.objects.using(wallets.database)
+        .active()
+        .filter(pk__gte=wallets.start_id, pk__lt=wallets.end_id)
+        # Wallets created since did not exist in the period; older ones have no creation time.
+        .exclude(created_at__gte=end)
+        .annotate(since_start=sum_since(start), since_end=sum_since(end))
+        .order_by('pk')
+        .values_list('pk', 'balance', 'since_start', 'since_end')
+    )
+
+
+def generate(wallets: Range, start: datetime, end: datetime, output: Path, chunk_size: int = 2000) -> int:
+    """
+    Write the statements for `[start, end)` of the active wallets in `wallets` created before `end`, and return their
+    number.
+    """
+    accounts = list(wallets_with_sums(wallets, start, end))
+    rows = (
+        Transaction.objects.using(wallets.database)
+        .filter(
+            wallet_id__gte=wallets.start_id, wallet_id__lt=wallets.end_id, created_at__gte=start, created_at__lt=end
+        )
+        .order_by('wallet_id', 'created_at', 'pk')
+        .values_list('wallet_id', 'created_at', 'txid', 'amount')
+        .iterator(chunk_size=chunk_size)
+    )
+    postings = groupby(rows, key=lambda row: row[0])
+    pending = next(postings, None)
+
+    written = 0
+    for wallet_id, balance, since_start, since_end in accounts:
+        # Transactions of wallets deleted since are passed over.
+        while pending is not None and pending[0] < wallet_id:
+            pending = next(postings, None)
+        period = pending[1] if pending is not None and pending[0] == wallet_id else ()
+        write_statement(
+            statement_path(output, wallet_id),
+            start,
+            end,
+            opening=balance - (since_start or Decimal(0)),
+            closing=balance - (since_end or Decimal(0)),
+            postings=period,
+        )
+        written += 1
+
+    marker = marker_path(output, wallets)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+    return written
+
+
+def write_statement(
+    path: Path, start: datetime, end: datetime, opening: Decimal, closing: Decimal, postings: Iterable[tuple]
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerow(['opening', start.isoformat(), '', '', opening])
+        balance = opening
+        for _, created_at, txid, amount in postings:
+            balance += amount
+            writer.writerow(['transaction', created_at.isoformat(), txid, amount, balance])
+        writer.writerow(['closing', end.isoformat(), '', '', closing])
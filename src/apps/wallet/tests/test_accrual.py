@@ -0,0 +1,106 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.wallet.accrual import accrual_txid
+from apps.wallet.models import AccrualCheckpoint, OutboxEvent, Transaction, Wallet
+from apps.wallet.sharding import shard_for_wallet
+
+
+class AccrueTests(TestCase):
+    def setUp(self):
+        self.wallets = [
+            Wallet.objects.create(label=str(i), balance=balance) for i, balance in enumerate(['100', '0', '1.23456789'])
+        ]
+
+    def balances(self):
+        return [Wallet.objects.get(pk=wallet.pk).balance for wallet in self.wallets]
+
+    def test_accrue(self):
+        # arrange
+        out = StringIO()
+
+        # act
+        call_command('accrue', 'interest', '0.015', chunk_size=2, stdout=out)
+
+        # assert
+        self.assertEqual(self.balances(), [Decimal('101.5'), Decimal('0'), Decimal('1.25308641')])
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('txid', 'amount')),
+            sorted(
+                [
+                    (accrual_txid('interest', self.wallets[0].pk), Decimal('1.5')),
+                    (accrual_txid('interest', self.wallets[2].pk), Decimal('0.01851852')),
+                ]
+            ),
+        )
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+        self.assertEqual(Wallet.objects.get(pk=self.wallets[0].pk).version, 1)
+        self.assertEqual(AccrualCheckpoint.objects.count(), 2)
+        self.assertIn('Accrued 2 wallet(s) in 2 range(s)', out.getvalue())
+
+    def test_accrue__fee(self):
+        # act
+        call_command('accrue', 'fee', '-0.3', stdout=StringIO())
+
+        # assert
+        self.assertEqual(self.balances(), [Decimal('70'), Decimal('0'), Decimal('0.86419752')])
+
+    def test_accrue__rerun__resumes(self):
+        # arrange
+        call_command('accrue', 'interest', '0.01', chunk_size=1, stdout=StringIO())
+        AccrualCheckpoint.objects.order_by('start_id').last().delete()
+        out = StringIO()
+
+        # act
+        call_command('accrue', 'interest', '0.01', chunk_size=1, stdout=out)
+
+        # assert
+        self.assertEqual(self.balances(), [Decimal('101'), Decimal('0'), Decimal('1.24691357')])
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertIn('Accrued 0 wallet(s) in 1 range(s)', out.getvalue())
+
+    def test_accrue__deleted_wallet__skipped(self):
+        # arrange
+        Wallet.objects.filter(pk=self.wallets[0].pk).update(deleted_at=timezone.now())
+
+        # act
+        call_command('accrue', 'interest', '0.01', stdout=StringIO())
+
+        # assert
+        self.assertEqual(self.balances(), [Decimal('100'), Decimal('0'), Decimal('1.24691357')])
+
+    def test_accrue__rate_too_precise__rejected(self):
+        # act / assert
+        with self.assertRaisesMessage(CommandError, '8 decimal places'):
+            call_command('accrue', 'interest', '0.000000001', stdout=StringIO())
+
+    def test_accrue__rate_changed__rejected(self):
+        # arrange
+        call_command('accrue', 'interest', '0.01', stdout=StringIO())
+
+        # act / assert
+        with self.assertRaisesMessage(CommandError, 'different rate'):
+            call_command('accrue', 'interest', '0.02', stdout=StringIO())
+
+
+@override_settings(WALLET_SHARDS=['default', 'shard_1'])
+class ShardedAccrueTests(TestCase):
+    databases = {'default', 'shard_1'}
+
+    def test_accrue(self):
+        # arrange
+        wallets = [Wallet.objects.create(label=label, balance='10') for label in ('A', 'B')]
+
+        # act
+        call_command('accrue', 'interest', '0.1', stdout=StringIO())
+
+        # assert
+        for wallet in wallets:
+            db = shard_for_wallet(wallet.pk)
+            self.assertEqual(Wallet.objects.using(db).get(pk=wallet.pk).balance, Decimal('11'))
+            self.assertEqual(Transaction.objects.using(db).get().txid, accrual_txid('interest', wallet.pk))
+        self.assertEqual(AccrualCheckpoint.objects.values_list('database', flat=True).distinct().count(), 2)
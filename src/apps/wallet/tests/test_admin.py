@@ -0,0 +1,158 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.pagination import EstimatedCountPaginator
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @override_settings(WALLET_ADMIN_COUNT_LIMIT=2)
+    def test_count__capped(self):
+        # arrange
+        for label in 'ABC':
+            Wallet.objects.create(label=label, balance='1')
+
+        # act
+        paginator = EstimatedCountPaginator(Wallet.objects.order_by('pk'), 1)
+
+        # assert
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_count__below_limit__exact(self):
+        # arrange
+        for label in 'ABC':
+            Wallet.objects.create(label=label, balance='1')
+
+        # act
+        paginator = EstimatedCountPaginator(Wallet.objects.filter(label__in=['A', 'B']).order_by('pk'), 1)
+
+        # assert
+        self.assertEqual(paginator.count, 2)
+
+
+@skipUnless(apps.is_installed('django.contrib.admin'), 'The lean API profile has no admin.')
+class AdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.wallet = Wallet.objects.create(label='A', balance='10')
+        Transaction.objects.create(wallet=self.wallet, txid='a', amount='5')
+
+    def test_wallet_changelist__search_by_id(self):
+        # arrange
+        other = Wallet.objects.create(label='B', balance='1')
+
+        # act
+        response = self.client.get(reverse('admin:wallet_wallet_changelist'), {'q': str(other.pk)})
+
+        # assert
+        self.assertEqual(list(response.context['cl'].result_list), [other])
+
+    def test_wallet_changelist__search_text__no_wallet_queries(self):
+        # act
+        # Only the session and the user are loaded.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('admin:wallet_wallet_changelist'), {'q': 'A'})
+
+        # assert
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_transaction_changelist__search_by_txid_or_wallet(self):
+        # act
+        by_txid = self.client.get(reverse('admin:wallet_transaction_changelist'), {'q': 'a'})
+        by_wallet = self.client.get(reverse('admin:wallet_transaction_changelist'), {'q': str(self.wallet.pk)})
+
+        # assert
+        self.assertEqual([posting.txid for posting in by_txid.context['cl'].result_list], ['a'])
+        self.assertEqual([posting.txid for posting in by_wallet.context['cl'].result_list], ['a'])
+
+    def test_wallet_change__keeps_concurrent_postings(self):
+        # arrange
+        url = reverse('admin:wallet_wallet_change', args=[self.wallet.pk])
+        self.client.get(url)
+        Transaction.objects.create(wallet=self.wallet, txid='b', amount='1')
+
+        # act
+        response = self.client.post(url, {'label': 'Renamed'})
+
+        # assert
+        self.assertEqual(response.status_code, 302)
+        self.wallet.refresh_from_db()
+        self.assertEqual((self.wallet.label, self.wallet.balance), ('Renamed', Decimal('16')))
+
+    def test_wallet_add__zero_balance(self):
+        # act
+        response = self.client.post(
+            reverse('admin:wallet_wallet_add'), {'label': 'B', 'currency': 'USD', 'balance': '500'}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Wallet.objects.get(label='B').balance, Decimal('0'))
+
+    def test_transaction_add__posts(self):
+        # act
+        response = self.client.post(
+            reverse('admin:wallet_transaction_add'), {'wallet': self.wallet.pk, 'txid': 'b', 'amount': '-3'}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 302)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('12'))
+
+    def test_transaction_add__overdraft__form_error(self):
+        # act
+        response = self.client.post(
+            reverse('admin:wallet_transaction_add'), {'wallet': self.wallet.pk, 'txid': 'b', 'amount': '-30'}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Amount exceeds wallet balance.')
+        self.assertFalse(Transaction.objects.filter(txid='b').exists())
+
+    def test_transaction_change__read_only(self):
+        # arrange
+        posting = Transaction.objects.get(txid='a')
+
+        # act
+        response = self.client.post(
+            reverse('admin:wallet_transaction_change', args=[posting.pk]),
+            {'wallet': self.wallet.pk, 'txid': 'a', 'amount': '500'},
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 403)
+        posting.refresh_from_db()
+        self.assertEqual(posting.amount, Decimal('5'))
+
+    def test_wallet_soft_delete_action(self):
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('admin:wallet_wallet_changelist'),
+                {'action': 'soft_delete', '_selected_action': [self.wallet.pk]},
+            )
+
+        # assert
+        self.wallet.refresh_from_db()
+        self.assertIsNotNone(self.wallet.deleted_at)
+        self.assertTrue(Transaction.objects.filter(wallet=self.wallet).exists())
+
+    def test_transaction_export_csv_action(self):
+        # act
+        response = self.client.post(
+            reverse('admin:wallet_transaction_changelist'),
+            {'action': 'export_csv', '_selected_action': [Transaction.objects.get().pk]},
+        )
+
+        # assert
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,txid,wallet_id,amount,created_at')
+        self.assertIn(',a,', lines[1])
@@ -0,0 +1,64 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from apps.wallet import fields
+from apps.wallet.models import Transaction, Wallet
+
+
+class UnitsTests(SimpleTestCase):
+    def test_to_units(self):
+        # act / assert
+        self.assertEqual(fields.to_units(Decimal('-12.34567891')), -1234567891)
+        self.assertEqual(fields.to_units(Decimal('0.000000005')), 0)
+
+    def test_from_units(self):
+        # act / assert
+        self.assertEqual(str(fields.from_units(1234567891)), '12.34567891')
+        self.assertEqual(str(fields.from_units(150000000.0)), '1.50000000')
+
+
+class ConvertAmountsTests(TransactionTestCase):
+    def setUp(self):
+        wallet = Wallet.objects.create(label='A', balance='10.5')
+        Transaction.objects.create(wallet=wallet, txid='a', amount='0.00000001')
+        Transaction.objects.create(wallet=wallet, txid='b', amount='-2.25')
+        # Back to the storage of the other tests.
+        self.addCleanup(call_command, 'convert_amounts', stdout=StringIO())
+
+    def stored(self, column, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {column} FROM {table} ORDER BY id')
+            return [row[0] for row in cursor.fetchall()]
+
+    @override_settings(WALLET_SCALED_AMOUNTS=True)
+    def test_convert_amounts__scaled(self):
+        # act
+        call_command('convert_amounts', stdout=StringIO())
+
+        # assert
+        self.assertEqual(self.stored('balance', 'wallet_wallet'), [825000001])
+        self.assertEqual(self.stored('amount', 'wallet_transaction'), [1, -225000000])
+        self.assertEqual(Wallet.objects.get().balance, Decimal('8.25000001'))
+        self.assertEqual(Transaction.objects.filter(amount__lte='-1').get().txid, 'b')
+        self.assertEqual(Transaction.objects.aggregate(total=Sum('amount'))['total'], Decimal('-2.24999999'))
+
+    def test_convert_amounts__decimal(self):
+        # arrange
+        with override_settings(WALLET_SCALED_AMOUNTS=True):
+            call_command('convert_amounts', stdout=StringIO())
+
+        # act
+        with override_settings(WALLET_SCALED_AMOUNTS=False):
+            call_command('convert_amounts', stdout=StringIO())
+
+            # assert
+            self.assertEqual(
+                [Decimal(str(amount)) for amount in self.stored('amount', 'wallet_transaction')],
+                [Decimal('0.00000001'), Decimal('-2.25')],
+            )
+            self.assertEqual(Wallet.objects.get().balance, Decimal('8.25000001'))
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.wallet.models import Transaction, Wallet
+
+
+@override_settings(WALLET_FEED_SETTLE_SECONDS=0, WALLET_FEED_POLL_SECONDS=0.01)
+class TransactionFeedTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = Wallet.objects.create(label='Test', balance='100')
+        self.first = Transaction.objects.create(wallet=self.wallet, txid='a', amount='1')
+        self.second = Transaction.objects.create(wallet=self.wallet, txid='b', amount='2')
+
+    def post_elsewhere(self, **kwargs):
+        # The pending request occupies the thread-sensitive executor, so post from another thread (and connection),
+        # the way another worker process would.
+        try:
+            Transaction.objects.create(wallet=self.wallet, **kwargs)
+        finally:
+            connections.close_all()
+
+    async def test_get_feed(self):
+        # act
+        response = await self.async_client.get(reverse('transaction-feed'), {'after': self.first.id})
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cursor'], self.second.id)
+        self.assertEqual([item['txid'] for item in response.json()['results']], ['b'])
+
+    async def test_get_feed__nothing_new__empty_after_timeout(self):
+        # act
+        response = await self.async_client.get(reverse('transaction-feed'), {'after': self.second.id, 'timeout': 0})
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [], 'cursor': self.second.id})
+
+    async def test_get_feed__waits_for_new_postings(self):
+        # arrange
+        request = asyncio.ensure_future(
+            self.async_client.get(reverse('transaction-feed'), {'after': self.second.id, 'timeout': 5})
+        )
+        await asyncio.sleep(0.05)
+
+        # act
+        await sync_to_async(self.post_elsewhere, thread_sensitive=False)(txid='c', amount='3')
+        response = await request
+
+        # assert
+        self.assertEqual([item['txid'] for item in response.json()['results']], ['c'])
+
+    async def test_get_feed__waiting__other_requests_not_blocked(self):
+        # arrange
+        # The middleware runs on the event loop, so a waiting request holds no thread that others need.
+        waiting = asyncio.ensure_future(
+            self.async_client.get(reverse('transaction-feed'), {'after': self.second.id, 'timeout': 5})
+        )
+        await asyncio.sleep(0.05)
+
+        # act
+        response = await asyncio.wait_for(
+            self.async_client.get(reverse('transaction-feed'), {'after': self.first.id, 'timeout': 0}), timeout=1
+        )
+
+        # assert
+        self.assertEqual([item['txid'] for item in response.json()['results']], ['b'])
+        self.assertFalse(waiting.done())
+        await sync_to_async(self.post_elsewhere, thread_sensitive=False)(txid='c', amount='3')
+        await waiting
+
+    @override_settings(WALLET_FEED_SETTLE_SECONDS=60)
+    async def test_get_feed__unsettled__held_back(self):
+        # act
+        response = await self.async_client.get(reverse('transaction-feed'), {'after': 0, 'timeout': 0})
+
+        # assert
+        self.assertEqual(response.json(), {'results': [], 'cursor': 0})
+
+    @override_settings(WALLET_FEED_SETTLE_SECONDS=60)
+    async def test_get_feed__committed_after_settle_window__skipped(self):
+        # arrange
+        # The first posting got its id and `created_at` first but only becomes visible after the second was consumed.
+        await Transaction.objects.filter(pk=self.first.pk).adelete()
+        await Transaction.objects.aupdate(created_at=self.second.created_at - timedelta(minutes=5))
+        consumed = await self.async_client.get(reverse('transaction-feed'), {'after': 0, 'timeout': 0})
+        await Transaction.objects.abulk_create([self.first])
+        await Transaction.objects.aupdate(created_at=self.second.created_at - timedelta(minutes=5))
+
+        # act
+        response = await self.async_client.get(
+            reverse('transaction-feed'), {'after': consumed.json()['cursor'], 'timeout': 0}
+        )
+
+        # assert
+        self.assertEqual([item['txid'] for item in consumed.json()['results']], ['b'])
+        self.assertEqual(response.json()['results'], [])
+
+    async def test_get_feed__invalid_cursor__bad_request(self):
+        # act
+        response = await self.async_client.get(reverse('transaction-feed'), {'after': 'abc'})
+
+        # assert
+        self.assertEqual(response.status_code, 400)
+
+    async def test_get_feed__event_stream(self):
+        # act
+        response = await self.async_client.get(
+            reverse('transaction-feed'), headers={'Accept': 'text/event-stream', 'Last-Event-ID': str(self.first.id)}
+        )
+        event = await anext(aiter(response.streaming_content))
+
+        # assert
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(event.decode().startswith(f'id: {self.second.id}\nevent: transaction\ndata: '))
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.serializers import ValidationError
+from rest_framework.test import APIClient
+
+from apps.wallet import groupcommit
+from apps.wallet.models import OutboxEvent, Transaction, Wallet
+
+
+def submit(wallet, txid, amount):
+    try:
+        groupcommit.submit(Transaction(wallet=wallet, txid=txid, amount=amount), 'default')
+    except ValidationError as error:
+        return str(error.detail[0])
+    finally:
+        connections.close_all()
+    return 'ok'
+
+
+# The window is long enough for every posting to join before the batch fills up and commits.
+@override_settings(WALLET_GROUP_COMMIT_WINDOW=5, WALLET_GROUP_COMMIT_MAX_BATCH=4)
+class GroupCommitTests(TransactionTestCase):
+    def test_submit__batch(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Hot', balance='10')
+
+        # act
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outcomes = list(pool.map(lambda txid: submit(wallet, txid, '-4'), 'abcd'))
+
+        # assert
+        self.assertEqual(sorted(outcomes), ['Amount exceeds wallet balance.'] * 2 + ['ok'] * 2)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+        # A single balance update for the whole batch.
+        self.assertEqual(Wallet.objects.values_list('balance', 'version').get(), (Decimal('2'), 1))
+
+    @override_settings(WALLET_GROUP_COMMIT_WINDOW=0.001)
+    def test_submit__duplicate_txid(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Hot', balance='10')
+        Transaction.objects.create(wallet=wallet, txid='a', amount='1')
+
+        # act
+        outcome = submit(wallet, 'a', '1')
+
+        # assert
+        self.assertEqual(outcome, groupcommit.DUPLICATE_TXID)
+        self.assertEqual(Wallet.objects.get().balance, Decimal('11'))
+
+    @override_settings(WALLET_GROUP_COMMIT_WINDOW=0.001)
+    def test_create_transaction(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Hot', balance='10')
+
+        # act
+        response = APIClient().post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'tx', 'amount': '-2', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['id'], Transaction.objects.get().pk)
+        self.assertEqual(Wallet.objects.get().balance, Decimal('8'))
+
+    @override_settings(WALLET_GROUP_COMMIT_WINDOW=0.001)
+    def test_create_transaction__overdraft__bad_request(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Hot', balance='1')
+
+        # act
+        response = APIClient().post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'tx', 'amount': '-2', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Transaction.objects.exists())
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import ANY
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet.models import Hold, OutboxEvent, Transaction, Wallet
+
+
+class HoldTests(APITestCase):
+    def setUp(self):
+        self.wallet = Wallet.objects.create(label='Test', balance='10')
+
+    def authorize(self, amount, txid='card-1', **data):
+        return self.client.post(
+            path=reverse('hold-list-create', kwargs={'wallet_id': self.wallet.id}),
+            data={'amount': amount, 'txid': txid, **data},
+            format='json',
+        )
+
+    def wallet_balances(self):
+        return Wallet.objects.values('balance', 'held', 'version').get(pk=self.wallet.pk)
+
+    def test_authorize(self):
+        # act
+        response = self.authorize('4', ttl=60)
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data,
+            {
+                'id': ANY,
+                'wallet': self.wallet.id,
+                'txid': 'card-1',
+                'amount': '4.00000000',
+                'status': Hold.ACTIVE,
+                'expires_at': ANY,
+                'created_at': ANY,
+            },
+        )
+        self.assertEqual(self.wallet_balances(), {'balance': Decimal('10'), 'held': Decimal('4'), 'version': 1})
+        wallet = self.client.get(reverse('wallet-detail', kwargs={'pk': self.wallet.id})).data
+        self.assertEqual(
+            (wallet['balance'], wallet['held'], wallet['available']), ('10.00000000', '4.00000000', '6.00000000')
+        )
+
+    def test_authorize__exceeds_available__bad_request(self):
+        # arrange
+        self.authorize('6')
+
+        # act
+        response = self.authorize('5', txid='card-2')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Hold.objects.count(), 1)
+        self.assertEqual(self.wallet_balances()['held'], Decimal('6'))
+
+    def test_authorize__unknown_wallet__not_found(self):
+        # act
+        response = self.client.post(
+            path=reverse('hold-list-create', kwargs={'wallet_id': self.wallet.id + 1}),
+            data={'amount': '1', 'txid': 'card-1'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_capture__partial(self):
+        # arrange
+        hold = self.authorize('4').data
+
+        # act
+        response = self.client.post(
+            path=reverse('hold-capture', kwargs={'wallet_id': self.wallet.id, 'pk': hold['id']}),
+            data={'amount': '3'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['amount'], '-3.00000000')
+        self.assertEqual(Transaction.objects.values_list('txid', 'amount').get(), ('card-1', Decimal('-3')))
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertEqual(self.wallet_balances(), {'balance': Decimal('7'), 'held': Decimal('0'), 'version': 2})
+        self.assertEqual(Hold.objects.get().status, Hold.CAPTURED)
+
+    def test_capture__twice__bad_request(self):
+        # arrange
+        hold = self.authorize('4').data
+        path = reverse('hold-capture', kwargs={'wallet_id': self.wallet.id, 'pk': hold['id']})
+        self.client.post(path=path, data={}, format='json')
+
+        # act
+        response = self.client.post(path=path, data={}, format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.wallet_balances()['balance'], Decimal('6'))
+
+    def test_capture__expired__bad_request(self):
+        # arrange
+        hold = self.authorize('4').data
+        Hold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        # act
+        response = self.client.post(
+            path=reverse('hold-capture', kwargs={'wallet_id': self.wallet.id, 'pk': hold['id']}), data={}, format='json'
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_void(self):
+        # arrange
+        hold = self.authorize('4').data
+
+        # act
+        response = self.client.post(
+            path=reverse('hold-void', kwargs={'wallet_id': self.wallet.id, 'pk': hold['id']}), format='json'
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Hold.VOIDED)
+        self.assertEqual(self.wallet_balances(), {'balance': Decimal('10'), 'held': Decimal('0'), 'version': 2})
+
+    def test_posting__held_funds__bad_request(self):
+        # arrange
+        self.authorize('8')
+
+        # act
+        response = self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'tx', 'amount': '-3', 'wallet': self.wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.wallet_balances()['balance'], Decimal('10'))
+
+    def test_expire_holds(self):
+        # arrange
+        self.authorize('4')
+        self.authorize('1', txid='card-2')
+        Hold.objects.filter(txid='card-1').update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+
+        # act
+        call_command('expire_holds', once=True, batch_size=1, stdout=out)
+
+        # assert
+        self.assertEqual(
+            dict(Hold.objects.values_list('txid', 'status')), {'card-1': Hold.EXPIRED, 'card-2': Hold.ACTIVE}
+        )
+        self.assertEqual(self.wallet_balances()['held'], Decimal('1'))
+        self.assertIn('Released 1 expired hold(s).', out.getvalue())
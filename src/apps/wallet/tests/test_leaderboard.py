@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet import leaderboard
+from apps.wallet.models import Transaction, Wallet
+
+
+@override_settings(WALLET_LEADERBOARD_SIZE=2, WALLET_LEADERBOARD_SLACK=1)
+class WalletTopTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_get_top_wallets(self):
+        # arrange
+        Wallet.objects.create(label='A', balance='5')
+        Wallet.objects.create(label='B', balance='50')
+        Wallet.objects.create(label='C', balance='10')
+
+        # act
+        response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [
+                {'id': Wallet.objects.get(label='B').id, 'label': 'B', 'balance': '50.00000000'},
+                {'id': Wallet.objects.get(label='C').id, 'label': 'C', 'balance': '10.00000000'},
+            ],
+        )
+
+    def test_get_top_wallets__served_from_cache(self):
+        # arrange
+        Wallet.objects.create(label='A', balance='5')
+        self.client.get(path=reverse('wallet-top'), format='json')
+
+        # act
+        with self.assertNumQueries(0):
+            response = self.client.get(path=reverse('wallet-top'), data={'limit': 1}, format='json')
+
+        # assert
+        self.assertEqual([item['label'] for item in response.data['results']], ['A'])
+
+    def test_get_top_wallets__updated_by_postings(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='5')
+        Wallet.objects.create(label='B', balance='50')
+        Wallet.objects.create(label='C', balance='10')
+        Wallet.objects.create(label='D', balance='1')
+        self.client.get(path=reverse('wallet-top'), format='json')
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(wallet=a, txid='a', amount='95')
+        with self.assertNumQueries(0):
+            response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual([item['label'] for item in response.data['results']], ['A', 'B'])
+        self.assertEqual(response.data['results'][0]['balance'], '100.00000000')
+
+    def test_get_top_wallets__rebuilt_when_wallet_drops_out(self):
+        # arrange
+        Wallet.objects.create(label='A', balance='100')
+        b = Wallet.objects.create(label='B', balance='50')
+        Wallet.objects.create(label='C', balance='10')
+        Wallet.objects.create(label='D', balance='5')
+        self.client.get(path=reverse('wallet-top'), format='json')
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(wallet=b, txid='b', amount='-49')
+        response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual([item['label'] for item in response.data['results']], ['A', 'C'])
+
+    def test_get_top_wallets__deleted_wallet_removed(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='100')
+        Wallet.objects.create(label='B', balance='50')
+        self.client.get(path=reverse('wallet-top'), format='json')
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(path=reverse('wallet-detail', args=[a.id]))
+        response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual([item['label'] for item in response.data['results']], ['B'])
+
+    def test_get_top_wallets__label_change_keeps_posted_balance(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='1')
+        stale = Wallet.objects.get(pk=a.pk)
+        self.client.get(path=reverse('wallet-top'), format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(wallet=a, txid='a', amount='5')
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.apply_changes({'label': 'Renamed'})
+        response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual(response.data['results'][0]['label'], 'Renamed')
+        self.assertEqual(response.data['results'][0]['balance'], '6.00000000')
+
+    def test_get_top_wallets__posting_during_rebuild__not_lost(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='5')
+        Wallet.objects.create(label='B', balance='50')
+        query = leaderboard.query
+
+        def query_then_post():
+            board = query()
+            if not Transaction.objects.filter(txid='a').exists():
+                # Commits after the rebuild has read the balances.
+                with self.captureOnCommitCallbacks(execute=True):
+                    Transaction.objects.create(wallet=a, txid='a', amount='95')
+            return board
+
+        # act
+        with patch.object(leaderboard, 'query', side_effect=query_then_post):
+            self.client.get(path=reverse('wallet-top'), format='json')
+        response = self.client.get(path=reverse('wallet-top'), format='json')
+
+        # assert
+        self.assertEqual([item['label'] for item in response.data['results']], ['A', 'B'])
+        self.assertEqual(response.data['results'][0]['balance'], '100.00000000')
+
+
+@override_settings(WALLET_LEADERBOARD_SIZE=20, WALLET_LEADERBOARD_SLACK=10)
+class ContendedUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_record_many__contended__board_kept_and_exact(self):
+        # arrange
+        wallet = Wallet.objects.create(label='A', balance='10000')
+        leaderboard.top(1)
+        threads, rounds = 16, 200
+
+        def post(number):
+            for round_ in range(rounds):
+                balance = Decimal(number * rounds + round_)
+                leaderboard.record_many([Wallet(pk=1000 + number, label=str(number), balance=balance)])
+
+        # act
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(post, range(threads)))
+
+        # assert
+        board = cache.get(leaderboard.BOARD_KEY)
+        self.assertIsNotNone(board)
+        self.assertEqual(
+            [(entry.wallet_id, entry.balance) for entry in board.entries],
+            [(wallet.pk, Decimal('10000'))]
+            + [(1000 + number, Decimal(number * rounds + rounds - 1)) for number in reversed(range(threads))],
+        )
@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet.models import Wallet
+
+
+@override_settings(WALLET_LIST_CACHE_TTL=60)
+class ListCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = Wallet.objects.create(label='A', balance='10')
+        self.other = Wallet.objects.create(label='B', balance='10')
+
+    def post(self, wallet, txid, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('transaction-list-create'),
+                {'txid': txid, 'amount': amount, 'wallet': wallet.id},
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def balances(self, **params):
+        response = self.client.get(reverse('wallet-list-create'), {'ordering': 'id', **params})
+        return [Decimal(wallet['balance']) for wallet in response.json()['results']]
+
+    def test_list_wallets__repeated__served_from_cache(self):
+        # arrange
+        self.balances()
+
+        # act
+        with self.assertNumQueries(0):
+            balances = self.balances()
+
+        # assert
+        self.assertEqual(balances, [Decimal('10'), Decimal('10')])
+
+    def test_list_wallets__query_normalized(self):
+        # arrange
+        self.client.get(reverse('wallet-list-create'), {'ordering': 'id', 'min_balance': '5'})
+
+        # act
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{reverse("wallet-list-create")}?min_balance=5&ordering=id')
+
+        # assert
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_list_wallets__posting__invalidated(self):
+        # arrange
+        self.balances()
+
+        # act
+        self.post(self.wallet, 'a', '-3')
+
+        # assert
+        self.assertEqual(self.balances(), [Decimal('7'), Decimal('10')])
+
+    def test_list_wallets__hold__invalidated(self):
+        # arrange
+        self.client.get(reverse('wallet-list-create'))
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('hold-list-create', args=[self.wallet.id]), {'txid': 'h', 'amount': '4'}, format='json'
+            )
+
+        # assert
+        response = self.client.get(reverse('wallet-list-create'))
+        self.assertEqual([wallet['available'] for wallet in response.json()['results']], ['6.00000000', '10.00000000'])
+
+    def test_list_transactions__other_wallet_posting__still_cached(self):
+        # arrange
+        self.post(self.wallet, 'a', '1')
+        self.client.get(reverse('transaction-list-create'), {'wallet_id': self.wallet.id})
+
+        # act
+        self.post(self.other, 'b', '1')
+
+        # assert
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('transaction-list-create'), {'wallet_id': self.wallet.id})
+        self.assertEqual([posting['txid'] for posting in response.json()['results']], ['a'])
+
+    def test_list_transactions__own_posting__invalidated(self):
+        # arrange
+        self.post(self.wallet, 'a', '1')
+        self.client.get(reverse('transaction-list-create'), {'wallet_id': self.wallet.id})
+
+        # act
+        self.post(self.wallet, 'b', '1')
+
+        # assert
+        response = self.client.get(reverse('transaction-list-create'), {'wallet_id': self.wallet.id})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_list_wallets__disabled(self):
+        # arrange
+        self.balances()
+
+        # act / assert
+        with override_settings(WALLET_LIST_CACHE_TTL=None), self.assertNumQueries(2):
+            self.balances()
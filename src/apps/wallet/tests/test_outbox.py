@@ -0,0 +1,97 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import ANY
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.serializers import ValidationError
+
+from apps.wallet.models import OutboxEvent, Transaction, Wallet
+from apps.wallet.outbox import Sink
+
+
+class ListSink(Sink):
+    events = []
+
+    def send(self, events):
+        ListSink.events.extend(event.payload['txid'] for event in events)
+
+
+class FailingSink(Sink):
+    def send(self, events):
+        raise ConnectionError('sink unavailable')
+
+
+class OutboxTests(TestCase):
+    def test_posting_writes_event(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='0')
+
+        # act
+        posting = Transaction.objects.create(wallet=wallet, txid='a', amount='1.5')
+
+        # assert
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.topic, OutboxEvent.TRANSACTION_POSTED)
+        self.assertEqual(event.wallet_id, wallet.id)
+        self.assertEqual(
+            event.payload, {'id': posting.id, 'wallet': wallet.id, 'txid': 'a', 'amount': '1.5', 'created_at': ANY}
+        )
+
+    def test_failed_posting_writes_no_event(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='0')
+
+        # act
+        with self.assertRaises(ValidationError):
+            Transaction.objects.create(wallet=wallet, txid='a', amount='-1')
+
+        # assert
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class RelayOutboxTests(TestCase):
+    def setUp(self):
+        ListSink.events = []
+        self.wallet = Wallet.objects.create(label='Test', balance='0')
+        for index in range(5):
+            Transaction.objects.create(wallet=self.wallet, txid=f't{index}', amount='1')
+
+    @override_settings(WALLET_OUTBOX_SINK='apps.wallet.tests.test_outbox.ListSink')
+    def test_relay_outbox(self):
+        # arrange
+        out = StringIO()
+
+        # act
+        call_command('relay_outbox', once=True, batch_size=2, stdout=out)
+
+        # assert
+        self.assertEqual(ListSink.events, ['t0', 't1', 't2', 't3', 't4'])
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertIn('default: relayed 5 event(s)', out.getvalue())
+        self.assertIn('Relayed 5 event(s).', out.getvalue())
+
+    @override_settings(WALLET_OUTBOX_SINK='apps.wallet.tests.test_outbox.FailingSink')
+    def test_relay_outbox__sink_fails__events_kept(self):
+        # act
+        with self.assertRaises(CommandError):
+            call_command('relay_outbox', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(OutboxEvent.objects.count(), 5)
+
+    def test_relay_outbox__file_sink(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'outbox.jsonl'
+
+            # act
+            with override_settings(WALLET_OUTBOX_FILE=path):
+                call_command('relay_outbox', once=True, stdout=StringIO())
+
+            # assert
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([line['payload']['txid'] for line in lines], ['t0', 't1', 't2', 't3', 't4'])
+        self.assertEqual({line['topic'] for line in lines}, {'transaction.posted'})
@@ -0,0 +1,167 @@
+import sys
+import time
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet import profiling
+from apps.wallet.models import Wallet
+
+
+def wait_for_sample() -> None:
+    time.sleep(0.05)
+
+
+@override_settings(WALLET_PROFILE_INTERVAL=0.001)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_profile__samples_stacks_and_sql(self):
+        # act
+        with profiling.profile(sys._getframe()) as result:
+            wait_for_sample()
+            Wallet.objects.count()
+
+        # assert
+        entry = profiling.report(result, path='/')
+        self.assertTrue(any(stack.endswith('test_profiling.wait_for_sample') for stack in entry['stacks']))
+        self.assertEqual(entry['query_count'], 1)
+        self.assertIn('COUNT(*)', entry['queries'][0]['sql'])
+
+    @override_settings(WALLET_PROFILE_BUFFER_SIZE=2)
+    def test_store__ring_buffer(self):
+        # act
+        for path in ['/a', '/b', '/c']:
+            profiling.store({'path': path})
+
+        # assert
+        self.assertEqual([entry['path'] for entry in profiling.reports()], ['/c', '/b'])
+        self.assertIsNone(profiling.get(1))
+        self.assertEqual(profiling.get(3)['path'], '/c')
+
+    def test_collapsed(self):
+        # act
+        output = profiling.collapsed({'stacks': {'a;b': 3, 'a': 1}})
+
+        # assert
+        self.assertEqual(output, 'a;b 3\na 1\n')
+
+
+@override_settings(WALLET_PROFILE_INTERVAL=0.001)
+class ProfilingMiddlewareTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        Wallet.objects.create(label='A', balance='1')
+        self.url = f'{reverse("wallet-list-create")}?ordering=id'
+
+    def test_signed_header__profiled(self):
+        # act
+        response = self.client.get(self.url, headers={profiling.HEADER: profiling.make_token()})
+
+        # assert
+        entry = profiling.get(int(response[profiling.HEADER]))
+        self.assertEqual((entry['path'], entry['status'], entry['reason']), (self.url, 200, 'requested'))
+        self.assertTrue(any('wallet_wallet' in query['sql'] for query in entry['queries']))
+
+    async def test_signed_header__asgi__profiled(self):
+        # act
+        response = await self.async_client.get(self.url, headers={profiling.HEADER: profiling.make_token()})
+
+        # assert
+        entry = await sync_to_async(profiling.get)(int(response[profiling.HEADER]))
+        self.assertEqual((entry['path'], entry['status'], entry['reason']), (self.url, 200, 'requested'))
+        self.assertTrue(any('wallet_wallet' in query['sql'] for query in entry['queries']))
+
+    def test_forged_header__not_profiled(self):
+        # act
+        response = self.client.get(self.url, headers={profiling.HEADER: 'profile:forged'})
+
+        # assert
+        self.assertNotIn(profiling.HEADER, response)
+        self.assertEqual(profiling.reports(), [])
+
+    @override_settings(WALLET_PROFILE_SAMPLE_RATE=1.0, WALLET_PROFILE_SLOW_SECONDS=0)
+    def test_sampled__slow__stored(self):
+        # act
+        self.client.get(self.url)
+
+        # assert
+        self.assertEqual([entry['reason'] for entry in profiling.reports()], ['sampled'])
+
+    @override_settings(WALLET_PROFILE_SAMPLE_RATE=1.0, WALLET_PROFILE_SLOW_SECONDS=60)
+    def test_sampled__fast__dropped(self):
+        # act
+        self.client.get(self.url)
+
+        # assert
+        self.assertEqual(profiling.reports(), [])
+
+
+class ProfileViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.report_id = profiling.store({'path': '/a', 'stacks': {'a': 1}, 'queries': []})
+
+    def test_list__staff(self):
+        # arrange
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+
+        # act
+        response = self.client.get(reverse('profile-list'))
+
+        # assert
+        self.assertEqual(response.json(), [{'path': '/a', 'id': self.report_id}])
+
+    def test_detail__staff(self):
+        # arrange
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+
+        # act
+        response = self.client.get(reverse('profile-detail', args=[self.report_id]))
+
+        # assert
+        self.assertEqual(response.json()['stacks'], {'a': 1})
+
+    def test_list__not_staff__forbidden(self):
+        # arrange
+        self.client.force_authenticate(User.objects.create_user('user'))
+
+        # act
+        response = self.client.get(reverse('profile-list'))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProfilesCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_profiles__collapsed(self):
+        # arrange
+        report_id = profiling.store({'stacks': {'views.get;models.save': 2}})
+        stdout = StringIO()
+
+        # act
+        call_command('profiles', report_id, stdout=stdout)
+
+        # assert
+        self.assertEqual(stdout.getvalue(), 'views.get;models.save 2\n')
+
+    def test_profiles__token(self):
+        # arrange
+        stdout = StringIO()
+
+        # act
+        call_command('profiles', '--token', stdout=stdout)
+
+        # assert
+        self.assertTrue(profiling.is_valid_token(stdout.getvalue().strip()))
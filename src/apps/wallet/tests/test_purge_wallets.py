@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.wallet.models import Transaction, TxidLookup, Wallet
+from apps.wallet.sharding import shard_for_wallet
+
+
+class PurgeWalletsTests(TestCase):
+    def test_purge_wallets(self):
+        # arrange
+        deleted = Wallet.objects.create(label='Deleted', balance='100')
+        kept = Wallet.objects.create(label='Kept', balance='100')
+        for index in range(5):
+            Transaction.objects.create(wallet=deleted, txid=f'd{index}', amount='1')
+        Transaction.objects.create(wallet=kept, txid='k', amount='1')
+        Wallet.objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+        out = StringIO()
+
+        # act
+        call_command('purge_wallets', batch_size=2, stdout=out)
+
+        # assert
+        self.assertEqual(list(Wallet.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertEqual(list(Transaction.objects.values_list('txid', flat=True)), ['k'])
+        self.assertIn(f'Wallet {deleted.pk}: deleted 2/5 transactions', out.getvalue())
+        self.assertIn(f'Wallet {deleted.pk}: deleted 5/5 transactions', out.getvalue())
+        self.assertIn('Purged 1 wallet(s).', out.getvalue())
+
+    def test_purge_wallets__active_wallet_untouched(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Kept', balance='100')
+        Transaction.objects.create(wallet=wallet, txid='k', amount='1')
+
+        # act
+        call_command('purge_wallets', wallet_ids=[wallet.pk], stdout=StringIO())
+
+        # assert
+        self.assertEqual(Wallet.objects.count(), 1)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+@override_settings(WALLET_SHARDS=['default', 'shard_1'])
+class ShardedPurgeWalletsTests(TestCase):
+    databases = {'default', 'shard_1'}
+
+    def test_purge_wallets__txids_released(self):
+        # arrange
+        deleted = Wallet.objects.create(label='Deleted', balance='100')
+        kept = Wallet.objects.create(label='Kept', balance='100')
+        for index in range(3):
+            Transaction.objects.create(wallet=deleted, txid=f'd{index}', amount='1')
+        Transaction.objects.create(wallet=kept, txid='k', amount='1')
+        Wallet.objects.using(shard_for_wallet(deleted.pk)).filter(pk=deleted.pk).update(deleted_at=timezone.now())
+
+        # act
+        call_command('purge_wallets', batch_size=2, stdout=StringIO())
+
+        # assert
+        self.assertFalse(Transaction.objects.using(shard_for_wallet(deleted.pk)).filter(wallet_id=deleted.pk).exists())
+        self.assertEqual(list(TxidLookup.objects.values_list('txid', flat=True)), ['k'])
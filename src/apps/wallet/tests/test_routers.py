@@ -0,0 +1,123 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from apps.wallet.models import Transaction, Wallet
+from apps.wallet.routers import use_primary
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(APITransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reads_go_to_replica(self):
+        # act
+        db = Wallet.objects.all().db
+
+        # assert
+        self.assertEqual(db, 'replica')
+
+    def test_reads_go_to_primary_when_pinned(self):
+        # act
+        with use_primary():
+            db = Wallet.objects.all().db
+
+        # assert
+        self.assertEqual(db, 'default')
+
+    def test_writes_go_to_primary(self):
+        # act
+        wallet = Wallet.objects.create(label='Test', balance='1')
+
+        # assert
+        self.assertEqual(wallet._state.db, 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_go_to_primary_without_replicas(self):
+        # act
+        db = Wallet.objects.all().db
+
+        # assert
+        self.assertEqual(db, 'default')
+
+    def test_posting_reads_wallet_from_primary(self):
+        # arrange
+        Wallet.objects.create(label='Test', balance='10')
+        wallet = Wallet.objects.get()
+
+        # act
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            transaction = Transaction.objects.create(wallet=wallet, txid='abc', amount='-3')
+
+        # assert
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(transaction.wallet._state.db, 'default')
+        self.assertEqual(str(transaction.wallet.balance), '7.00000000')
+
+    def test_client_is_pinned_to_primary_after_write(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='10')
+        self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'cve', 'amount': '1', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # act
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(path=reverse('wallet-detail', args=[wallet.id]), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_client_is_pinned_to_primary_after_write__asgi(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='10')
+        async_to_sync(self.async_client.post)(
+            reverse('transaction-list-create'),
+            {'txid': 'cve', 'amount': '1', 'wallet': wallet.id},
+            content_type='application/json',
+        )
+
+        # act
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = async_to_sync(self.async_client.get)(reverse('wallet-detail', args=[wallet.id]))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_client_reads_from_replica_without_recent_write(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='10')
+
+        # act
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(path=reverse('wallet-detail', args=[wallet.id]), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica_queries), 1)
+
+    @override_settings(WALLET_LIST_CACHE_TTL=60)
+    def test_cached_listing_reads_from_primary(self):
+        # arrange
+        Wallet.objects.create(label='Test', balance='10')
+
+        # act
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(path=reverse('wallet-list-create'), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(len(response.json()['results']), 1)
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.wallet import leaderboard
+from apps.wallet.models import ScheduledPosting, Transaction, Wallet
+
+
+class RunSchedulesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = timezone.now() - timedelta(days=2, hours=1)
+        self.wallet = Wallet.objects.create(label='Test', balance='10')
+
+    def test_run_schedules(self):
+        # arrange
+        schedule = ScheduledPosting.objects.create(
+            wallet=self.wallet, amount='-1', interval=timedelta(days=1), next_run_at=self.start
+        )
+        out = StringIO()
+
+        # act
+        call_command('run_schedules', once=True, stdout=out)
+
+        # assert
+        self.assertEqual(Wallet.objects.get().balance, Decimal('7'))
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('txid', flat=True)),
+            sorted(schedule.txid(self.start + timedelta(days=day)) for day in range(3)),
+        )
+        self.assertEqual(ScheduledPosting.objects.get().next_run_at, self.start + timedelta(days=3))
+        self.assertIn('Applied 1 schedule(s): posted 3 run(s)', out.getvalue())
+
+    def test_run_schedules__one_off(self):
+        # arrange
+        ScheduledPosting.objects.create(wallet=self.wallet, amount='5', next_run_at=self.start)
+
+        # act
+        call_command('run_schedules', once=True, stdout=StringIO())
+        call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(Wallet.objects.get().balance, Decimal('15'))
+        self.assertIsNone(ScheduledPosting.objects.get().next_run_at)
+
+    def test_run_schedules__run_retried__posted_once(self):
+        # arrange
+        ScheduledPosting.objects.create(
+            wallet=self.wallet, amount='1', interval=timedelta(days=1), next_run_at=self.start
+        )
+        call_command('run_schedules', once=True, stdout=StringIO())
+        ScheduledPosting.objects.update(next_run_at=self.start)
+
+        # act
+        call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(Transaction.objects.count(), 3)
+        self.assertEqual(Wallet.objects.get().balance, Decimal('13'))
+
+    def test_run_schedules__caught_up_in_batches(self):
+        # arrange
+        other = Wallet.objects.create(label='Other', balance='0')
+        ScheduledPosting.objects.create(
+            wallet=self.wallet, amount='1', interval=timedelta(days=1), next_run_at=self.start
+        )
+        ScheduledPosting.objects.create(wallet=other, amount='2', interval=timedelta(hours=1), next_run_at=self.start)
+
+        # act
+        call_command('run_schedules', once=True, batch_size=1, max_runs=2, stdout=StringIO())
+
+        # assert
+        self.assertEqual(Wallet.objects.get(pk=self.wallet.pk).balance, Decimal('13'))
+        self.assertEqual(Wallet.objects.get(pk=other.pk).balance, Decimal('100'))
+        self.assertFalse(ScheduledPosting.objects.filter(next_run_at__lte=timezone.now()).exists())
+
+    def test_run_schedules__overdraft__deferred(self):
+        # arrange
+        ScheduledPosting.objects.create(wallet=self.wallet, amount='-100', next_run_at=self.start)
+        out = StringIO()
+
+        # act
+        call_command('run_schedules', once=True, stdout=out)
+
+        # assert
+        self.assertEqual(Wallet.objects.get().balance, Decimal('10'))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(ScheduledPosting.objects.get().next_run_at, self.start)
+        self.assertIn('rejected 0, deferred 1', out.getvalue())
+
+    def test_run_schedules__credit_due_before_debit__both_posted(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Empty', balance='0')
+        ScheduledPosting.objects.create(wallet=wallet, amount='100', next_run_at=self.start)
+        ScheduledPosting.objects.create(wallet=wallet, amount='-5', next_run_at=self.start + timedelta(minutes=1))
+
+        # act
+        call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(Wallet.objects.get(pk=wallet.pk).balance, Decimal('95'))
+        self.assertFalse(ScheduledPosting.objects.filter(next_run_at__isnull=False).exists())
+
+    def test_run_schedules__debit_due_before_credit__retried_after_credit(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Empty', balance='0')
+        fee = ScheduledPosting.objects.create(wallet=wallet, amount='-5', next_run_at=self.start)
+        ScheduledPosting.objects.create(wallet=wallet, amount='100', next_run_at=self.start + timedelta(minutes=1))
+        call_command('run_schedules', once=True, stdout=StringIO())
+        credited = Wallet.objects.get(pk=wallet.pk).balance
+
+        # act
+        call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(credited, Decimal('100'))
+        self.assertEqual(Wallet.objects.get(pk=wallet.pk).balance, Decimal('95'))
+        self.assertEqual(Transaction.objects.filter(txid=fee.txid(self.start)).count(), 1)
+
+    def test_run_schedules__catch_up_partly_affordable__affordable_runs_posted(self):
+        # arrange
+        schedule = ScheduledPosting.objects.create(
+            wallet=self.wallet, amount='-4', interval=timedelta(days=1), next_run_at=self.start
+        )
+
+        # act
+        call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(Wallet.objects.get().balance, Decimal('2'))
+        self.assertEqual(ScheduledPosting.objects.get().next_run_at, self.start + timedelta(days=2))
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('txid', flat=True)),
+            sorted(schedule.txid(self.start + timedelta(days=day)) for day in range(2)),
+        )
+
+    def test_run_schedules__leaderboard_updated(self):
+        # arrange
+        other = Wallet.objects.create(label='Other', balance='5')
+        ScheduledPosting.objects.create(wallet=other, amount='10', next_run_at=self.start)
+        leaderboard.top(10)
+
+        # act
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_schedules', once=True, stdout=StringIO())
+
+        # assert
+        self.assertEqual(
+            [(entry.wallet_id, entry.balance) for entry in leaderboard.top(10)],
+            [(other.pk, Decimal('15')), (self.wallet.pk, Decimal('10'))],
+        )
@@ -0,0 +1,154 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet.models import Transaction, TxidLookup, Wallet
+from apps.wallet.sharding import shard_for_wallet
+
+
+@override_settings(WALLET_SHARDS=['default', 'shard_1'])
+class ShardingTests(APITestCase):
+    databases = {'default', 'shard_1'}
+
+    def test_create_wallets__spread_over_shards(self):
+        # act
+        ids = [
+            self.client.post(path=reverse('wallet-list-create'), data={'label': label}, format='json').data['id']
+            for label in ('A', 'B')
+        ]
+
+        # assert
+        self.assertEqual({shard_for_wallet(wallet_id) for wallet_id in ids}, {'default', 'shard_1'})
+        for wallet_id in ids:
+            self.assertTrue(Wallet.objects.using(shard_for_wallet(wallet_id)).filter(pk=wallet_id).exists())
+
+    def test_create_transaction__posted_on_wallet_shard(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='10')
+        shard = shard_for_wallet(wallet.id)
+
+        # act
+        response = self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'cve', 'amount': '-1.5', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Wallet.objects.using(shard).get(pk=wallet.id).balance, Decimal('8.5'))
+        self.assertEqual(Transaction.objects.using(shard).get().pk, response.data['id'])
+        self.assertEqual(TxidLookup.objects.get(txid='cve').pk, response.data['id'])
+
+    def test_create_transaction__txid_duplicate_on_other_shard__bad_request(self):
+        # arrange
+        wallet1 = Wallet.objects.create(label='A', balance='10')
+        wallet2 = Wallet.objects.create(label='B', balance='10')
+        Transaction.objects.create(wallet=wallet1, txid='cve', amount='1')
+
+        # act
+        response = self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'cve', 'amount': '1', 'wallet': wallet2.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Wallet.objects.using(shard_for_wallet(wallet2.id)).get(pk=wallet2.id).balance, Decimal('10'))
+
+    def test_create_transaction__negative_balance__txid_released(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='1')
+
+        # act
+        response = self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'cve', 'amount': '-2', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TxidLookup.objects.exists())
+
+    def test_get_transaction__found_on_shard(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test', balance='1')
+        transaction = Transaction.objects.create(wallet=wallet, txid='abc', amount='2')
+
+        # act
+        response = self.client.get(path=reverse('transaction-detail', args=[transaction.id]), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['txid'], 'abc')
+
+    def test_get_many_transactions__merged_with_keyset_pagination(self):
+        # arrange
+        wallet1 = Wallet.objects.create(label='A', balance='100')
+        wallet2 = Wallet.objects.create(label='B', balance='100')
+        for txid, wallet, amount in [
+            ('a', wallet1, '5'),
+            ('b', wallet2, '4'),
+            ('c', wallet1, '3'),
+            ('d', wallet2, '2'),
+        ]:
+            Transaction.objects.create(wallet=wallet, txid=txid, amount=amount)
+
+        # act
+        first = self.client.get(
+            path=reverse('transaction-list-create'), data={'ordering': '-amount', 'page_size': 3}, format='json'
+        )
+        second = self.client.get(path=first.data['links']['next'], format='json')
+
+        # assert
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['txid'] for item in first.data['results']], ['a', 'b', 'c'])
+        self.assertEqual([item['txid'] for item in second.data['results']], ['d'])
+        self.assertIsNone(second.data['links']['next'])
+
+    def test_get_many_transactions__wallet_filter_queries_one_shard(self):
+        # arrange
+        wallet = Wallet.objects.create(label='A', balance='100')
+        Transaction.objects.create(wallet=wallet, txid='a', amount='1')
+
+        # act
+        with self.assertNumQueries(1, using=shard_for_wallet(wallet.id)):
+            response = self.client.get(
+                path=reverse('transaction-list-create'), data={'wallet_id': wallet.id}, format='json'
+            )
+
+        # assert
+        self.assertEqual([item['txid'] for item in response.data['results']], ['a'])
+
+    def test_get_many_wallets__merged_by_id(self):
+        # arrange
+        wallets = [Wallet.objects.create(label=label, balance='1') for label in ('A', 'B', 'C')]
+
+        # act
+        response = self.client.get(path=reverse('wallet-list-create'), data={'ordering': 'id'}, format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [wallet.id for wallet in wallets])
+
+    def test_get_many_wallets__include_transactions_from_each_shard(self):
+        # arrange
+        wallets = [Wallet.objects.create(label=label, balance='10') for label in ('A', 'B')]
+        for wallet in wallets:
+            Transaction.objects.create(wallet=wallet, txid=f'tx-{wallet.label}', amount='1')
+
+        # act
+        response = self.client.get(
+            path=reverse('wallet-list-create'), data={'ordering': 'id', 'include': 'transactions'}, format='json'
+        )
+
+        # assert
+        self.assertEqual(
+            [[posting['txid'] for posting in item['transactions']] for item in response.data['results']],
+            [['tx-A'], ['tx-B']],
+        )
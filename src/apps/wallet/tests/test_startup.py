@@ -0,0 +1,53 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+
+ROOT = Path(__file__).resolve().parents[4]
+
+# What a worker does before serving its first request.
+BOOT = 'import src.wsgi; from django.urls import resolve; resolve("/api/v1/wallets/")'
+
+# Generous: a worker boots in well under half of this on a laptop. Meant to catch a heavy import sneaking in.
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def import_times(settings_module: str) -> dict[str, float]:
+    """Boot a worker with `python -X importtime` and return the self import time of every module, in seconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=ROOT,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)', line)
+        if match:
+            times[match[2]] = int(match[1]) / 1_000_000
+    return times
+
+
+# The SQLite settings stand in for production, which boots the same apart from the database driver.
+class StartupTests(SimpleTestCase):
+    def test_api_profile_boot(self):
+        # act
+        api = import_times('src.settings.test_api')
+        full = import_times('src.settings.test')
+
+        # assert
+        # The admin itself is still imported by `rest_framework.schemas`, but not registered or autodiscovered.
+        unused = [
+            module for module in api if module.startswith(('django.contrib.sessions', 'django.contrib.staticfiles'))
+        ]
+        self.assertEqual(unused, [])
+        # Test utilities are not for workers (`django.test` alone takes over 10 ms).
+        self.assertEqual([module for module in {**api, **full} if module.split('.')[:2] == ['django', 'test']], [])
+        self.assertLess(len(api), len(full))
+        self.assertLess(sum(api.values()), IMPORT_BUDGET_SECONDS)
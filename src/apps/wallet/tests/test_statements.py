@@ -0,0 +1,128 @@
+import csv
+import tempfile
+from datetime import UTC, datetime
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone as django_timezone
+
+from apps.wallet import statements
+from apps.wallet.accrual import Range
+from apps.wallet.models import Transaction, Wallet
+
+
+def create_wallet(label: str, balance: str, created_at: datetime | None = datetime(2025, 1, 1, tzinfo=UTC)) -> Wallet:
+    wallet = Wallet.objects.create(label=label, balance=balance)
+    Wallet.objects.filter(pk=wallet.pk).update(created_at=created_at)
+    return wallet
+
+
+def post(wallet: Wallet, txid: str, amount: str, created_at: datetime) -> None:
+    Transaction.objects.create(wallet=wallet, txid=txid, amount=amount)
+    Transaction.objects.filter(txid=txid).update(created_at=created_at)
+
+
+class GenerateStatementsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = Path(directory.name) / 'statements'
+        self.wallet = create_wallet('A', '10')
+        post(self.wallet, 'before', '5', datetime(2025, 9, 15, tzinfo=UTC))
+        post(self.wallet, 'first', '3', datetime(2025, 10, 5, tzinfo=UTC))
+        post(self.wallet, 'second', '-2', datetime(2025, 10, 20, tzinfo=UTC))
+        post(self.wallet, 'after', '1', datetime(2025, 11, 3, tzinfo=UTC))
+
+    def generate(self, *args):
+        stdout = StringIO()
+        call_command('generate_statements', '2025-10-01', '2025-11-01', str(self.output), *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def read(self, wallet):
+        with statements.statement_path(self.output, wallet.pk).open() as file:
+            return [(row['entry'], row['txid'], row['amount'], row['balance']) for row in csv.DictReader(file)]
+
+    def test_generate_statements(self):
+        # act
+        self.generate()
+
+        # assert
+        rows = self.read(self.wallet)
+        self.assertEqual(
+            [(entry, txid) for entry, txid, _, _ in rows],
+            [('opening', ''), ('transaction', 'first'), ('transaction', 'second'), ('closing', '')],
+        )
+        self.assertEqual([float(balance) for *_, balance in rows], [15, 18, 16, 16])
+
+    def test_generate_statements__deleted_and_quiet_wallets(self):
+        # arrange
+        deleted = create_wallet('B', '1')
+        post(deleted, 'deleted', '1', datetime(2025, 10, 6, tzinfo=UTC))
+        deleted.deleted_at = django_timezone.now()
+        deleted.save()
+        quiet = create_wallet('C', '4')
+
+        # act
+        output = self.generate('--chunk-size', '2')
+
+        # assert
+        self.assertIn('Wrote 2 statement(s) in 2 range(s)', output)
+        self.assertFalse(statements.statement_path(self.output, deleted.pk).exists())
+        self.assertEqual(
+            [(entry, balance) for entry, _, _, balance in self.read(quiet)],
+            [('opening', '4.00000000'), ('closing', '4.00000000')],
+        )
+        self.assertEqual(len(self.read(self.wallet)), 4)
+
+    def test_generate_statements__created_after_period__skipped(self):
+        # arrange
+        later = create_wallet('B', '7', created_at=datetime(2025, 11, 2, tzinfo=UTC))
+        unrecorded = create_wallet('C', '4', created_at=None)
+
+        # act
+        output = self.generate()
+
+        # assert
+        self.assertIn('Wrote 2 statement(s)', output)
+        self.assertFalse(statements.statement_path(self.output, later.pk).exists())
+        self.assertEqual(
+            [(entry, balance) for entry, _, _, balance in self.read(unrecorded)],
+            [('opening', '4.00000000'), ('closing', '4.00000000')],
+        )
+
+    def test_statement_path(self):
+        # act
+        path = statements.statement_path(self.output, 12345)
+
+        # assert
+        self.assertEqual(path, self.output / '000012' / '12345.csv')
+
+    def test_generate_statements__rerun__resumes(self):
+        # arrange
+        quiet = create_wallet('C', '4')
+        self.generate('--chunk-size', '1')
+        # As if the run had stopped before finishing the second range.
+        statements.marker_path(self.output, Range('default', quiet.pk, quiet.pk + 1)).unlink()
+        statements.statement_path(self.output, quiet.pk).unlink()
+
+        # act
+        output = self.generate('--chunk-size', '1')
+
+        # assert
+        self.assertIn('Wrote 1 statement(s) in 1 range(s)', output)
+        self.assertTrue(statements.statement_path(self.output, quiet.pk).exists())
+
+    def test_generate_statements__other_period__rejected(self):
+        # arrange
+        self.generate()
+
+        # act / assert
+        with self.assertRaisesMessage(CommandError, 'holds the statements of another period'):
+            call_command('generate_statements', '2025-09-01', '2025-10-01', str(self.output), stdout=StringIO())
+
+    def test_generate_statements__period_not_over__rejected(self):
+        # act / assert
+        with self.assertRaisesMessage(CommandError, 'The period has not ended yet.'):
+            call_command('generate_statements', '2025-10-01', '2999-01-01', str(self.output), stdout=StringIO())
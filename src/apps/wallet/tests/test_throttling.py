@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APITestCase
+
+from apps.wallet import throttling
+from apps.wallet.models import Transaction, Wallet
+
+
+class PostingThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = Wallet.objects.create(label='Test', balance='0')
+        self.other = Wallet.objects.create(label='Other', balance='0')
+
+    def post(self, wallet, txid):
+        return self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'wallet': wallet.id, 'txid': txid, 'amount': '1'},
+            format='json',
+        )
+
+    @override_settings(WALLET_POSTING_RATE_PER_CLIENT=(0.001, 3))
+    def test_create_transaction__client_over_rate__too_many_requests(self):
+        # arrange
+        for index in range(3):
+            self.post(self.wallet if index % 2 else self.other, f't{index}')
+
+        # act
+        response = self.post(self.wallet, 'over')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    @override_settings(WALLET_POSTING_RATE_PER_WALLET=(0.001, 2))
+    def test_create_transaction__wallet_over_rate__too_many_requests(self):
+        # arrange
+        self.post(self.wallet, 'a')
+        self.post(self.wallet, 'b')
+
+        # act
+        rejected = self.post(self.wallet, 'c')
+        accepted = self.post(self.other, 'd')
+
+        # assert
+        self.assertEqual(rejected.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(accepted.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(WALLET_POSTING_RATE_PER_CLIENT=(0.001, 1))
+    def test_list_transactions__not_throttled(self):
+        # arrange
+        self.post(self.wallet, 'a')
+
+        # act
+        response = self.client.get(path=reverse('transaction-list-create'), format='json')
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(WALLET_POSTING_CONCURRENCY=1, WALLET_POSTING_RETRY_AFTER=2)
+    def test_create_transaction__wallet_busy__too_many_requests(self):
+        # act
+        with throttling.posting_slot(self.wallet.id):
+            rejected = self.post(self.wallet, 'a')
+        accepted = self.post(self.wallet, 'b')
+
+        # assert
+        self.assertEqual(rejected.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejected['Retry-After'], '2')
+        self.assertEqual(accepted.status_code, status.HTTP_201_CREATED)
+
+
+class AdmissionLoadTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_take_token__bucket_empty__wait_for_next_token(self):
+        # act
+        taken = [throttling.take_token('bucket', rate=10, burst=5) for _ in range(6)]
+
+        # assert
+        self.assertEqual(taken[:5], [0] * 5)
+        self.assertGreater(taken[5], 0)
+        self.assertLessEqual(taken[5], 0.1)
+
+    @override_settings(WALLET_POSTING_CONCURRENCY=4)
+    def test_posting_slot__concurrent_requests_capped(self):
+        # arrange
+        requests = 32
+        release = threading.Event()
+
+        def attempt():
+            try:
+                with throttling.posting_slot(1):
+                    release.wait(timeout=5)
+                    return True
+            except Throttled:
+                return False
+
+        # act
+        with ThreadPoolExecutor(max_workers=requests) as pool:
+            futures = [pool.submit(attempt) for _ in range(requests)]
+            # Admitted requests hold their slot until every other request has been turned away.
+            rejected = [future.result() for future in islice(as_completed(futures, timeout=5), requests - 4)]
+            release.set()
+            admitted = [future.result() for future in futures]
+
+        # assert
+        self.assertEqual(rejected, [False] * (requests - 4))
+        self.assertEqual(admitted.count(True), 4)
+        self.assertEqual(cache.get('wallet:in-flight:1'), 0)
+
+    @override_settings(WALLET_POSTING_CONCURRENCY=1)
+    def test_posting_slot__counter_expired_while_held__not_negative(self):
+        # arrange
+        with throttling.posting_slot(1):
+            cache.delete('wallet:in-flight:1')
+            with throttling.posting_slot(1):
+                pass
+
+        # act
+        with throttling.posting_slot(1), self.assertRaises(Throttled), throttling.posting_slot(1):
+            pass
+
+        # assert
+        self.assertEqual(cache.get('wallet:in-flight:1'), 0)
@@ -0,0 +1,177 @@
+from decimal import Decimal
+from unittest.mock import ANY
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet.models import Transaction, Wallet
+
+
+class CreateTransferTests(APITestCase):
+    def test_create_transfer(self):
+        # arrange
+        source = Wallet.objects.create(label='Source', balance='10')
+        destination = Wallet.objects.create(label='Destination', balance='1')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': source.id, 'destination_wallet': destination.id, 'amount': '2.5', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Wallet.objects.get(id=source.id).balance, Decimal('7.5'))
+        self.assertEqual(Wallet.objects.get(id=destination.id).balance, Decimal('3.5'))
+        self.assertEqual(
+            response.data,
+            {
+                'source_wallet': source.id,
+                'destination_wallet': destination.id,
+                'amount': '2.50000000',
+                'txid': 'tx',
+                'debit': {
+                    'id': ANY,
+                    'wallet': source.id,
+                    'txid': 'tx:debit',
+                    'amount': '-2.50000000',
+                    'created_at': ANY,
+                },
+                'credit': {
+                    'id': ANY,
+                    'wallet': destination.id,
+                    'txid': 'tx:credit',
+                    'amount': '2.50000000',
+                    'created_at': ANY,
+                },
+            },
+        )
+
+    def test_create_transfer__negative_balance__bad_request(self):
+        # arrange
+        source = Wallet.objects.create(label='Source', balance='1')
+        destination = Wallet.objects.create(label='Destination', balance='1')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': source.id, 'destination_wallet': destination.id, 'amount': '2', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.assertEqual(Wallet.objects.get(id=destination.id).balance, Decimal('1'))
+
+    def test_create_transfer__same_wallet__bad_request(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Source', balance='10')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': wallet.id, 'destination_wallet': wallet.id, 'amount': '1', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_transfer__different_currencies__bad_request(self):
+        # arrange
+        source = Wallet.objects.create(label='Source', currency='USD', balance='10')
+        destination = Wallet.objects.create(label='Destination', currency='EUR', balance='0')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': source.id, 'destination_wallet': destination.id, 'amount': '1', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Wallet.objects.get(id=source.id).balance, Decimal('10'))
+
+    def test_create_transfer__wallet_not_found__bad_request(self):
+        # arrange
+        source = Wallet.objects.create(label='Source', balance='10')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': source.id, 'destination_wallet': source.id + 1, 'amount': '1', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Wallet.objects.get().balance, Decimal('10'))
+
+    def test_create_transfer__txid_duplicate__bad_request(self):
+        # arrange
+        source = Wallet.objects.create(label='Source', balance='10')
+        destination = Wallet.objects.create(label='Destination', balance='1')
+        Transaction.objects.create(wallet=source, txid='tx:credit', amount='1')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-create'),
+            data={'source_wallet': source.id, 'destination_wallet': destination.id, 'amount': '1', 'txid': 'tx'},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+class CreateTransferBatchTests(APITestCase):
+    def test_create_transfer_batch(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='10')
+        b = Wallet.objects.create(label='B', balance='0')
+        c = Wallet.objects.create(label='C', balance='0')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-batch-create'),
+            data=[
+                {'source_wallet': a.id, 'destination_wallet': b.id, 'amount': '4', 'txid': 't1'},
+                {'source_wallet': b.id, 'destination_wallet': c.id, 'amount': '3', 'txid': 't2'},
+            ],
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            dict(Wallet.objects.values_list('label', 'balance')),
+            {'A': Decimal('6'), 'B': Decimal('1'), 'C': Decimal('3')},
+        )
+        self.assertEqual(Transaction.objects.count(), 4)
+        self.assertEqual([item['credit']['txid'] for item in response.data], ['t1:credit', 't2:credit'])
+        self.assertTrue(all(item['debit']['id'] for item in response.data))
+
+    def test_create_transfer_batch__one_overdraws__nothing_posted(self):
+        # arrange
+        a = Wallet.objects.create(label='A', balance='10')
+        b = Wallet.objects.create(label='B', balance='0')
+
+        # act
+        response = self.client.post(
+            path=reverse('transfer-batch-create'),
+            data=[
+                {'source_wallet': a.id, 'destination_wallet': b.id, 'amount': '4', 'txid': 't1'},
+                {'source_wallet': b.id, 'destination_wallet': a.id, 'amount': '5', 'txid': 't2'},
+            ],
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.assertEqual(dict(Wallet.objects.values_list('label', 'balance')), {'A': Decimal('10'), 'B': Decimal('0')})
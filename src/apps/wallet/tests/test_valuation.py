@@ -0,0 +1,135 @@
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.wallet import fx
+from apps.wallet.models import ExchangeRate, Wallet
+
+
+class ValuationTests(APITestCase):
+    def setUp(self):
+        fx.invalidate()
+        ExchangeRate.objects.bulk_create(
+            [ExchangeRate(currency='USD', rate='1'), ExchangeRate(currency='EUR', rate='1.1')]
+        )
+        Wallet.objects.create(label='A', currency='USD', balance='10')
+        Wallet.objects.create(label='B', currency='EUR', balance='20')
+        Wallet.objects.create(label='C', currency='EUR', balance='5')
+        Wallet.objects.create(label='D', currency='EUR', balance='100', deleted_at=timezone.now())
+
+    def test_valuation(self):
+        # act
+        response = self.client.get(reverse('wallet-valuation'))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                'currency': 'USD',
+                'total': '37.50000000',
+                'currencies': [
+                    {
+                        'currency': 'EUR',
+                        'wallets': 2,
+                        'balance': '25.00000000',
+                        'rate': '1.100000000000',
+                        'value': '27.50000000',
+                    },
+                    {
+                        'currency': 'USD',
+                        'wallets': 1,
+                        'balance': '10.00000000',
+                        'rate': '1.000000000000',
+                        'value': '10.00000000',
+                    },
+                ],
+            },
+        )
+
+    def test_valuation__other_currency__missing_rate(self):
+        # arrange
+        Wallet.objects.create(label='E', currency='GBP', balance='1')
+
+        # act
+        response = self.client.get(reverse('wallet-valuation'), {'currency': 'EUR'})
+
+        # assert
+        self.assertEqual(response.data['total'], '34.09090909')
+        self.assertEqual(
+            [(entry['currency'], entry['value']) for entry in response.data['currencies']],
+            [('EUR', '25.00000000'), ('GBP', None), ('USD', '9.09090909')],
+        )
+
+    def test_valuation__invalid_currency__bad_request(self):
+        # act
+        response = self.client.get(reverse('wallet-valuation'), {'currency': 'euro'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(WALLET_FX_RATES_TTL=3600)
+    def test_rates__cached(self):
+        # arrange
+        fx.rates()
+        ExchangeRate.objects.filter(currency='EUR').update(rate='2')
+
+        # act
+        cached = fx.rates()['EUR']
+        fx.invalidate()
+        reloaded = fx.rates()['EUR']
+
+        # assert
+        self.assertEqual((cached, reloaded), (Decimal('1.1'), Decimal('2')))
+
+    def test_load_rates(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'rates.json'
+            path.write_text(json.dumps({'EUR': '1.2', 'JPY': 0.0067}))
+
+            # act
+            call_command('load_rates', str(path), stdout=StringIO())
+
+        # assert
+        self.assertEqual(
+            dict(ExchangeRate.objects.values_list('currency', 'rate')),
+            {'USD': Decimal('1'), 'EUR': Decimal('1.2'), 'JPY': Decimal('0.0067')},
+        )
+        self.assertEqual(fx.rates()['EUR'], Decimal('1.2'))
+
+    def test_load_rates__reloaded__rates_replaced(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'rates.json'
+            path.write_text(json.dumps({'EUR': '1.2', 'JPY': '0.0067'}))
+            call_command('load_rates', str(path), stdout=StringIO())
+            path.write_text(json.dumps({'EUR': '1.3', 'JPY': '0.0067'}))
+
+            # act
+            call_command('load_rates', str(path), stdout=StringIO())
+
+        # assert
+        self.assertEqual(
+            dict(ExchangeRate.objects.values_list('currency', 'rate')),
+            {'USD': Decimal('1'), 'EUR': Decimal('1.3'), 'JPY': Decimal('0.0067')},
+        )
+
+    def test_load_rates__invalid_currency__error(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'rates.json'
+            path.write_text(json.dumps({'euro': '1.2'}))
+
+            # act / assert
+            with self.assertRaises(CommandError):
+                call_command('load_rates', str(path), stdout=StringIO())
@@ -2,11 +2,12 @@ from decimal import Decimal
 from unittest.mock import ANY
 
 from django.forms.models import model_to_dict
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from apps.wallet.models import Wallet
+from apps.wallet.models import Transaction, Wallet
 
 
 class GetWalletTests(APITestCase):
@@ -19,7 +20,17 @@ class GetWalletTests(APITestCase):
 
         # assert
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, {'id': wallet.id, 'label': 'Test wallet', 'balance': '1.00001000'})
+        self.assertEqual(
+            response.data,
+            {
+                'id': wallet.id,
+                'label': 'Test wallet',
+                'currency': 'USD',
+                'balance': '1.00001000',
+                'held': '0.00000000',
+                'available': '1.00001000',
+            },
+        )
 
     def test_get_wallet__not_found_error(self):
         # act
@@ -42,9 +53,28 @@ class CreateWalletTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Wallet.objects.count(), 1)
         self.assertEqual(
-            model_to_dict(Wallet.objects.get()), {'id': ANY, 'label': 'Test wallet', 'balance': Decimal('0')}
+            model_to_dict(Wallet.objects.get()),
+            {
+                'id': ANY,
+                'label': 'Test wallet',
+                'currency': 'USD',
+                'balance': Decimal('0'),
+                'held': Decimal('0'),
+                'deleted_at': None,
+                'version': 0,
+            },
+        )
+        self.assertEqual(
+            response.data,
+            {
+                'id': ANY,
+                'label': 'Test wallet',
+                'currency': 'USD',
+                'balance': '0.00000000',
+                'held': '0.00000000',
+                'available': '0.00000000',
+            },
         )
-        self.assertEqual(response.data, {'id': ANY, 'label': 'Test wallet', 'balance': '0.00000000'})
 
 
 class UpdateWalletTests(APITestCase):
@@ -63,9 +93,93 @@ class UpdateWalletTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(
             model_to_dict(Wallet.objects.get(id=wallet.id)),
-            {'id': wallet.id, 'label': 'New name', 'balance': Decimal('1.00001')},
+            {
+                'id': wallet.id,
+                'label': 'New name',
+                'currency': 'USD',
+                'balance': Decimal('1.00001'),
+                'held': Decimal('0'),
+                'deleted_at': None,
+                'version': 1,
+            },
+        )
+        self.assertEqual(
+            response.data,
+            {
+                'id': ANY,
+                'label': 'New name',
+                'currency': 'USD',
+                'balance': '1.00001000',
+                'held': '0.00000000',
+                'available': '1.00001000',
+            },
+        )
+
+    def test_update_wallet__currency_changed__bad_request(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', currency='EUR', balance='1')
+
+        # act
+        response = self.client.patch(
+            path=reverse('wallet-detail', args=[wallet.id]), data={'currency': 'USD'}, format='json'
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Wallet.objects.get(id=wallet.id).currency, 'EUR')
+
+    def test_update_wallet__if_match(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', balance='1')
+        etag = self.client.get(path=reverse('wallet-detail', args=[wallet.id]), format='json')['ETag']
+
+        # act
+        response = self.client.patch(
+            path=reverse('wallet-detail', args=[wallet.id]),
+            data={'label': 'New name'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(etag, '"0"')
+        self.assertEqual(response['ETag'], '"1"')
+        self.assertEqual(Wallet.objects.get(id=wallet.id).label, 'New name')
+
+    def test_update_wallet__if_match_stale__precondition_failed(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', balance='1')
+        etag = self.client.get(path=reverse('wallet-detail', args=[wallet.id]), format='json')['ETag']
+        Transaction.objects.create(wallet=wallet, txid='tx', amount='1')
+
+        # act
+        response = self.client.patch(
+            path=reverse('wallet-detail', args=[wallet.id]),
+            data={'label': 'New name'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Wallet.objects.get(id=wallet.id).label, 'Test wallet')
+
+    def test_update_wallet__balance_not_rewritten(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', balance='1')
+        stale = Wallet.objects.get(id=wallet.id)
+        Transaction.objects.create(wallet=wallet, txid='tx', amount='5')
+
+        # act
+        stale.apply_changes({'label': 'New name'})
+
+        # assert
+        self.assertEqual(
+            Wallet.objects.values('label', 'balance', 'version').get(id=wallet.id),
+            {'label': 'New name', 'balance': Decimal('6'), 'version': 2},
         )
-        self.assertEqual(response.data, {'id': ANY, 'label': 'New name', 'balance': '1.00001000'})
+        self.assertEqual(stale.version, 2)
 
     def test_update_wallet__not_found_error(self):
         # act
@@ -94,6 +208,40 @@ class DeleteWalletTests(APITestCase):
         # assert
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    @override_settings(WALLET_SOFT_DELETE=True)
+    def test_delete_wallet__soft_delete(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', balance='10')
+        Transaction.objects.create(wallet=wallet, txid='abc', amount='1')
+
+        # act
+        response = self.client.delete(path=reverse('wallet-detail', args=[wallet.id]))
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNotNone(Wallet.objects.get().deleted_at)
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(
+            self.client.get(path=reverse('wallet-detail', args=[wallet.id])).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    @override_settings(WALLET_SOFT_DELETE=True)
+    def test_delete_wallet__soft_delete__postings_rejected(self):
+        # arrange
+        wallet = Wallet.objects.create(label='Test wallet', balance='10')
+        self.client.delete(path=reverse('wallet-detail', args=[wallet.id]))
+
+        # act
+        response = self.client.post(
+            path=reverse('transaction-list-create'),
+            data={'txid': 'cve', 'amount': '1', 'wallet': wallet.id},
+            format='json',
+        )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Wallet.objects.get().balance, Decimal('10'))
+
 
 class GetManyWalletsTests(APITestCase):
     def test_get_many_wallets(self):
@@ -117,8 +265,22 @@ class GetManyWalletsTests(APITestCase):
                 },
                 'meta': {'pagination': {'count': 2, 'page': 1, 'pages': 1}},
                 'results': [
-                    {'id': ANY, 'label': 'Test wallet', 'balance': '1.00000000'},
-                    {'id': ANY, 'label': 'Second wallet', 'balance': '1.00000000'},
+                    {
+                        'id': ANY,
+                        'label': 'Test wallet',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
+                    {
+                        'id': ANY,
+                        'label': 'Second wallet',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
                 ],
             },
         )
@@ -149,8 +311,22 @@ class GetManyWalletsTests(APITestCase):
                 },
                 'meta': {'pagination': {'count': 5, 'page': 2, 'pages': 3}},
                 'results': [
-                    {'id': ANY, 'label': 'CCC', 'balance': '1.00000000'},
-                    {'id': ANY, 'label': 'DDD', 'balance': '1.00000000'},
+                    {
+                        'id': ANY,
+                        'label': 'CCC',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
+                    {
+                        'id': ANY,
+                        'label': 'DDD',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
                 ],
             },
         )
@@ -191,8 +367,22 @@ class GetManyWalletsTests(APITestCase):
                 },
                 'meta': {'pagination': {'count': 2, 'page': 1, 'pages': 1}},
                 'results': [
-                    {'id': ANY, 'label': 'Jason Wallet', 'balance': '1.00000000'},
-                    {'id': ANY, 'label': 'my new walleT', 'balance': '1.00000000'},
+                    {
+                        'id': ANY,
+                        'label': 'Jason Wallet',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
+                    {
+                        'id': ANY,
+                        'label': 'my new walleT',
+                        'currency': 'USD',
+                        'balance': '1.00000000',
+                        'held': '0.00000000',
+                        'available': '1.00000000',
+                    },
                 ],
             },
         )
@@ -224,8 +414,90 @@ class GetManyWalletsTests(APITestCase):
                 },
                 'meta': {'pagination': {'count': 2, 'page': 1, 'pages': 1}},
                 'results': [
-                    {'id': ANY, 'label': 'A', 'balance': '150.00000000'},
-                    {'id': ANY, 'label': 'B', 'balance': '11.00000000'},
+                    {
+                        'id': ANY,
+                        'label': 'A',
+                        'currency': 'USD',
+                        'balance': '150.00000000',
+                        'held': '0.00000000',
+                        'available': '150.00000000',
+                    },
+                    {
+                        'id': ANY,
+                        'label': 'B',
+                        'currency': 'USD',
+                        'balance': '11.00000000',
+                        'held': '0.00000000',
+                        'available': '11.00000000',
+                    },
                 ],
             },
         )
+
+
+@override_settings(WALLET_INCLUDED_TRANSACTIONS=2)
+class IncludeTransactionsTests(APITestCase):
+    def setUp(self):
+        self.wallets = [Wallet.objects.create(label=label, balance='10') for label in 'ABC']
+        Transaction.objects.bulk_create(
+            Transaction(wallet=wallet, txid=f'{wallet.label}{index}', amount='1')
+            for wallet in self.wallets
+            for index in range(3)
+        )
+
+    def recent_txids(self, wallet):
+        return list(wallet.transactions.order_by('-pk').values_list('txid', flat=True)[:2])
+
+    def test_get_many_wallets__include_transactions(self):
+        # act
+        # The page count, the wallets, and the latest transactions of all of them.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('wallet-list-create'), {'include': 'transactions'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [[posting['txid'] for posting in wallet['transactions']] for wallet in response.data['results']],
+            [self.recent_txids(wallet) for wallet in self.wallets],
+        )
+
+    def test_get_many_wallets__without_include(self):
+        # act
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('wallet-list-create'))
+
+        # assert
+        self.assertNotIn('transactions', response.data['results'][0])
+
+    def test_get_wallet__include_transactions__json_api(self):
+        # arrange
+        wallet = self.wallets[0]
+        ids = list(wallet.transactions.order_by('-pk').values_list('pk', flat=True)[:2])
+
+        # act
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('wallet-detail', args=[wallet.id]),
+                {'include': 'transactions'},
+                HTTP_ACCEPT='application/vnd.api+json',
+            )
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        document = response.json()
+        self.assertEqual(document['data']['type'], 'Wallet')
+        self.assertEqual(
+            document['data']['relationships']['transactions']['data'],
+            [{'type': 'Transaction', 'id': str(pk)} for pk in ids],
+        )
+        self.assertEqual(
+            [(resource['type'], resource['attributes']['txid']) for resource in document['included']],
+            [('Transaction', txid) for txid in reversed(self.recent_txids(wallet))],
+        )
+
+    def test_get_wallet__unsupported_include__bad_request(self):
+        # act
+        response = self.client.get(reverse('wallet-detail', args=[self.wallets[0].id]), {'include': 'holds'})
+
+        # assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,113 @@
+"""
+Admission control for postings, shared between workers through the Django cache.
+
+Rate limits are token buckets stored as a single timestamp per key (GCRA): the time at which the bucket would be full
+again. Like DRF's own throttles the read-modify-write is not atomic, so concurrent requests may occasionally both get
+the last token. The concurrency cap uses atomic cache increments.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+from apps.wallet.middleware import SAFE_METHODS, get_client_id
+
+
+def take_token(key: str, rate: float, burst: int) -> float:
+    """Take a token from the bucket `key`; return 0 if one was available, otherwise the seconds until one is."""
+    now = time.time()
+    interval = 1 / rate
+    full_at = max(cache.get(key, now), now) + interval
+    available_at = full_at - burst * interval
+    if available_at > now:
+        return available_at - now
+    cache.set(key, full_at, timeout=math.ceil(full_at - now) + 1)
+    return 0
+
+
+class PostingThrottle(BaseThrottle, ABC):
+    """Token bucket limiting unsafe requests per `get_key`, configured by the `setting` named `(rate, burst)` pair."""
+
+    setting: str
+
+    def __init__(self) -> None:
+        self._wait: float | None = None
+
+    @abstractmethod
+    def get_key(self, request: Request) -> str | None:
+        """The bucket `request` takes its token from, or None to let it through unlimited."""
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        limit = getattr(settings, self.setting)
+        if limit is None or request.method in SAFE_METHODS:
+            return True
+        key = self.get_key(request)
+        if key is None:
+            return True
+        rate, burst = limit
+        self._wait = take_token(f'wallet:throttle:{key}', rate, burst)
+        return not self._wait
+
+    def wait(self) -> float | None:
+        return self._wait
+
+
+class ClientPostingThrottle(PostingThrottle):
+    setting = 'WALLET_POSTING_RATE_PER_CLIENT'
+
+    def get_key(self, request: Request) -> str | None:
+        return get_client_id(request)
+
+
+class WalletPostingThrottle(PostingThrottle):
+    setting = 'WALLET_POSTING_RATE_PER_WALLET'
+
+    def get_key(self, request: Request) -> str | None:
+        # Invalid or missing wallets are left to the serializer to reject.
+        wallet_id = request.data.get('wallet') if isinstance(request.data, dict) else None
+        return f'wallet:{wallet_id}' if str(wallet_id).isdigit() else None
+
+
+@contextmanager
+def posting_slot(wallet_id: int) -> Iterator[None]:
+    """
+    Hold one of `WALLET_POSTING_CONCURRENCY` slots for postings to the wallet, raising `Throttled` when none is free.
+
+    Requests over the cap would only queue up on the wallet's row lock, so they are rejected before touching the
+    database. The counter expires `WALLET_POSTING_SLOT_TIMEOUT` seconds after the last acquire in case a worker dies
+    holding a slot.
+    """
+    limit = settings.WALLET_POSTING_CONCURRENCY
+    if limit is None:
+        yield
+        return
+    key = f'wallet:in-flight:{wallet_id}'
+    timeout = settings.WALLET_POSTING_SLOT_TIMEOUT
+    cache.add(key, 0, timeout=timeout)
+    try:
+        in_flight = cache.incr(key)
+    except ValueError:
+        # The counter expired between `add` and `incr`.
+        cache.add(key, 1, timeout=timeout)
+        in_flight = 1
+    else:
+        # `add` only sets the expiry on creation; keep a busy wallet's counter from expiring under its holders.
+        cache.touch(key, timeout=timeout)
+    try:
+        if in_flight > limit:
+            raise Throttled(wait=settings.WALLET_POSTING_RETRY_AFTER)
+        yield
+    finally:
+        with suppress(ValueError):
+            # Below zero when the counter expired and restarted while this slot was held: give the slot back.
+            if cache.decr(key) < 0:
+                cache.incr(key)
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from rest_framework.serializers import ValidationError
+
+from apps.wallet import sharding
+from apps.wallet.models import Transaction, Wallet
+
+
+# Suffixes appended to a transfer txid to build the txids of its two postings.
+DEBIT_SUFFIX = ':debit'
+CREDIT_SUFFIX = ':credit'
+
+
+@dataclass(frozen=True)
+class Transfer:
+    source_wallet: int
+    destination_wallet: int
+    amount: Decimal
+    txid: str
+
+    def postings(self) -> tuple[Transaction, Transaction]:
+        return (
+            Transaction(wallet_id=self.source_wallet, txid=f'{self.txid}{DEBIT_SUFFIX}', amount=-self.amount),
+            Transaction(wallet_id=self.destination_wallet, txid=f'{self.txid}{CREDIT_SUFFIX}', amount=self.amount),
+        )
+
+
+def execute(transfers: Sequence[Transfer]) -> list[tuple[Transaction, Transaction]]:
+    """
+    Post every transfer as a debit and a credit in one database transaction; either all of them succeed or none.
+
+    All involved wallets are locked up front with a single `SELECT ... ORDER BY id FOR UPDATE`, so concurrent
+    transfers always acquire row locks in the same order and cannot deadlock each other.
+    """
+    wallet_ids = sorted({wallet_id for t in transfers for wallet_id in (t.source_wallet, t.destination_wallet)})
+    databases = {sharding.shard_for_wallet(wallet_id) for wallet_id in wallet_ids}
+    if len(databases) > 1:
+        raise ValidationError('Transfers between wallets on different shards are not supported.')
+    db = databases.pop()
+
+    pairs = [transfer.postings() for transfer in transfers]
+    by_wallet: dict[int, list[Transaction]] = defaultdict(list)
+    for debit, credit in pairs:
+        by_wallet[debit.wallet_id].append(debit)
+        by_wallet[credit.wallet_id].append(credit)
+
+    try:
+        with ExitStack() as reservations:
+            for debit, credit in pairs:
+                reservations.enter_context(debit.reserve_id())
+                reservations.enter_context(credit.reserve_id())
+            with transaction.atomic(using=db):
+                wallets = Wallet.objects.using(db).select_for_update().filter(pk__in=wallet_ids).order_by('pk')
+                locked = {wallet.pk: wallet for wallet in wallets}
+                for wallet_id in by_wallet:
+                    if wallet_id not in locked:
+                        raise ValidationError(f'Wallet {wallet_id} does not exist.')
+                for transfer in transfers:
+                    if locked[transfer.source_wallet].currency != locked[transfer.destination_wallet].currency:
+                        raise ValidationError('Transfers between wallets of different currencies are not supported.')
+                Transaction.objects.post_many(
+                    [(locked[wallet_id], postings) for wallet_id, postings in by_wallet.items()]
+                )
+    except IntegrityError:
+        raise ValidationError('transaction with this txid already exists.') from None
+    return pairs
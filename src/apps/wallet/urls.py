@@ -5,7 +5,18 @@ from apps.wallet import views
 
 urlpatterns = [
     path('v1/wallets/', views.WalletListCreateView.as_view(), name='wallet-list-create'),
+    path('v1/wallets/top/', views.WalletTopView.as_view(), name='wallet-top'),
+    path('v1/wallets/valuation/', views.WalletValuationView.as_view(), name='wallet-valuation'),
     path('v1/wallets/<int:pk>/', views.WalletRetrieveUpdateDestroyView.as_view(), name='wallet-detail'),
+    path('v1/wallets/<int:wallet_id>/holds/', views.HoldListCreateView.as_view(), name='hold-list-create'),
+    path('v1/wallets/<int:wallet_id>/holds/<int:pk>/', views.HoldRetrieveView.as_view(), name='hold-detail'),
+    path('v1/wallets/<int:wallet_id>/holds/<int:pk>/capture/', views.HoldCaptureView.as_view(), name='hold-capture'),
+    path('v1/wallets/<int:wallet_id>/holds/<int:pk>/void/', views.HoldVoidView.as_view(), name='hold-void'),
     path('v1/transactions/', views.TransactionListCreateView.as_view(), name='transaction-list-create'),
+    path('v1/transactions/feed/', views.TransactionFeedView.as_view(), name='transaction-feed'),
     path('v1/transactions/<int:pk>/', views.TransactionRetrieveUpdateDestroyView.as_view(), name='transaction-detail'),
+    path('v1/transfers/', views.TransferCreateView.as_view(), name='transfer-create'),
+    path('v1/transfers/batch/', views.TransferBatchCreateView.as_view(), name='transfer-batch-create'),
+    path('v1/profiles/', views.ProfileListView.as_view(), name='profile-list'),
+    path('v1/profiles/<int:pk>/', views.ProfileDetailView.as_view(), name='profile-detail'),
 ]
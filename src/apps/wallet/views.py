@@ -1,35 +1,380 @@
+import json
+import time
+from collections.abc import AsyncIterator
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F, Prefetch, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics
+from rest_framework import filters, generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework_json_api.renderers import JSONRenderer as JsonApiRenderer
 
+from apps.wallet import feed, fx, holds, leaderboard, listcache, profiling, sharding, throttling
 from apps.wallet.filters import TransactionFilter, WalletFilter
-from apps.wallet.models import Transaction, Wallet
-from apps.wallet.pagination import TransactionPagination, WalletPagination
-from apps.wallet.serializers import TransactionSerializer, WalletSerializer
+from apps.wallet.models import Hold, Transaction, TxidLookup, Wallet, currency_validator
+from apps.wallet.pagination import (
+    TransactionKeysetPagination,
+    TransactionPagination,
+    WalletKeysetPagination,
+    WalletPagination,
+)
+from apps.wallet.routers import use_primary
+from apps.wallet.serializers import (
+    CaptureSerializer,
+    HoldSerializer,
+    PreconditionFailed,
+    TransactionSerializer,
+    TransferSerializer,
+    ValuationSerializer,
+    WalletBalanceSerializer,
+    WalletSerializer,
+)
+
+
+def wallet_etag(wallet: Wallet) -> str:
+    return f'"{wallet.version}"'
+
+
+class ShardedListMixin:
+    """Lists from every wallet shard with keyset pagination when sharding is enabled."""
+
+    pagination_class: type[BasePagination] | None
+    sharded_pagination_class: type[BasePagination]
+
+    @property
+    def paginator(self) -> BasePagination | None:
+        if not hasattr(self, '_paginator'):
+            pagination_class = self.sharded_pagination_class if sharding.is_enabled() else self.pagination_class
+            self._paginator = pagination_class() if pagination_class is not None else None
+        return self._paginator
+
+    def get_list_databases(self) -> list[str]:
+        return sharding.wallet_databases()
+
+
+class CachedListMixin:
+    """Serves repeated listings from `apps.wallet.listcache` when `WALLET_LIST_CACHE_TTL` is set."""
+
+    def get_cached_list_wallet_id(self) -> int | None:
+        """The wallet whose changes alone affect the requested listing, if any."""
+        return None
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not listcache.is_enabled():
+            return super().list(request, *args, **kwargs)
+        key = listcache.response_key(request, self.get_cached_list_wallet_id())
+        cached = listcache.get(key)
+        if cached is not None:
+            return cached
+        # A lagging replica could return data older than the token; the page is cached for everyone, so build it on the
+        # primary.
+        with use_primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.add_post_render_callback(partial(listcache.store, key))
+        return response
+
+
+class IncludeTransactionsMixin:
+    """
+    `?include=transactions` adds the latest `WALLET_INCLUDED_TRANSACTIONS` transactions of every wallet served,
+    fetched for the whole page with one window-function query.
+
+    Clients accepting `application/vnd.api+json` get a JSON:API compound document with the transactions under
+    `included`; others get them nested in each wallet.
+    """
+
+    request: Request
+
+    def get_renderers(self) -> list[BaseRenderer]:
+        return [*super().get_renderers(), JsonApiRenderer()]
+
+    def includes_transactions(self) -> bool:
+        include = self.request.query_params.get('include')
+        included = set(include.split(',')) if include else set()
+        if included - {'transactions'}:
+            raise ValidationError({'include': ['Only `transactions` can be included.']})
+        return bool(included)
+
+    def get_queryset(self) -> QuerySet[Wallet]:
+        queryset = super().get_queryset()
+        if self.includes_transactions():
+            recent = Transaction.objects.order_by('-pk')[: settings.WALLET_INCLUDED_TRANSACTIONS]
+            queryset = queryset.prefetch_related(
+                Prefetch('transactions', queryset=recent, to_attr='recent_transactions')
+            )
+        return queryset
 
+    def get_serializer_context(self) -> dict[str, Any]:
+        return {**super().get_serializer_context(), 'include_transactions': self.includes_transactions()}
 
-class WalletListCreateView(generics.ListCreateAPIView):
-    queryset = Wallet.objects.all()
+
+class WalletListCreateView(CachedListMixin, IncludeTransactionsMixin, ShardedListMixin, generics.ListCreateAPIView):
+    queryset = Wallet.objects.active()
     serializer_class = WalletSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['id', 'label', 'balance']
     pagination_class = WalletPagination
+    sharded_pagination_class = WalletKeysetPagination
     filterset_class = WalletFilter
 
 
-class WalletRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Wallet.objects.all()
+class WalletRetrieveUpdateDestroyView(IncludeTransactionsMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Wallet.objects.active()
     serializer_class = WalletSerializer
 
+    def get_queryset(self) -> QuerySet[Wallet]:
+        queryset = super().get_queryset()
+        if sharding.is_enabled():
+            queryset = queryset.using(sharding.shard_for_wallet(self.kwargs['pk']))
+        return queryset
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        instance = self.get_object()
+        return Response(self.get_serializer(instance).data, headers={'ETag': wallet_etag(instance)})
+
+    def update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        instance = self.get_object()
+        expected_version = self.get_expected_version(instance)
+        serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
+        serializer.is_valid(raise_exception=True)
+        serializer.save(expected_version=expected_version)
+        return Response(serializer.data, headers={'ETag': wallet_etag(instance)})
+
+    def get_expected_version(self, instance: Wallet) -> int | None:
+        """The version an `If-Match` request was made against, or None to update unconditionally."""
+        if_match = self.request.headers.get('If-Match', '').strip()
+        if not if_match or if_match == '*':
+            return None
+        if wallet_etag(instance) not in {tag.strip() for tag in if_match.split(',')}:
+            raise PreconditionFailed
+        return instance.version
+
+    def perform_destroy(self, instance: Wallet) -> None:
+        if not settings.WALLET_SOFT_DELETE:
+            instance.delete()
+            return
+        # Hiding the wallet is a single-row update; its transactions are removed later by `purge_wallets`.
+        Wallet.objects.using(instance._state.db).filter(pk=instance.pk).update(
+            deleted_at=timezone.now(), version=F('version') + 1
+        )
+        transaction.on_commit(partial(leaderboard.discard, instance.pk), using=instance._state.db)
+        transaction.on_commit(partial(listcache.invalidate, [instance.pk]), using=instance._state.db)
+
+
+class WalletTopView(generics.GenericAPIView):
+    """The richest wallets, served from the cached leaderboard."""
+
+    serializer_class = WalletBalanceSerializer
+
+    def get(self, request: Request) -> Response:
+        try:
+            limit = int(request.query_params.get('limit', settings.WALLET_LEADERBOARD_SIZE))
+        except ValueError:
+            limit = settings.WALLET_LEADERBOARD_SIZE
+        limit = max(1, min(limit, settings.WALLET_LEADERBOARD_SIZE))
+        wallets = [
+            Wallet(id=entry.wallet_id, label=entry.label, balance=entry.balance) for entry in leaderboard.top(limit)
+        ]
+        return Response({'results': self.get_serializer(wallets, many=True).data})
 
-class TransactionListCreateView(generics.ListCreateAPIView):
+
+class WalletValuationView(generics.GenericAPIView):
+    """Balances of all active wallets per currency and their total in a reporting currency (`?currency=`)."""
+
+    serializer_class = ValuationSerializer
+
+    def get(self, request: Request) -> Response:
+        currency = request.query_params.get('currency', settings.WALLET_REPORTING_CURRENCY)
+        try:
+            currency_validator(currency)
+        except DjangoValidationError as error:
+            raise ValidationError({'currency': error.messages}) from None
+        return Response(self.get_serializer(fx.valuation(currency)).data)
+
+
+class TransactionListCreateView(CachedListMixin, ShardedListMixin, generics.ListCreateAPIView):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['txid', 'amount', 'created_at']
     pagination_class = TransactionPagination
+    sharded_pagination_class = TransactionKeysetPagination
     filterset_class = TransactionFilter
+    throttle_classes = [throttling.ClientPostingThrottle, throttling.WalletPostingThrottle]
+
+    def perform_create(self, serializer: TransactionSerializer) -> None:
+        with throttling.posting_slot(serializer.validated_data['wallet'].pk):
+            super().perform_create(serializer)
+
+    def get_filtered_wallet_id(self) -> int | None:
+        wallet_id = self.request.query_params.get('wallet_id', '')
+        return int(wallet_id) if wallet_id.isdigit() else None
+
+    def get_list_databases(self) -> list[str]:
+        # Transactions of a single wallet all live on that wallet's shard.
+        wallet_id = self.get_filtered_wallet_id()
+        if wallet_id is not None:
+            return [sharding.shard_for_wallet(wallet_id)]
+        return super().get_list_databases()
+
+    def get_cached_list_wallet_id(self) -> int | None:
+        return self.get_filtered_wallet_id()
+
+
+class TransactionFeedView(View):
+    """
+    Newly posted transactions after a cursor (`after`, a transaction id), in id order.
+
+    Plain requests long-poll: they return as soon as there are transactions past the cursor, or an empty page after
+    `timeout` seconds. With `Accept: text/event-stream` the response is a Server-Sent Events stream resumable with
+    `Last-Event-ID`. Both hold a connection while waiting, so serve them from the ASGI application.
+    """
+
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        try:
+            after = int(request.headers.get('Last-Event-ID') or request.GET.get('after', 0))
+            limit = min(int(request.GET.get('limit', 100)), settings.WALLET_FEED_MAX_LIMIT)
+            timeout = min(
+                float(request.GET.get('timeout', settings.WALLET_FEED_MAX_WAIT_SECONDS)),
+                settings.WALLET_FEED_MAX_WAIT_SECONDS,
+            )
+        except ValueError:
+            return JsonResponse({'detail': '`after`, `limit` and `timeout` must be numbers.'}, status=400)
+        if after < 0 or limit < 1 or timeout < 0:
+            return JsonResponse({'detail': '`after`, `limit` and `timeout` must not be negative.'}, status=400)
+
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            response = StreamingHttpResponse(self.stream(after, limit), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        rows = await feed.wait(after, limit, timeout)
+        return JsonResponse(
+            {
+                'results': TransactionSerializer(rows, many=True).data,
+                'cursor': rows[-1].pk if rows else after,
+            }
+        )
+
+    async def stream(self, after: int, limit: int) -> AsyncIterator[str]:
+        # The stream is closed after a while; clients reconnect with `Last-Event-ID`.
+        deadline = time.monotonic() + settings.WALLET_FEED_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            rows = await feed.wait(after, limit, settings.WALLET_FEED_HEARTBEAT_SECONDS)
+            if not rows:
+                yield ': keep-alive\n\n'
+                continue
+            for row in rows:
+                yield f'id: {row.pk}\nevent: transaction\ndata: {json.dumps(TransactionSerializer(row).data)}\n\n'
+            after = rows[-1].pk
 
 
 class TransactionRetrieveUpdateDestroyView(generics.RetrieveAPIView):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
+
+    def get_queryset(self) -> QuerySet[Transaction]:
+        queryset = super().get_queryset()
+        if sharding.is_enabled():
+            lookup = TxidLookup.objects.filter(pk=self.kwargs['pk']).first()
+            if lookup is None:
+                raise Http404
+            queryset = queryset.using(sharding.shard_for_wallet(lookup.wallet_id))
+        return queryset
+
+
+class HoldListCreateView(generics.ListCreateAPIView):
+    """Holds of a wallet; creating one authorizes it."""
+
+    queryset = Hold.objects.all()
+    serializer_class = HoldSerializer
+
+    def get_queryset(self) -> QuerySet[Hold]:
+        wallet_id = self.kwargs['wallet_id']
+        return (
+            super()
+            .get_queryset()
+            .using(sharding.shard_for_wallet(wallet_id))
+            .filter(wallet_id=wallet_id)
+            .order_by('-pk')
+        )
+
+    def perform_create(self, serializer: HoldSerializer) -> None:
+        serializer.save(wallet_id=self.kwargs['wallet_id'])
+
+
+class HoldRetrieveView(generics.RetrieveAPIView):
+    serializer_class = HoldSerializer
+
+    def get_object(self) -> Hold:
+        wallet_id = self.kwargs['wallet_id']
+        return holds.get_hold(sharding.shard_for_wallet(wallet_id), wallet_id, self.kwargs['pk'])
+
+
+class HoldCaptureView(generics.GenericAPIView):
+    """Posts the hold (or part of it) as a debit; responds with the transaction."""
+
+    serializer_class = CaptureSerializer
+
+    def post(self, request: Request, wallet_id: int, pk: int) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        posting = holds.capture(wallet_id, pk, serializer.validated_data.get('amount'))
+        return Response(TransactionSerializer(posting).data, status=status.HTTP_201_CREATED)
+
+
+class HoldVoidView(generics.GenericAPIView):
+    serializer_class = HoldSerializer
+
+    def post(self, request: Request, wallet_id: int, pk: int) -> Response:
+        return Response(self.get_serializer(holds.void(wallet_id, pk)).data)
+
+
+class TransferCreateView(generics.CreateAPIView):
+    serializer_class = TransferSerializer
+
+
+class TransferBatchCreateView(generics.CreateAPIView):
+    serializer_class = TransferSerializer
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> TransferSerializer:
+        kwargs.update(many=True, allow_empty=False, max_length=settings.WALLET_TRANSFER_BATCH_MAX_SIZE)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ProfileListView(generics.GenericAPIView):
+    """Summaries of the stored request profiles, newest first. See `apps.wallet.profiling`."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        details = {'stacks', 'queries'}
+        return Response(
+            [{name: value for name, value in entry.items() if name not in details} for entry in profiling.reports()]
+        )
+
+
+class ProfileDetailView(generics.GenericAPIView):
+    """A stored request profile with its collapsed stacks and SQL statements."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request, pk: int) -> Response:
+        entry = profiling.get(pk)
+        if entry is None:
+            raise Http404
+        return Response(entry)
@@ -0,0 +1,4 @@
+# isort: skip_file
+# The lean overrides must be applied after the environment's settings.
+from .prod import *  # noqa: F403
+from .lean import *  # noqa: F403
@@ -54,6 +54,7 @@ REST_FRAMEWORK = {
 
 
 MIDDLEWARE = [
+    'apps.wallet.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.wallet.middleware.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'src.urls'
@@ -98,6 +100,114 @@ DATABASES = {
     }
 }
 
+# Django's default local-memory cache culls at 300 keys, fewer than the list pages, throttle buckets and queued
+# leaderboard changes it holds under load. Processes do not share it; see WALLET_LIST_CACHE_TTL.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    }
+}
+
+DATABASE_ROUTERS = [
+    'apps.wallet.routers.WalletShardRouter',
+    'apps.wallet.routers.PrimaryReplicaRouter',
+]
+
+# Aliases from DATABASES that serve safe reads. Empty means every query goes to `default`.
+DATABASE_REPLICAS: list[str] = []
+
+# Seconds a client keeps reading from the primary after a successful write (read-your-writes).
+REPLICA_PIN_SECONDS = 5
+
+# Aliases from DATABASES holding wallets and their transactions, chosen by `wallet_id % len(WALLET_SHARDS)`.
+# Wallet ids and txids are allocated on `default`. Empty means wallets live in `default` like everything else.
+WALLET_SHARDS: list[str] = []
+
+# Wallet deletion only marks the wallet deleted; `./manage.py purge_wallets` removes it and its transactions in batches.
+WALLET_SOFT_DELETE = False
+
+# Maximum number of transfers accepted by `/api/v1/transfers/batch/`, all posted in one database transaction.
+WALLET_TRANSFER_BATCH_MAX_SIZE = 1000
+
+# Latest transactions of each wallet added to wallet responses by `?include=transactions`.
+WALLET_INCLUDED_TRANSACTIONS = 10
+
+# Seconds a page of `/api/v1/wallets/` or `/api/v1/transactions/` stays cached for identical requests; changes to
+# wallets and postings invalidate the affected pages as they commit. None disables the cache. Invalidation goes through
+# the Django cache, so every worker must share one (not the local-memory backend) when this is enabled.
+WALLET_LIST_CACHE_TTL: int | None = None
+
+# Rows the admin counts at most for a changelist; larger results show this many, unfiltered PostgreSQL tables the
+# planner's estimate.
+WALLET_ADMIN_COUNT_LIMIT = 10_000
+
+# Request profiling (`apps.wallet.profiling`). Requests with an `X-Wallet-Profile` header from `./manage.py profiles
+# --token` (valid for WALLET_PROFILE_TOKEN_MAX_AGE seconds) are always profiled; WALLET_PROFILE_SAMPLE_RATE of the
+# others are, and kept when slower than WALLET_PROFILE_SLOW_SECONDS. Stacks are sampled every WALLET_PROFILE_INTERVAL
+# seconds and the last WALLET_PROFILE_BUFFER_SIZE reports are kept in the Django cache.
+WALLET_PROFILE_SAMPLE_RATE = 0.0
+WALLET_PROFILE_SLOW_SECONDS = 1.0
+WALLET_PROFILE_INTERVAL = 0.005
+WALLET_PROFILE_BUFFER_SIZE = 100
+WALLET_PROFILE_TOKEN_MAX_AGE = 3600
+
+# Richest wallets served by `/api/v1/wallets/top/` from the cache. The cached board keeps `WALLET_LEADERBOARD_SLACK`
+# extra entries so wallets dropping out of the top do not force a rebuild; it is rebuilt at least every TTL seconds.
+WALLET_LEADERBOARD_SIZE = 100
+WALLET_LEADERBOARD_SLACK = 100
+WALLET_LEADERBOARD_TTL = 300
+
+# Transaction change feed (`/api/v1/transactions/feed/`). Waiting consumers check a change counter in the cache every
+# POLL seconds and query the database when it moves, or every RECHECK seconds regardless. Rows younger than SETTLE
+# seconds are held back so a transaction committing late with a lower id is not skipped; one committing more than
+# SETTLE seconds after its insert still is, so keep it above the longest posting transaction.
+WALLET_FEED_POLL_SECONDS = 0.05
+WALLET_FEED_RECHECK_SECONDS = 5
+WALLET_FEED_SETTLE_SECONDS = 0.2
+WALLET_FEED_MAX_LIMIT = 1000
+WALLET_FEED_MAX_WAIT_SECONDS = 30
+WALLET_FEED_HEARTBEAT_SECONDS = 15
+WALLET_FEED_STREAM_SECONDS = 300
+
+# Postings are recorded as outbox events and published by `./manage.py relay_outbox` to WALLET_OUTBOX_SINK:
+# `apps.wallet.outbox.FileSink` appends JSON lines to WALLET_OUTBOX_FILE, `apps.wallet.outbox.HttpSink` POSTs
+# batches to WALLET_OUTBOX_URL.
+WALLET_OUTBOX_SINK = 'apps.wallet.outbox.FileSink'
+WALLET_OUTBOX_FILE = BASE_DIR.parent / 'outbox.jsonl'
+WALLET_OUTBOX_URL = ''
+WALLET_OUTBOX_HTTP_TIMEOUT = 10
+WALLET_OUTBOX_BATCH_SIZE = 500
+
+# Admission control for `POST /api/v1/transactions/`, kept in the Django cache. Token buckets per client and per wallet
+# as `(tokens per second, bucket size)`, and the number of postings to one wallet processed at once; None disables
+# a limit. Rejected requests get 429 with `Retry-After`.
+WALLET_POSTING_RATE_PER_CLIENT: tuple[float, int] | None = None
+WALLET_POSTING_RATE_PER_WALLET: tuple[float, int] | None = None
+WALLET_POSTING_CONCURRENCY: int | None = None
+WALLET_POSTING_RETRY_AFTER = 1
+WALLET_POSTING_SLOT_TIMEOUT = 30
+
+# Group commit of `POST /api/v1/transactions/`: postings to one wallet arriving within WALLET_GROUP_COMMIT_WINDOW
+# seconds in the same process share one database transaction, of at most WALLET_GROUP_COMMIT_MAX_BATCH postings.
+# None disables it.
+WALLET_GROUP_COMMIT_WINDOW: float | None = None
+WALLET_GROUP_COMMIT_MAX_BATCH = 100
+
+# Lifetime of a hold in seconds when the request does not set `ttl`, and the longest one allowed. Expired holds are
+# released by `./manage.py expire_holds`.
+WALLET_HOLD_TTL = 7 * 24 * 3600
+WALLET_HOLD_MAX_TTL = 30 * 24 * 3600
+
+# Currency of `/api/v1/wallets/valuation/` unless the request asks for another one, and how long each process keeps
+# the exchange rates loaded by `./manage.py load_rates` before reading them again, in seconds.
+WALLET_REPORTING_CURRENCY = 'USD'
+WALLET_FX_RATES_TTL = 60
+
+# Store balances and amounts as BIGINT counts of 1e-8 units instead of DECIMAL(30,8) and DECIMAL(18,8), which limits
+# them to +/-92,233,720,368.54775807. Set before migrating; after changing it run `./manage.py convert_amounts`.
+WALLET_SCALED_AMOUNTS = False
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,34 @@
+"""
+Overrides for workers serving only the JSON API: no admin, sessions, messages, static files or templates, so workers
+import less and boot faster. Star-import it after the environment's settings (see `api.py`); serve the admin from
+a separate deployment on the full settings.
+"""
+
+from . import base
+
+
+API_UNUSED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+)
+INSTALLED_APPS = [app for app in base.INSTALLED_APPS if app not in API_UNUSED_APPS]
+
+MIDDLEWARE = [
+    'apps.wallet.middleware.ProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'apps.wallet.middleware.ReplicaPinningMiddleware',
+]
+
+TEMPLATES = []
+
+# Without sessions there is nothing to authenticate against; clients are identified by address.
+REST_FRAMEWORK = {
+    **base.REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
@@ -17,3 +17,22 @@ DATABASES = {
         'PORT': os.environ['DB_PORT'],
     }
 }
+
+# Comma-separated replica hosts sharing the primary's credentials, e.g. `mysql-replica-1,mysql-replica-2`.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+# Comma-separated shard hosts sharing the primary's credentials. The order must never change once data is written.
+WALLET_SHARDS = []
+for index, host in enumerate(filter(None, os.environ.get('DB_SHARD_HOSTS', '').split(','))):
+    alias = f'shard_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip()}
+    WALLET_SHARDS.append(alias)
+
+# Publish postings over HTTP when an endpoint is configured, otherwise to the JSON lines file.
+if os.environ.get('OUTBOX_URL'):
+    WALLET_OUTBOX_SINK = 'apps.wallet.outbox.HttpSink'
+    WALLET_OUTBOX_URL = os.environ['OUTBOX_URL']
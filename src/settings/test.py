@@ -0,0 +1,20 @@
+from .base import *  # noqa: F403
+
+
+# SQLite databases standing in for the MySQL primary, a read replica and a second wallet shard. The replica mirrors
+# `default` in tests, so routing can be exercised without a replication setup.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent / 'db.sqlite3',  # noqa: F405
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent / 'db-replica.sqlite3',  # noqa: F405
+        'TEST': {'MIRROR': 'default'},
+    },
+    'shard_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent / 'db-shard-1.sqlite3',  # noqa: F405
+    },
+}
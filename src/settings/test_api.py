@@ -0,0 +1,4 @@
+# isort: skip_file
+# SQLite settings with the lean API overrides, for booting and testing the API profile without MySQL.
+from .test import *  # noqa: F403
+from .lean import *  # noqa: F403
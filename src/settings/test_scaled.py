@@ -0,0 +1,5 @@
+# SQLite settings storing amounts as scaled integers, for running the suite against that storage.
+from .test import *  # noqa: F403
+
+
+WALLET_SCALED_AMOUNTS = True
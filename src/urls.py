@@ -15,11 +15,16 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
+from django.apps import apps
 from django.urls import include, path
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('apps.wallet.urls')),
 ]
+
+# The lean API profile (`src.settings.api`) runs without the admin.
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))